@@ -1,10 +1,12 @@
 """
 Main application module for Srazy web application
 """
-from flask import Flask, render_template, jsonify, request, session
+from flask import Flask, render_template, jsonify, request, session, abort
+import math
 import os
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
 
 # Get the absolute path to the app directory
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -17,28 +19,274 @@ app = Flask(__name__,
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', f'sqlite:///{BASE_DIR}/srazy.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['JSON_BACKEND'] = os.environ.get('JSON_BACKEND', 'auto')
+
+# Number of reverse proxies in front of the app whose X-Forwarded-For is trusted,
+# so request.remote_addr (which keys rate limits of logged out clients) is the client's
+app.config['TRUSTED_PROXIES'] = int(os.environ.get('TRUSTED_PROXIES', '0'))
+if app.config['TRUSTED_PROXIES']:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'])
+
+# Read replicas (comma-separated URLs), used by read-only handlers
+from app.backend.routing import replica_binds, read_only, init_routing
+app.config['SQLALCHEMY_BINDS'] = replica_binds(os.environ.get('DATABASE_REPLICA_URLS', ''))
+app.config['REPLICA_STICKY_SECONDS'] = int(os.environ.get('REPLICA_STICKY_SECONDS', '5'))
+
+# JSON provider (orjson when installed)
+from app.backend.serialization import (
+    FastJSONProvider, encode_event_row, encode_marker_row, encode_user_row, encode_rows
+)
+app.json = FastJSONProvider(app)
 
 # Initialize database
-from app.backend.models import db, Event, User
+from app.backend.models import (
+    db, Event, EventSeries, SeriesOccurrence, User, SessionRecord, PendingTask, DataVersion,
+    Sport, Difficulty, event_participants, events_archive, interner
+)
+from app.backend.queries import (
+    fetch_event_rows, fetch_user_row, fetch_participating_ids, fetch_user_event_rows,
+    fetch_event_locations, fetch_upcoming_marker_rows, fetch_lookup_names, encode_cursor, decode_cursor
+)
+from app.backend.series import expand_series, find_occurrence_event, materialize_occurrence
 db.init_app(app)
+init_routing(app, db)
+
+# Recurring series are expanded this many days ahead when no date_to is given
+app.config['SERIES_EXPANSION_DAYS'] = int(os.environ.get('SERIES_EXPANSION_DAYS', '90'))
 
 # Session configuration
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+app.config['SESSION_BACKEND'] = os.environ.get('SESSION_BACKEND', 'cookie')
+app.config['SESSION_SWEEP_INTERVAL'] = int(os.environ.get('SESSION_SWEEP_INTERVAL', '300'))
+app.config['CURRENT_USER_CACHE_TTL'] = int(os.environ.get('CURRENT_USER_CACHE_TTL', '30'))
+
+# Server-side sessions ('cookie' keeps Flask's signed cookie sessions)
+from app.backend.sessions import ServerSideSessionInterface, MemorySessionStore, SQLSessionStore
+if app.config['SESSION_BACKEND'] == 'sqlalchemy':
+    app.session_interface = ServerSideSessionInterface(
+        SQLSessionStore(db, SessionRecord.__table__), app.config['SESSION_SWEEP_INTERVAL'])
+elif app.config['SESSION_BACKEND'] == 'memory':
+    app.session_interface = ServerSideSessionInterface(
+        MemorySessionStore(), app.config['SESSION_SWEEP_INTERVAL'])
+
+# Per-worker cache of logged in user records, keyed by user id
+from app.backend.cache import TTLCache
+current_user_cache = TTLCache(ttl=app.config['CURRENT_USER_CACHE_TTL'])
+
+# Per-worker spatial index of event locations, loaded on first use and
+# reloaded when another worker moves, adds or removes events (checked every few seconds)
+app.config['SPATIAL_INDEX_REFRESH_INTERVAL'] = float(os.environ.get('SPATIAL_INDEX_REFRESH_INTERVAL', '5'))
+from app.backend.spatial import SpatialIndex
+
+# Data version bumped only by writes that change the spatial index
+LOCATIONS_VERSION = 'event_locations'
+
+def locations_version():
+    """Version of the event locations on the primary, for the spatial index"""
+    with db.engine.connect() as conn:
+        return data_versions.get(LOCATIONS_VERSION, conn)
+
+spatial_index = SpatialIndex(loader=fetch_event_locations, version=locations_version,
+                             refresh_interval=app.config['SPATIAL_INDEX_REFRESH_INTERVAL'])
+
+# Background tasks for side effects of writes, run after the transaction commits
+app.config['TASK_WORKERS'] = int(os.environ.get('TASK_WORKERS', '2'))
+app.config['TASK_QUEUE_SIZE'] = int(os.environ.get('TASK_QUEUE_SIZE', '1000'))
+app.config['TASKS_EAGER'] = os.environ.get('TASKS_EAGER', 'False') == 'True'
+from app.backend.tasks import TaskQueue
+task_queue = TaskQueue(app, db, PendingTask.__table__,
+                       workers=app.config['TASK_WORKERS'],
+                       maxsize=app.config['TASK_QUEUE_SIZE'],
+                       eager=app.config['TASKS_EAGER'])
+
+# Spatial index upkeep only concerns this worker's index, so it is never stored
+@task_queue.task(durable=False)
+def index_event(event_id, latitude, longitude, date):
+    """Add or move an event in the spatial index"""
+    spatial_index.upsert(event_id, latitude, longitude, datetime.fromisoformat(date))
+
+@task_queue.task(durable=False)
+def unindex_events(event_ids):
+    """Remove several events from the spatial index"""
+    for event_id in event_ids:
+        spatial_index.remove(event_id)
+
+# Rendered pages cached per worker, keyed by the version of the data they show
+app.config['FRAGMENT_CACHE_TTL'] = int(os.environ.get('FRAGMENT_CACHE_TTL', '300'))
+app.config['INITIAL_EVENTS_LIMIT'] = int(os.environ.get('INITIAL_EVENTS_LIMIT', '200'))
+app.config['VOCABULARY_MAX_AGE'] = int(os.environ.get('VOCABULARY_MAX_AGE', '300'))
+from app.backend.fragments import DataVersions, FragmentCache
+data_versions = DataVersions(db, DataVersion.__table__, {
+    'events': (Event, EventSeries, SeriesOccurrence, User),
+})
+fragment_cache = FragmentCache(ttl=app.config['FRAGMENT_CACHE_TTL'])
+data_versions.subscribe(LOCATIONS_VERSION, spatial_index.advance)
+
+# Rate limits per client and route class, as 'rate/burst' (tokens per second / bucket size)
+app.config['RATE_LIMITS_ENABLED'] = os.environ.get('RATE_LIMITS_ENABLED', 'True') == 'True'
+app.config['RATE_LIMIT_BACKEND'] = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+app.config['RATE_LIMIT_SQLITE_PATH'] = os.environ.get('RATE_LIMIT_SQLITE_PATH', f'{BASE_DIR}/ratelimit.db')
+app.config['RATE_LIMITS'] = {
+    'read': os.environ.get('RATE_LIMIT_READ', '20/200'),
+    'search': os.environ.get('RATE_LIMIT_SEARCH', '10/100'),
+    'write': os.environ.get('RATE_LIMIT_WRITE', '5/100'),
+    'auth': os.environ.get('RATE_LIMIT_AUTH', '1/50'),
+}
+app.config['SEARCH_CONCURRENCY'] = int(os.environ.get('SEARCH_CONCURRENCY', '8'))
+app.config['RATE_LIMIT_METRICS_TOKEN'] = os.environ.get('RATE_LIMIT_METRICS_TOKEN', '')
+from app.backend.ratelimit import RateLimiter, MemoryRateLimitBackend, SQLiteRateLimitBackend, parse_limit
+if app.config['RATE_LIMIT_BACKEND'] == 'sqlite':
+    rate_limit_backend = SQLiteRateLimitBackend(app.config['RATE_LIMIT_SQLITE_PATH'])
+else:
+    rate_limit_backend = MemoryRateLimitBackend()
+limiter = RateLimiter(
+    rate_limit_backend,
+    {name: parse_limit(value) for name, value in app.config['RATE_LIMITS'].items()},
+    concurrency={'search': app.config['SEARCH_CONCURRENCY']},
+    enabled=app.config['RATE_LIMITS_ENABLED'],
+    metrics_token=app.config['RATE_LIMIT_METRICS_TOKEN']
+)
 
-# Create tables
+# Create tables; databases from older versions are converted by `flask migrate-db`
+from app.backend.migrations import pending_migrations, init_migrations
 with app.app_context():
     db.create_all()
+    pending = pending_migrations(db)
+    if pending:
+        app.logger.warning(f'Tables {", ".join(pending)} need converting: run flask migrate-db')
+init_migrations(app, db, interner)
+
+# Events older than ARCHIVE_AFTER_DAYS are moved to archive tables by the archive-events command
+app.config['ARCHIVE_AFTER_DAYS'] = int(os.environ.get('ARCHIVE_AFTER_DAYS', '30'))
+app.config['ARCHIVE_BATCH_SIZE'] = int(os.environ.get('ARCHIVE_BATCH_SIZE', '500'))
+from app.backend.archive import archive_events, init_archive
+
+def archive_horizon():
+    """Date before which events are moved to the archive"""
+    return datetime.now() - timedelta(days=app.config['ARCHIVE_AFTER_DAYS'])
+
+def archive_past_events():
+    """Archive events older than the horizon; returns the number moved"""
+    def after_batch(ids):
+        data_versions.bump('events')
+        unindex_after_commit(ids)
+    return archive_events(db, archive_horizon(), app.config['ARCHIVE_BATCH_SIZE'], after_batch)
+
+init_archive(app, archive_past_events)
+
+# Fingerprinted static assets with long-lived caching
+app.config['ASSETS_PRECOMPRESS'] = os.environ.get('ASSETS_PRECOMPRESS', 'True') == 'True'
+from app.backend.assets import init_assets
+init_assets(app)
+
+# On-demand profiling of requests that present PROFILING_TOKEN
+app.config['PROFILING_ENABLED'] = os.environ.get('PROFILING_ENABLED', 'False') == 'True'
+app.config['PROFILING_TOKEN'] = os.environ.get('PROFILING_TOKEN', '')
+app.config['PROFILING_INTERVAL'] = float(os.environ.get('PROFILING_INTERVAL', '0.002'))
+app.config['PROFILING_STORE_SIZE'] = int(os.environ.get('PROFILING_STORE_SIZE', '50'))
+from app.backend.profiling import RequestProfiler, init_profiling
+profiler = RequestProfiler(token=app.config['PROFILING_TOKEN'],
+                           enabled=app.config['PROFILING_ENABLED'],
+                           interval=app.config['PROFILING_INTERVAL'],
+                           maxsize=app.config['PROFILING_STORE_SIZE'])
+init_profiling(app, profiler)
+
+def load_current_user():
+    """Return the logged in user as a dictionary, or None"""
+    user_id = session.get('user_id')
+    if user_id is None:
+        return None
+    
+    user = current_user_cache.get(user_id)
+    if user is None:
+        row = fetch_user_row(user_id)
+        if row is None:
+            return None
+        user = encode_user_row(row)
+        current_user_cache.set(user_id, user)
+    return user
+
+def arg_flag(name):
+    """Read a boolean query string flag"""
+    return request.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+def parse_query_datetime(value):
+    """Parse an ISO date for filtering; offsets are converted to naive local time like stored dates"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+def parse_optional(data, field, parse):
+    """Parse an optional field of a JSON body"""
+    value = data.get(field)
+    return parse(value) if value not in (None, '') else None
+
+def toggle_participation(user_id, event_id):
+    """Join or leave an event and commit; returns (participating, participant_count)"""
+    # Work on the association table directly, without loading the user's events
+    membership = ((event_participants.c.user_id == user_id) &
+                  (event_participants.c.event_id == event_id))
+    participating = db.session.execute(
+        select(event_participants.c.user_id).where(membership)
+    ).first() is not None
+    
+    if participating:
+        # Remove participation
+        db.session.execute(event_participants.delete().where(membership))
+    else:
+        # Add participation
+        db.session.execute(event_participants.insert().values(user_id=user_id, event_id=event_id))
+    data_versions.bump('events')
+    db.session.commit()
+    
+    participant_count = db.session.execute(
+        select(func.count()).select_from(event_participants)
+        .where(event_participants.c.event_id == event_id)
+    ).scalar()
+    return not participating, participant_count
+
+def index_after_commit(event):
+    """Update the spatial index for an event once the transaction commits"""
+    data_versions.bump(LOCATIONS_VERSION)
+    task_queue.after_commit(index_event, event.id, event.latitude, event.longitude, event.date.isoformat())
+
+def unindex_after_commit(event_ids):
+    """Remove events from the spatial index once the transaction commits"""
+    data_versions.bump(LOCATIONS_VERSION)
+    task_queue.after_commit(unindex_events, list(event_ids))
+
+def cached_render(key, template, context=dict):
+    """Render a template, reusing the cached HTML for key outside debug mode
+    
+    ``context`` is only called on a cache miss. A key of None skips the cache.
+    """
+    if app.debug or key is None:
+        return render_template(template, **context())
+    return fragment_cache.render(key, lambda: render_template(template, **context()))
+
+def initial_events():
+    """Compact rows of the next upcoming events, embedded in the events page"""
+    rows = fetch_upcoming_marker_rows(datetime.now(), app.config['INITIAL_EVENTS_LIMIT'])
+    return {'initial_events': encode_rows(encode_marker_row, rows)}
+
+def login_session(user):
+    """Store the user in the session and the current user cache"""
+    session['user_id'] = user.id
+    session['username'] = user.username
+    current_user_cache.set(user.id, user.to_dict())
 
 @app.route('/')
 def index():
     """Home page route"""
-    return render_template('index.html')
+    return cached_render(('index',), 'index.html')
 
 @app.route('/about')
 def about():
     """About page route"""
-    return render_template('about.html')
+    return cached_render(('about',), 'about.html')
 
 @app.route('/contact')
 def contact():
@@ -47,44 +295,138 @@ def contact():
 
 @app.route('/events')
 def events():
-    """Events map page route"""
-    return render_template('events.html')
+    """Events map page route
+    
+    The page embeds the first upcoming events so the map can show them
+    before the full list is fetched.
+    """
+    version = data_versions.get('events')
+    return cached_render(('events', version) if version else None, 'events.html', initial_events)
 
 @app.route('/api/events', methods=['GET'])
+@limiter.limit('search')
+@read_only
 def get_events():
-    """Get all events with optional filtering"""
+    """Get all events with optional filtering
+    
+    With include_participation=true and a logged in user, each event gets a
+    'participating' flag, looked up with one query for the whole page.
+    
+    Without date_from, only upcoming events are listed unless
+    include_past=true. Archived events are added when include_past=true or
+    when date_from is before the archive horizon.
+    
+    Occurrences of recurring series are expanded within date_from/date_to
+    (by default from now until SERIES_EXPANSION_DAYS ahead). Occurrences
+    without an Event row have a string id and carry series_id/occurrence.
+    """
     try:
-        query = Event.query
-        
-        # Apply filters if provided
-        sport = request.args.get('sport')
-        if sport:
-            query = query.filter(Event.sport == sport)
+        filters = {
+            'sport': request.args.get('sport'),
+            'place': request.args.get('place'),
+            'difficulty': request.args.get('difficulty'),
+        }
         
+        include_past = arg_flag('include_past')
+        now = datetime.now()
         date_from = request.args.get('date_from')
         if date_from:
-            date_from_dt = datetime.fromisoformat(date_from)
-            query = query.filter(Event.date >= date_from_dt)
+            filters['date_from'] = parse_query_datetime(date_from)
+        elif not include_past:
+            filters['date_from'] = now
         
         date_to = request.args.get('date_to')
         if date_to:
-            date_to_dt = datetime.fromisoformat(date_to)
-            query = query.filter(Event.date <= date_to_dt)
+            filters['date_to'] = parse_query_datetime(date_to)
+        
+        include_archive = include_past or filters['date_from'] < archive_horizon()
+        rows = fetch_event_rows(include_archive=include_archive, **filters)
+        events = encode_rows(encode_event_row, rows)
         
-        place = request.args.get('place')
-        if place:
-            query = query.filter(Event.place.ilike(f'%{place}%'))
+        window_start = filters.get('date_from') or now
+        window_end = filters.get('date_to') or window_start + timedelta(days=app.config['SERIES_EXPANSION_DAYS'])
+        occurrences = expand_series(window_start, window_end, sport=filters['sport'],
+                                    place=filters['place'], difficulty=filters['difficulty'])
         
-        difficulty = request.args.get('difficulty')
-        if difficulty:
-            query = query.filter(Event.difficulty == difficulty)
+        if arg_flag('include_participation'):
+            user = load_current_user()
+            if user is not None:
+                participating = fetch_participating_ids(user['id'], [row.id for row in rows],
+                                                        include_archive=include_archive)
+                for event in events:
+                    event['participating'] = event['id'] in participating
+                for occurrence in occurrences:
+                    occurrence['participating'] = False
         
-        events = query.all()
-        return jsonify([event.to_dict() for event in events])
+        events.extend(occurrences)
+        
+        return jsonify(events)
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+@app.route('/api/sports', methods=['GET'])
+@limiter.limit('read')
+@read_only
+def get_sports():
+    """Sport and difficulty vocabularies for the filter dropdowns
+    
+    Cacheable by browsers for a few minutes and revalidated with an ETag.
+    """
+    response = jsonify({
+        'sports': fetch_lookup_names(Sport),
+        'difficulties': fetch_lookup_names(Difficulty)
+    })
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['VOCABULARY_MAX_AGE']
+    response.add_etag()
+    return response.make_conditional(request)
+
+@app.route('/api/events/nearby', methods=['GET'])
+@limiter.limit('search')
+@read_only
+def get_nearby_events():
+    """Get the events nearest to a point, ranked by distance and then date
+    
+    Query parameters: lat and lng (required), k (number of events, default
+    10, max 100), radius_km (optional cut-off) and include_past.
+    """
+    try:
+        lat = float(request.args['lat'])
+        lng = float(request.args['lng'])
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValueError
+    except (KeyError, ValueError):
+        return jsonify({'error': 'lat and lng must be valid coordinates'}), 400
+    try:
+        k = min(max(int(request.args.get('k', 10)), 1), 100)
+    except ValueError:
+        return jsonify({'error': 'k must be an integer'}), 400
+    try:
+        radius_km = request.args.get('radius_km')
+        radius_km = float(radius_km) if radius_km else None
+        if radius_km is not None and not (math.isfinite(radius_km) and radius_km >= 0):
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'radius_km must be a non-negative number'}), 400
+    
+    after = None if arg_flag('include_past') else datetime.now()
+    if radius_km is not None:
+        ids, distances = spatial_index.within(lat, lng, radius_km, after=after, limit=k)
+    else:
+        ids, distances = spatial_index.nearest(lat, lng, k, after=after)
+    
+    rows = {row.id: row for row in fetch_event_rows(event_ids=ids)} if ids else {}
+    events = []
+    for event_id, distance in zip(ids, distances):
+        row = rows.get(event_id)
+        if row is not None:
+            event = encode_event_row(row)
+            event['distance_km'] = round(distance, 3)
+            events.append(event)
+    return jsonify(events)
+
 @app.route('/api/events', methods=['POST'])
+@limiter.limit('write')
 def create_event():
     """Create a new event"""
     try:
@@ -115,6 +457,8 @@ def create_event():
         )
         
         db.session.add(event)
+        db.session.flush()
+        index_after_commit(event)
         db.session.commit()
         
         return jsonify(event.to_dict()), 201
@@ -122,7 +466,18 @@ def create_event():
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
+@app.route('/api/events/<int:event_id>', methods=['GET'])
+@limiter.limit('read')
+@read_only
+def get_event(event_id):
+    """Get one event, looking in the archive if it is no longer current"""
+    rows = fetch_event_rows(include_archive=True, event_ids=[event_id])
+    if not rows:
+        return jsonify({'error': 'Event not found'}), 404
+    return jsonify(encode_event_row(rows[0]))
+
 @app.route('/api/events/<int:event_id>', methods=['PUT'])
+@limiter.limit('write')
 def update_event(event_id):
     """Update an existing event"""
     try:
@@ -145,6 +500,8 @@ def update_event(event_id):
         if 'description' in data:
             event.description = data['description']
         
+        if data.keys() & {'date', 'latitude', 'longitude'}:
+            index_after_commit(event)
         db.session.commit()
         return jsonify(event.to_dict())
     except Exception as e:
@@ -152,11 +509,20 @@ def update_event(event_id):
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/events/<int:event_id>', methods=['DELETE'])
+@limiter.limit('write')
 def delete_event(event_id):
     """Delete an event"""
     try:
         event = Event.query.get_or_404(event_id)
+        
+        # Deleting a materialized occurrence cancels it in its series
+        link = SeriesOccurrence.query.filter_by(event_id=event_id).first()
+        if link is not None:
+            db.session.get(EventSeries, link.series_id).exclude(link.occurrence_start)
+            db.session.delete(link)
+        
         db.session.delete(event)
+        unindex_after_commit([event_id])
         db.session.commit()
         return jsonify({'message': 'Event deleted successfully'}), 200
     except Exception as e:
@@ -164,6 +530,7 @@ def delete_event(event_id):
         return jsonify({'error': str(e)}), 400
 
 @app.route('/api/users/register', methods=['POST'])
+@limiter.limit('auth')
 def register_user():
     """Register a new user"""
     try:
@@ -193,8 +560,7 @@ def register_user():
         db.session.commit()
         
         # Auto-login after registration
-        session['user_id'] = user.id
-        session['username'] = user.username
+        login_session(user)
         
         return jsonify(user.to_dict()), 201
     except Exception as e:
@@ -204,6 +570,8 @@ def register_user():
         return jsonify({'error': 'Registration failed. Please try again.'}), 400
 
 @app.route('/api/users/login', methods=['POST'])
+@limiter.limit('auth')
+@read_only
 def login_user():
     """Login a user"""
     try:
@@ -220,8 +588,7 @@ def login_user():
             return jsonify({'error': 'Invalid username or password'}), 401
         
         # Set session
-        session['user_id'] = user.id
-        session['username'] = user.username
+        login_session(user)
         
         return jsonify(user.to_dict()), 200
     except Exception as e:
@@ -231,21 +598,57 @@ def login_user():
 
 @app.route('/api/users/logout', methods=['POST'])
 def logout_user():
-    """Logout a user"""
+    """Logout a user
+    
+    With a server-side session backend, passing {"all": true} also revokes
+    the user's sessions on other devices.
+    """
+    data = request.get_json(silent=True) or {}
+    user_id = session.get('user_id')
+    if data.get('all') and user_id is not None and isinstance(app.session_interface, ServerSideSessionInterface):
+        app.session_interface.store.delete_user_sessions(user_id)
     session.pop('user_id', None)
     session.pop('username', None)
     return jsonify({'message': 'Logged out successfully'}), 200
 
 @app.route('/api/users/current', methods=['GET'])
+@limiter.limit('read')
+@read_only
 def get_current_user():
     """Get current logged in user"""
-    if 'user_id' in session:
-        user = User.query.get(session['user_id'])
-        if user:
-            return jsonify(user.to_dict()), 200
+    user = load_current_user()
+    if user:
+        return jsonify(user), 200
     return jsonify({'error': 'Not logged in'}), 401
 
+@app.route('/api/users/current/events', methods=['GET'])
+@limiter.limit('read')
+@read_only
+def get_current_user_events():
+    """List the events the current user participates in, by date
+    
+    Paginated by keyset: pass the returned next_cursor as ?cursor= to get
+    the following page.
+    """
+    user = load_current_user()
+    if user is None:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    rows = fetch_user_event_rows(user['id'], after=after, limit=limit)
+    return jsonify({
+        'events': encode_rows(encode_event_row, rows),
+        'next_cursor': encode_cursor(rows[-1]) if len(rows) == limit else None
+    })
+
 @app.route('/api/events/<int:event_id>/participate', methods=['POST'])
+@limiter.limit('write')
 def participate_in_event(event_id):
     """Join/leave an event"""
     try:
@@ -253,34 +656,193 @@ def participate_in_event(event_id):
         if 'user_id' not in session:
             return jsonify({'error': 'Must be logged in to participate'}), 401
         
-        user = User.query.get(session['user_id'])
-        event = Event.query.get_or_404(event_id)
+        user = load_current_user()
+        if user is None:
+            return jsonify({'error': 'Must be logged in to participate'}), 401
+        
+        Event.query.get_or_404(event_id)
         
-        # Check if user is already participating
-        if event in user.participating_events:
-            # Remove participation
-            user.participating_events.remove(event)
-            db.session.commit()
-            return jsonify({
-                'message': 'Removed from event',
-                'participating': False,
-                'participant_count': event.participants.count()
-            }), 200
-        else:
-            # Add participation
-            user.participating_events.append(event)
-            db.session.commit()
-            return jsonify({
-                'message': 'Joined event',
-                'participating': True,
-                'participant_count': event.participants.count()
-            }), 200
+        participating, participant_count = toggle_participation(user['id'], event_id)
+        return jsonify({
+            'message': 'Joined event' if participating else 'Removed from event',
+            'participating': participating,
+            'participant_count': participant_count
+        }), 200
     except Exception as e:
         db.session.rollback()
         # Log the error for debugging but don't expose details to user
         app.logger.error(f'Participation error: {str(e)}')
         return jsonify({'error': 'Failed to update participation. Please try again.'}), 400
 
+@app.route('/api/series', methods=['POST'])
+@limiter.limit('write')
+def create_series():
+    """Create a recurring event series
+    
+    Takes the event fields with 'start' instead of 'date', plus 'frequency'
+    ('daily' or 'weekly'), 'interval' and optionally 'until' or 'count'.
+    """
+    try:
+        data = request.get_json()
+        
+        # Validate required fields
+        required_fields = ['sport', 'start', 'place', 'difficulty', 'latitude', 'longitude']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        
+        frequency = data.get('frequency', 'weekly')
+        if frequency not in EventSeries.FREQUENCIES:
+            return jsonify({'error': 'frequency must be daily or weekly'}), 400
+        interval = int(data.get('interval', 1))
+        count = parse_optional(data, 'count', int)
+        if interval < 1 or (count is not None and count < 1):
+            return jsonify({'error': 'interval and count must be positive'}), 400
+        start = datetime.fromisoformat(data['start'])
+        until = parse_optional(data, 'until', datetime.fromisoformat)
+        if until is not None and until < start:
+            return jsonify({'error': 'until must not be before start'}), 400
+        
+        series = EventSeries(
+            sport=data['sport'],
+            place=data['place'],
+            difficulty=data['difficulty'],
+            latitude=float(data['latitude']),
+            longitude=float(data['longitude']),
+            description=data.get('description', ''),
+            start=start,
+            frequency=frequency,
+            interval=interval,
+            until=until,
+            count=count,
+            excluded='',
+            author_id=session.get('user_id')
+        )
+        series.ends_at = series.last_start()
+        
+        db.session.add(series)
+        db.session.commit()
+        
+        return jsonify(series.to_dict()), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/series/<int:series_id>', methods=['GET'])
+@limiter.limit('read')
+@read_only
+def get_series(series_id):
+    """Get a recurring event series"""
+    series = db.get_or_404(EventSeries, series_id)
+    return jsonify(series.to_dict())
+
+@app.route('/api/series/<int:series_id>', methods=['DELETE'])
+@limiter.limit('write')
+def delete_series(series_id):
+    """Delete a series; occurrences that already have an Event row are kept"""
+    series = db.get_or_404(EventSeries, series_id)
+    try:
+        SeriesOccurrence.query.filter_by(series_id=series_id).delete()
+        db.session.execute(
+            events_archive.update().where(events_archive.c.series_id == series_id)
+            .values(series_id=None, occurrence_start=None)
+        )
+        db.session.delete(series)
+        db.session.commit()
+        return jsonify({'message': 'Series deleted successfully'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/series/<int:series_id>/occurrences/<occurrence>', methods=['PUT'])
+@limiter.limit('write')
+def update_occurrence(series_id, occurrence):
+    """Override one occurrence of a series (materializes it as an event)"""
+    series = db.get_or_404(EventSeries, series_id)
+    try:
+        start = datetime.fromisoformat(occurrence)
+        materialized = find_occurrence_event(series, start) is not None
+        event = materialize_occurrence(series, start)
+        data = request.get_json()
+        
+        for field in ('sport', 'place', 'difficulty', 'description'):
+            if field in data:
+                setattr(event, field, data[field])
+        if 'date' in data:
+            event.date = datetime.fromisoformat(data['date'])
+        if 'latitude' in data:
+            event.latitude = float(data['latitude'])
+        if 'longitude' in data:
+            event.longitude = float(data['longitude'])
+        
+        if not materialized or data.keys() & {'date', 'latitude', 'longitude'}:
+            index_after_commit(event)
+        db.session.commit()
+        return jsonify(event.to_dict())
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/series/<int:series_id>/occurrences/<occurrence>', methods=['DELETE'])
+@limiter.limit('write')
+def cancel_occurrence(series_id, occurrence):
+    """Cancel one occurrence of a series"""
+    series = db.get_or_404(EventSeries, series_id)
+    try:
+        start = datetime.fromisoformat(occurrence)
+        event = find_occurrence_event(series, start)
+        if event is None and not series.is_occurrence(start):
+            return jsonify({'error': 'Not an occurrence of this series'}), 400
+        
+        series.exclude(start)
+        if event is not None:
+            SeriesOccurrence.query.filter_by(event_id=event.id).delete()
+            db.session.delete(event)
+            unindex_after_commit([event.id])
+        db.session.commit()
+        return jsonify({'message': 'Occurrence cancelled'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/series/<int:series_id>/occurrences/<occurrence>/participate', methods=['POST'])
+@limiter.limit('write')
+def participate_in_occurrence(series_id, occurrence):
+    """Join/leave one occurrence of a series (materializes it as an event)"""
+    series = db.get_or_404(EventSeries, series_id)
+    try:
+        user = load_current_user()
+        if user is None:
+            return jsonify({'error': 'Must be logged in to participate'}), 401
+        
+        start = datetime.fromisoformat(occurrence)
+        event = find_occurrence_event(series, start)
+        if event is None:
+            event = materialize_occurrence(series, start)
+            index_after_commit(event)
+        
+        participating, participant_count = toggle_participation(user['id'], event.id)
+        return jsonify({
+            'message': 'Joined event' if participating else 'Removed from event',
+            'participating': participating,
+            'participant_count': participant_count,
+            'event_id': event.id
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f'Participation error: {str(e)}')
+        return jsonify({'error': 'Failed to update participation. Please try again.'}), 400
+
+@app.route('/api/ratelimit/metrics')
+def rate_limit_metrics():
+    """Admitted and rejected request counts of this worker, per route class
+    
+    Only for clients sending RATE_LIMIT_METRICS_TOKEN in an X-Metrics-Token header.
+    """
+    if not limiter.metrics_authorized(request.headers.get('X-Metrics-Token')):
+        abort(404)
+    return jsonify(limiter.snapshot())
+
 @app.route('/api/health')
 def health_check():
     """API health check endpoint"""
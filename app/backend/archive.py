@@ -0,0 +1,95 @@
+"""
+Event archive for Srazy application
+
+Events dated before a retention horizon are moved, with their
+participants, from ``events``/``event_participants`` to
+``events_archive``/``event_participants_archive``. The hot tables then
+only hold recent and upcoming events, which is what the map lists; the
+archive is read when past events are asked for. Events are moved in
+batches, one transaction each, so the job never holds locks for long.
+
+Event ids must never be reused once archived (the events table uses
+AUTOINCREMENT on SQLite); an event whose id is already in the archive is
+left in the events table.
+"""
+from datetime import datetime
+
+import click
+from sqlalchemy import select, literal, exists
+
+from app.backend.migrations import needs_autoincrement_migration
+from app.backend.models import (
+    Event, SeriesOccurrence, event_participants, events_archive, event_participants_archive
+)
+
+events_table = Event.__table__
+series_occurrences = SeriesOccurrence.__table__
+
+# Columns copied unchanged from events to events_archive
+COPIED_COLUMNS = ('id', 'sport_id', 'date', 'place_id', 'difficulty_id', 'latitude', 'longitude',
+                  'description', 'created_at', 'author_id')
+
+
+def archive_batch(conn, before, batch_size, now=None):
+    """Move up to batch_size events dated before ``before``; returns their ids"""
+    ids = conn.execute(
+        select(events_table.c.id).where(
+            events_table.c.date < before,
+            ~exists().where(events_archive.c.id == events_table.c.id)
+        ).order_by(events_table.c.id).limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        return []
+
+    moved = (
+        select(*[events_table.c[name] for name in COPIED_COLUMNS],
+               series_occurrences.c.series_id, series_occurrences.c.occurrence_start,
+               literal(now or datetime.utcnow(), events_archive.c.archived_at.type))
+        .select_from(events_table.outerjoin(series_occurrences,
+                                            series_occurrences.c.event_id == events_table.c.id))
+        .where(events_table.c.id.in_(ids))
+    )
+    conn.execute(events_archive.insert().from_select(
+        [*COPIED_COLUMNS, 'series_id', 'occurrence_start', 'archived_at'], moved))
+    conn.execute(event_participants_archive.insert().from_select(
+        ['user_id', 'event_id', 'joined_at'],
+        select(event_participants.c.user_id, event_participants.c.event_id, event_participants.c.joined_at)
+        .where(event_participants.c.event_id.in_(ids))
+    ))
+
+    conn.execute(event_participants.delete().where(event_participants.c.event_id.in_(ids)))
+    conn.execute(series_occurrences.delete().where(series_occurrences.c.event_id.in_(ids)))
+    conn.execute(events_table.delete().where(events_table.c.id.in_(ids)))
+    return ids
+
+
+def archive_events(db, before, batch_size=500, after_batch=None):
+    """Archive every event dated before ``before``; returns the number moved
+
+    ``after_batch(ids)`` is called inside each batch's transaction, before
+    it commits. Raises RuntimeError while the events table may still reuse
+    ids (databases created before archiving; run ``flask migrate-db``).
+    """
+    if needs_autoincrement_migration(db.engine, events_table):
+        raise RuntimeError('The events table must be migrated first: run flask migrate-db')
+    archived = 0
+    while True:
+        ids = archive_batch(db.session.connection(), before, batch_size)
+        if not ids:
+            db.session.commit()
+            return archived
+        if after_batch is not None:
+            after_batch(ids)
+        db.session.commit()
+        archived += len(ids)
+
+
+def init_archive(app, archive):
+    """Register the archive-events command; ``archive()`` runs the job"""
+    @app.cli.command('archive-events')
+    def archive_events_command():
+        """Move past events to the archive tables"""
+        try:
+            click.echo(f'Archived {archive()} events')
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
@@ -0,0 +1,222 @@
+"""
+Static asset fingerprinting for Srazy application
+
+At startup (or with ``flask build-assets``) every stylesheet and script under
+the static folder is hashed. ``url_for('static', ...)`` then produces
+content-addressed names such as ``css/style.3f2a9c1b7d4e.css``, which are
+served with a one year immutable Cache-Control header and, when the client
+accepts it, from pre-generated ``.br``/``.gz`` siblings. The
+``manifest.json`` written by ``flask build-assets`` is loaded at startup
+instead of hashing again, as long as no file changed since it was written.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+import click
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+FINGERPRINT_EXTENSIONS = ('.css', '.js')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Content-Encoding -> file suffix, in order of preference
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+MANIFEST_FILENAME = 'manifest.json'
+
+
+def hashed_name(filename, digest):
+    """Insert a content digest before the file extension"""
+    root, ext = os.path.splitext(filename)
+    return f'{root}.{digest}{ext}'
+
+
+class AssetManifest:
+    """Mapping between static files and their fingerprinted names
+
+    Filenames are relative to the static folder and use forward slashes, as
+    in ``url_for('static', filename=...)``.
+    """
+
+    def __init__(self, static_folder, hash_length=12):
+        self.static_folder = static_folder
+        self.hash_length = hash_length
+        self.files = {}
+        self._sources = {}
+        self._mtimes = {}
+
+    def _filenames(self):
+        for dirpath, _, filenames in os.walk(self.static_folder):
+            for name in filenames:
+                if name.endswith(FINGERPRINT_EXTENSIONS):
+                    path = os.path.join(dirpath, name)
+                    yield os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+
+    def build(self):
+        """Hash every fingerprinted file under the static folder"""
+        self.files = {}
+        self._sources = {}
+        self._mtimes = {}
+        for filename in self._filenames():
+            self._add(filename)
+        return self
+
+    def load(self, path):
+        """Use a manifest saved by ``write``; returns False if it is missing or stale
+
+        The manifest is stale when a file was added, removed or modified
+        after it was written.
+        """
+        try:
+            written = os.path.getmtime(path)
+            with open(path) as f:
+                files = json.load(f)
+            mtimes = {filename: os.path.getmtime(os.path.join(self.static_folder, filename))
+                      for filename in self._filenames()}
+        except (OSError, ValueError):
+            return False
+        if set(files) != set(mtimes) or any(mtime > written for mtime in mtimes.values()):
+            return False
+        self.files = files
+        self._sources = {fingerprinted: filename for filename, fingerprinted in files.items()}
+        self._mtimes = mtimes
+        return True
+
+    def _add(self, filename):
+        path = os.path.join(self.static_folder, filename)
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:self.hash_length]
+        old = self.files.get(filename)
+        if old is not None:
+            self._sources.pop(old, None)
+        fingerprinted = hashed_name(filename, digest)
+        self.files[filename] = fingerprinted
+        self._sources[fingerprinted] = filename
+        self._mtimes[filename] = os.path.getmtime(path)
+
+    def refresh(self, filename):
+        """Rehash a file if it changed on disk (used in debug mode)
+
+        Compressed siblings of the old content are deleted.
+        """
+        path = os.path.join(self.static_folder, filename)
+        try:
+            if os.path.getmtime(path) != self._mtimes.get(filename):
+                self._add(filename)
+                for _, suffix in PRECOMPRESSED:
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+        except OSError:
+            pass
+
+    def fingerprinted(self, filename):
+        """Fingerprinted name for a static file, or the name unchanged"""
+        return self.files.get(filename, filename)
+
+    def source(self, fingerprinted):
+        """Original name of a fingerprinted file, or None"""
+        return self._sources.get(fingerprinted)
+
+    def precompress(self, force=False):
+        """Write .gz (and .br when brotli is installed) siblings
+
+        Existing siblings newer than their source are kept unless force is
+        set. Returns the number of files written.
+        """
+        written = 0
+        for filename in self.files:
+            path = os.path.join(self.static_folder, filename)
+            with open(path, 'rb') as f:
+                data = None
+                for _, suffix in PRECOMPRESSED:
+                    if suffix == '.br' and brotli is None:
+                        continue
+                    target = path + suffix
+                    if (not force and os.path.exists(target)
+                            and os.path.getmtime(target) >= os.path.getmtime(path)):
+                        continue
+                    if data is None:
+                        data = f.read()
+                    if suffix == '.br':
+                        compressed = brotli.compress(data, quality=11)
+                    else:
+                        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                    with open(target, 'wb') as out:
+                        out.write(compressed)
+                    written += 1
+        return written
+
+    def write(self, path):
+        """Save the manifest as JSON"""
+        with open(path, 'w') as f:
+            json.dump(self.files, f, indent=2, sort_keys=True)
+
+
+def is_fresh(path, suffix):
+    """Whether a compressed sibling exists and is not older than its source"""
+    try:
+        return os.path.getmtime(path + suffix) >= os.path.getmtime(path)
+    except OSError:
+        return False
+
+
+def send_static_asset(app, manifest, filename):
+    """Static view serving fingerprinted files with long-lived caching"""
+    source = manifest.source(filename)
+    if source is None:
+        return app.send_static_file(filename)
+
+    mimetype = mimetypes.guess_type(source)[0] or 'application/octet-stream'
+    for encoding, suffix in PRECOMPRESSED:
+        if request.accept_encodings[encoding] and \
+                is_fresh(os.path.join(app.static_folder, source), suffix):
+            response = send_from_directory(app.static_folder, source + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(app.static_folder, source, mimetype=mimetype)
+
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_assets(app):
+    """Load or build the asset manifest and hook it into url_for and the static view"""
+    manifest_path = os.path.join(app.static_folder, MANIFEST_FILENAME)
+    manifest = AssetManifest(app.static_folder)
+    if not manifest.load(manifest_path):
+        manifest.build()
+    app.extensions['asset_manifest'] = manifest
+
+    if app.config.get('ASSETS_PRECOMPRESS', True):
+        try:
+            manifest.precompress()
+        except OSError as e:
+            app.logger.warning(f'Could not precompress static assets: {e}')
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            if app.debug:
+                manifest.refresh(values['filename'])
+            values['filename'] = manifest.fingerprinted(values['filename'])
+
+    app.view_functions['static'] = lambda filename: send_static_asset(app, manifest, filename)
+
+    @app.cli.command('build-assets')
+    def build_assets():
+        """Fingerprint and precompress static assets"""
+        manifest.build()
+        written = manifest.precompress(force=True)
+        manifest.write(manifest_path)
+        click.echo(f'Fingerprinted {len(manifest.files)} files, wrote {written} compressed files')
+
+    return manifest
@@ -0,0 +1,61 @@
+"""
+In-process caches for Srazy application
+
+Each worker process keeps its own copy, so entries are only suitable for
+data that may be served slightly stale for the length of the TTL.
+"""
+import threading
+import time
+
+
+class TTLCache:
+    """Small thread-safe mapping whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, ttl=30, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return a cached value, or default if missing or expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            with self._lock:
+                if self._data.get(key) is entry:
+                    del self._data[key]
+            return default
+        return value
+
+    def set(self, key, value, ttl=None):
+        """Store a value"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                self._evict()
+            self._data[key] = (expires_at, value)
+
+    def delete(self, key):
+        """Remove a value if present"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all values"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _evict(self):
+        """Drop expired entries, or the oldest one if none have expired"""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._data.items() if expires_at < now]
+        for key in expired:
+            del self._data[key]
+        if not expired and self._data:
+            del self._data[next(iter(self._data))]
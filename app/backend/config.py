@@ -4,6 +4,8 @@ Configuration settings for the Srazy application
 import os
 from pathlib import Path
 
+from app.backend.routing import replica_binds
+
 # Base directory
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -15,6 +17,70 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///srazy.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Read replicas as binds 'replica_0', 'replica_1', ... (comma-separated URLs)
+    SQLALCHEMY_BINDS = replica_binds(os.environ.get('DATABASE_REPLICA_URLS') or '')
+    # Seconds a client that wrote keeps reading from the primary
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS') or 5)
+    
+    # JSON serialization backend: 'auto', 'orjson' or 'stdlib'
+    JSON_BACKEND = os.environ.get('JSON_BACKEND') or 'auto'
+    
+    # Sessions: 'cookie' (signed cookie), 'sqlalchemy' or 'memory' (server-side)
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND') or 'cookie'
+    SESSION_SWEEP_INTERVAL = int(os.environ.get('SESSION_SWEEP_INTERVAL') or 300)
+    
+    # Seconds a logged in user's record is cached per worker
+    CURRENT_USER_CACHE_TTL = int(os.environ.get('CURRENT_USER_CACHE_TTL') or 30)
+    
+    # Days ahead recurring series are expanded when no date_to is given
+    SERIES_EXPANSION_DAYS = int(os.environ.get('SERIES_EXPANSION_DAYS') or 90)
+    
+    # Events older than this many days are moved to the archive tables
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS') or 30)
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE') or 500)
+    
+    # Background task workers; TASKS_EAGER runs tasks inline (scripts, debugging)
+    TASK_WORKERS = int(os.environ.get('TASK_WORKERS') or 2)
+    TASK_QUEUE_SIZE = int(os.environ.get('TASK_QUEUE_SIZE') or 1000)
+    TASKS_EAGER = (os.environ.get('TASKS_EAGER') or 'False') == 'True'
+    
+    # Seconds between checks for event writes by other workers to reload the spatial index
+    SPATIAL_INDEX_REFRESH_INTERVAL = float(os.environ.get('SPATIAL_INDEX_REFRESH_INTERVAL') or 5)
+    
+    # Seconds rendered pages are cached per worker (0 disables)
+    FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL') or 300)
+    # Upcoming events embedded in the events page
+    INITIAL_EVENTS_LIMIT = int(os.environ.get('INITIAL_EVENTS_LIMIT') or 200)
+    # Seconds browsers may cache /api/sports
+    VOCABULARY_MAX_AGE = int(os.environ.get('VOCABULARY_MAX_AGE') or 300)
+    
+    # Reverse proxies whose X-Forwarded-For header is trusted for the client address
+    TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES') or 0)
+    
+    # Rate limits per client and route class: 'rate/burst' (tokens per second / bucket size)
+    RATE_LIMITS_ENABLED = (os.environ.get('RATE_LIMITS_ENABLED') or 'True') == 'True'
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND') or 'memory'
+    RATE_LIMIT_SQLITE_PATH = os.environ.get('RATE_LIMIT_SQLITE_PATH') or str(BASE_DIR / 'ratelimit.db')
+    RATE_LIMITS = {
+        'read': os.environ.get('RATE_LIMIT_READ') or '20/200',
+        'search': os.environ.get('RATE_LIMIT_SEARCH') or '10/100',
+        'write': os.environ.get('RATE_LIMIT_WRITE') or '5/100',
+        'auth': os.environ.get('RATE_LIMIT_AUTH') or '1/50',
+    }
+    # Event searches running at once per worker
+    SEARCH_CONCURRENCY = int(os.environ.get('SEARCH_CONCURRENCY') or 8)
+    # Token for GET /api/ratelimit/metrics (X-Metrics-Token header); unset hides the endpoint
+    RATE_LIMIT_METRICS_TOKEN = os.environ.get('RATE_LIMIT_METRICS_TOKEN') or ''
+    
+    # On-demand request profiling, for requests sending PROFILING_TOKEN in X-Profile
+    PROFILING_ENABLED = (os.environ.get('PROFILING_ENABLED') or 'False') == 'True'
+    PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN') or ''
+    PROFILING_INTERVAL = float(os.environ.get('PROFILING_INTERVAL') or 0.002)
+    PROFILING_STORE_SIZE = int(os.environ.get('PROFILING_STORE_SIZE') or 50)
+    
+    # Write .gz/.br siblings of fingerprinted static files at startup
+    ASSETS_PRECOMPRESS = (os.environ.get('ASSETS_PRECOMPRESS') or 'True') == 'True'
+    
     # Application settings
     DEBUG = False
     TESTING = False
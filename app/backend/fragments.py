@@ -0,0 +1,118 @@
+"""
+Rendered page caching for Srazy application
+
+Pages are cached per worker under a key that includes the version of the
+data they show. Versions are random tokens stored in the ``data_versions``
+table. A write to the tables they cover only marks the version in its
+session; the token is replaced in a short transaction of its own right
+after the write commits, so writes do not queue on the version row while
+they hold their locks. Tokens are replaced with a compare-and-swap, so a
+process knows which token its write replaced (see ``subscribe``). A page rendered in between is cached under the old
+key with the new data, which is harmless; if the process dies in between,
+the version is replaced by the next write and pages expire with their TTL.
+"""
+import uuid
+
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+
+from app.backend.cache import TTLCache
+
+BUMPED_KEY = 'bumped_data_versions'
+
+
+class DataVersions:
+    """Version tokens for named groups of tables
+
+    ``watch`` maps a version name to the model classes whose ORM writes
+    change it; Core statements must call ``bump`` themselves.
+    """
+
+    def __init__(self, db, table, watch):
+        self.db = db
+        self.table = table
+        self.watch = watch
+        self._subscribers = {}
+
+        event.listen(db.session, 'after_flush', self._bump_flushed)
+        event.listen(db.session, 'after_commit', self._write_bumped)
+        event.listen(db.session, 'after_soft_rollback', self._reset_after_rollback)
+
+    def get(self, name, conn=None):
+        """Current version token, or None if the data was never written
+
+        Read on ``conn`` if given, otherwise through the session.
+        """
+        t = self.table
+        return (conn or self.db.session).execute(select(t.c.version).where(t.c.name == name)).scalar()
+
+    def bump(self, name, session=None):
+        """Replace a version token once the current transaction commits"""
+        session = session or self.db.session
+        session.info.setdefault(BUMPED_KEY, set()).add(name)
+
+    def subscribe(self, name, callback):
+        """Call ``callback(previous, token)`` whenever this process replaces a version"""
+        self._subscribers.setdefault(name, []).append(callback)
+
+    def _replace(self, name):
+        """Replace a version token; returns (previous token or None, new token)"""
+        t = self.table
+        token = uuid.uuid4().hex
+        while True:
+            try:
+                with self.db.engine.begin() as conn:
+                    previous = conn.execute(select(t.c.version).where(t.c.name == name)).scalar()
+                    if previous is None:
+                        conn.execute(t.insert().values(name=name, version=token))
+                        return previous, token
+                    if conn.execute(t.update().where(t.c.name == name, t.c.version == previous)
+                                    .values(version=token)).rowcount == 1:
+                        return previous, token
+            except IntegrityError:
+                # Another process created the version at the same time; retry as an update
+                pass
+
+    def _bump_flushed(self, session, flush_context):
+        changed = session.new | session.dirty | session.deleted
+        for name, models in self.watch.items():
+            if any(isinstance(instance, models) for instance in changed):
+                self.bump(name, session)
+
+    def _write_bumped(self, session):
+        bumped = session.info.pop(BUMPED_KEY, None)
+        if not bumped:
+            return
+        for name in sorted(bumped):
+            previous, token = self._replace(name)
+            for callback in self._subscribers.get(name, ()):
+                callback(previous, token)
+
+    def _reset_after_rollback(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop(BUMPED_KEY, None)
+
+
+class FragmentCache:
+    """Per-worker cache of rendered HTML
+
+    A ``ttl`` of 0 disables caching.
+    """
+
+    def __init__(self, ttl=300, maxsize=256):
+        self.ttl = ttl
+        self._cache = TTLCache(ttl=ttl, maxsize=maxsize)
+
+    def render(self, key, render):
+        """Return the cached rendering for key, calling render() on a miss"""
+        if not self.ttl:
+            return render()
+        html = self._cache.get(key)
+        if html is None:
+            html = render()
+            self._cache.set(key, html)
+        return html
+
+    def clear(self):
+        """Drop every cached rendering"""
+        self._cache.clear()
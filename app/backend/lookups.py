@@ -0,0 +1,147 @@
+"""
+Lookup tables for Srazy application
+
+Sports, difficulties and places are stored once in small tables and
+referenced by integer id. Names are matched on a normalized key (case and
+whitespace folded), so "Central  park" and "central park" share a row. The
+interner maps names to ids with a per-worker cache of committed rows.
+"""
+import threading
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+PENDING_KEY = 'interned_lookups'
+
+
+def normalize(name):
+    """Key used to match names: whitespace collapsed, case folded"""
+    return ' '.join(name.split()).casefold()
+
+
+def clean(name):
+    """Name as stored: whitespace collapsed"""
+    return ' '.join(name.split())
+
+
+class LookupInterner:
+    """Maps names to lookup table ids, inserting missing names
+
+    Ids inserted by a transaction are only cached once it commits. The
+    cache is cleared when a lookup table is dropped.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._ids = {}    # (table name, key) -> id
+        self._lock = threading.Lock()
+
+        event.listen(db.session, 'after_commit', self._cache_committed)
+        event.listen(db.session, 'after_soft_rollback', self._forget_pending)
+
+    def watch(self, *models):
+        """Clear the cache when one of the models' tables is dropped"""
+        for model in models:
+            event.listen(model.__table__, 'after_drop', lambda *args, **kwargs: self.clear())
+
+    def clear(self):
+        """Forget every cached id"""
+        with self._lock:
+            self._ids.clear()
+
+    def lookup_id(self, model, name):
+        """Id for a name, or None if it is not in the table"""
+        key = normalize(name)
+        t = model.__table__
+        cached = self._ids.get((t.name, key))
+        if cached is not None:
+            return cached
+        found = self.db.session.connection().execute(select(t.c.id).where(t.c.key == key)).scalar()
+        if found is not None:
+            pending = self.db.session.info.get(PENDING_KEY, {})
+            if (t.name, key) not in pending:
+                with self._lock:
+                    self._ids[(t.name, key)] = found
+        return found
+
+    def intern_id(self, model, name):
+        """Id for a name, inserting it in the current transaction if needed
+
+        When a concurrent transaction inserts the same name first, its row
+        is used instead.
+        """
+        if not name or not normalize(name):
+            raise ValueError(f'{model.__name__} must not be empty')
+        found = self.lookup_id(model, name)
+        if found is not None:
+            return found
+        t = model.__table__
+        key = normalize(name)
+        new_id = self._insert(self.db.session.connection(), t, clean(name), key)
+        if new_id is None:
+            found = self.lookup_id(model, name)
+            if found is None:
+                raise ValueError(f'{model.__name__} {name!r} could not be stored')
+            return found
+        self.db.session.info.setdefault(PENDING_KEY, {})[(t.name, key)] = new_id
+        return new_id
+
+    def _insert(self, conn, t, name, key):
+        """Insert a name; returns its id, or None if the key already exists"""
+        dialect = {'sqlite': sqlite, 'postgresql': postgresql}.get(conn.dialect.name)
+        if dialect is not None:
+            result = conn.execute(dialect.insert(t).values(name=name, key=key).on_conflict_do_nothing())
+            return result.inserted_primary_key[0] if result.rowcount == 1 else None
+        try:
+            with conn.begin_nested():
+                return conn.execute(t.insert().values(name=name, key=key)).inserted_primary_key[0]
+        except IntegrityError:
+            return None
+
+    def intern(self, model, name):
+        """Instance for a name, inserting it if needed"""
+        return self.db.session.get(model, self.intern_id(model, name))
+
+    def intern_many(self, conn, model, names):
+        """Map many names to ids on a connection with two statements
+
+        Used by bulk inserts and migrations; returns {name: id}.
+        """
+        t = model.__table__
+        keys = {name: normalize(name) for name in names if name and normalize(name)}
+        existing = dict(conn.execute(
+            select(t.c.key, t.c.id).where(t.c.key.in_(set(keys.values())))
+        ).all()) if keys else {}
+        missing = {}
+        for name, key in keys.items():
+            if key not in existing:
+                missing.setdefault(key, clean(name))
+        if missing:
+            conn.execute(t.insert(), [{'name': name, 'key': key} for key, name in missing.items()])
+            existing.update(conn.execute(
+                select(t.c.key, t.c.id).where(t.c.key.in_(list(missing)))
+            ).all())
+        return {name: existing[key] for name, key in keys.items()}
+
+    def _cache_committed(self, session):
+        pending = session.info.pop(PENDING_KEY, None)
+        if pending:
+            with self._lock:
+                self._ids.update(pending)
+
+    def _forget_pending(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop(PENDING_KEY, None)
+
+
+def lookup_property(relationship, model, interner):
+    """Name of a related lookup row, settable by name"""
+    def get(self):
+        ref = getattr(self, relationship)
+        return ref.name if ref is not None else None
+
+    def set(self, name):
+        setattr(self, relationship, interner.intern(model, name))
+
+    return property(get, set, doc=f'{model.__name__} name')
@@ -0,0 +1,280 @@
+"""
+Schema migrations for Srazy application
+
+Tables are created with ``db.create_all()``, which never changes existing
+tables. The functions here convert databases created by older versions
+in place; each one checks the current schema first and does nothing when
+it is already up to date. They run from the ``migrate-db`` command only,
+never when a worker starts, so that workers starting together do not
+race each other.
+"""
+import click
+from sqlalchemy import MetaData, Table, bindparam, func, inspect, or_, select, text, update
+
+from app.backend.lookups import normalize
+
+# Lookup name given to rows whose free-text value was blank
+UNKNOWN_NAME = 'Unknown'
+
+
+def lookup_name(value):
+    """Name to intern for a legacy free-text value"""
+    return value if value and normalize(value) else UNKNOWN_NAME
+
+
+def needs_lookup_migration(engine, table):
+    """Whether a table still has free-text sport/place/difficulty columns"""
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return False
+    columns = {column['name'] for column in inspector.get_columns(table.name)}
+    return 'sport' in columns and 'sport_id' not in columns
+
+
+def migrate_lookup_columns(engine, table, interner, lookups, batch_size=1000, rebuild=None):
+    """Replace free-text columns of a table with lookup ids
+
+    ``lookups`` maps the old column names to lookup models; blank names
+    become UNKNOWN_NAME. On SQLite (or with ``rebuild``) the table is
+    copied into a new one with the current definition, in batches, then
+    swapped in. Other databases keep the table, whose dependent foreign
+    keys would stop it from being dropped, and alter it in place. Returns
+    the number of rows converted, or None if the table needed no migration.
+    """
+    if not needs_lookup_migration(engine, table):
+        return None
+    if rebuild is None:
+        rebuild = engine.dialect.name == 'sqlite'
+    if not rebuild:
+        return _alter_in_place(engine, table, interner, lookups, batch_size)
+
+    # The new table lives in the application metadata only while migrating,
+    # so that its foreign keys resolve
+    new_table = table.to_metadata(table.metadata, name=f'{table.name}_migrating')
+    new_table.indexes.clear()
+    try:
+        return _copy_and_swap(engine, table, new_table, interner, lookups, batch_size)
+    finally:
+        table.metadata.remove(new_table)
+
+
+def _copy_and_swap(engine, table, new_table, interner, lookups, batch_size):
+    with engine.begin() as conn:
+        if engine.dialect.name == 'sqlite':
+            conn.execute(text('PRAGMA foreign_keys=OFF'))
+        for model in lookups.values():
+            model.__table__.create(conn, checkfirst=True)
+        new_table.create(conn)
+
+        old = Table(table.name, MetaData(), autoload_with=conn)
+        copied = [c.name for c in table.columns if c.name in old.c]
+        columns = [old.c[name] for name in [*copied, *lookups]]
+        converted = 0
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                select(*columns).where(old.c.id > last_id).order_by(old.c.id).limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                break
+            ids = {column: interner.intern_many(conn, model, [lookup_name(row[column]) for row in rows])
+                   for column, model in lookups.items()}
+            conn.execute(new_table.insert(), [
+                {**{name: row[name] for name in copied},
+                 **{f'{column}_id': ids[column][lookup_name(row[column])] for column in lookups}}
+                for row in rows
+            ])
+            converted += len(rows)
+            last_id = rows[-1]['id']
+
+        conn.execute(text(f'DROP TABLE {table.name}'))
+        conn.execute(text(f'ALTER TABLE {new_table.name} RENAME TO {table.name}'))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    return converted
+
+
+def _alter_in_place(engine, table, interner, lookups, batch_size):
+    with engine.begin() as conn:
+        for model in lookups.values():
+            model.__table__.create(conn, checkfirst=True)
+        for column, model in lookups.items():
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column}_id INTEGER '
+                              f'REFERENCES {model.__tablename__} (id)'))
+
+        old = Table(table.name, MetaData(), autoload_with=conn)
+        fill = update(old).where(old.c.id == bindparam('row_id')).values(
+            {f'{column}_id': bindparam(f'{column}_value') for column in lookups})
+        converted = 0
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                select(old.c.id, *[old.c[column] for column in lookups])
+                .where(old.c.id > last_id).order_by(old.c.id).limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                break
+            ids = {column: interner.intern_many(conn, model, [lookup_name(row[column]) for row in rows])
+                   for column, model in lookups.items()}
+            conn.execute(fill, [
+                {'row_id': row['id'],
+                 **{f'{column}_value': ids[column][lookup_name(row[column])] for column in lookups}}
+                for row in rows
+            ])
+            converted += len(rows)
+            last_id = rows[-1]['id']
+
+        for column in lookups:
+            if not table.c[f'{column}_id'].nullable:
+                _set_not_null(conn, table.name, f'{column}_id')
+            conn.execute(text(f'ALTER TABLE {table.name} DROP COLUMN {column}'))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    return converted
+
+
+def _set_not_null(conn, table_name, column):
+    dialect = conn.dialect.name
+    if dialect in ('mysql', 'mariadb'):
+        conn.execute(text(f'ALTER TABLE {table_name} MODIFY {column} INTEGER NOT NULL'))
+    elif dialect != 'sqlite':
+        # SQLite cannot change the constraints of an existing column
+        conn.execute(text(f'ALTER TABLE {table_name} ALTER COLUMN {column} SET NOT NULL'))
+
+
+def needs_autoincrement_migration(engine, table):
+    """Whether a SQLite table may still reuse the ids of deleted rows
+
+    Without AUTOINCREMENT, SQLite gives a new row the largest id in the
+    table plus one, so the id of an archived newest event comes back.
+    """
+    if engine.dialect.name != 'sqlite' or not table.dialect_options['sqlite']['autoincrement']:
+        return False
+    with engine.connect() as conn:
+        sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                           {'name': table.name}).scalar()
+    return sql is not None and 'AUTOINCREMENT' not in sql.upper()
+
+
+def migrate_autoincrement(engine, table, id_tables=()):
+    """Rebuild a SQLite table with AUTOINCREMENT ids
+
+    The id sequence starts after the largest id found in the table and in
+    ``id_tables`` (e.g. its archive). Returns the number of rows copied, or
+    None if the table needed no migration.
+    """
+    if not needs_autoincrement_migration(engine, table):
+        return None
+
+    new_table = table.to_metadata(table.metadata, name=f'{table.name}_migrating')
+    new_table.indexes.clear()
+    try:
+        with engine.begin() as conn:
+            conn.execute(text('PRAGMA foreign_keys=OFF'))
+            new_table.create(conn)
+            names = [c.name for c in table.columns]
+            old = Table(table.name, MetaData(), autoload_with=conn)
+            conn.execute(new_table.insert().from_select(names, select(*[old.c[name] for name in names])))
+            conn.execute(text(f'DROP TABLE {table.name}'))
+            conn.execute(text(f'ALTER TABLE {new_table.name} RENAME TO {table.name}'))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+            last_id = max(conn.execute(select(func.coalesce(func.max(t.c.id), 0))).scalar()
+                          for t in (table, *id_tables))
+            conn.execute(text('DELETE FROM sqlite_sequence WHERE name = :name'), {'name': table.name})
+            conn.execute(text('INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)'),
+                         {'name': table.name, 'seq': last_id})
+            return conn.execute(select(func.count()).select_from(table)).scalar()
+    finally:
+        table.metadata.remove(new_table)
+
+
+def needs_series_end_migration(engine, table):
+    """Whether a series table lacks ends_at, or has ending series without it"""
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return False
+    if 'ends_at' not in {column['name'] for column in inspector.get_columns(table.name)}:
+        return True
+    with engine.connect() as conn:
+        return conn.execute(select(table.c.id).where(
+            table.c.ends_at.is_(None), or_(table.c.until.isnot(None), table.c.count.isnot(None))
+        ).limit(1)).first() is not None
+
+
+def migrate_series_ends(engine, model):
+    """Add and fill the ends_at column of a series table; returns the rows filled
+
+    Returns None if the table needed no migration.
+    """
+    table = model.__table__
+    if not needs_series_end_migration(engine, table):
+        return None
+    columns = {column['name'] for column in inspect(engine).get_columns(table.name)}
+    with engine.begin() as conn:
+        if 'ends_at' not in columns:
+            column_type = table.c.ends_at.type.compile(dialect=conn.dialect)
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN ends_at {column_type}'))
+            for index in table.indexes:
+                if 'ends_at' in index.columns:
+                    index.create(conn, checkfirst=True)
+
+        rows = conn.execute(
+            select(table.c.id, table.c.start, table.c.frequency, table.c.interval, table.c.until, table.c.count)
+            .where(table.c.ends_at.is_(None), or_(table.c.until.isnot(None), table.c.count.isnot(None)))
+        ).all()
+        if rows:
+            conn.execute(update(table).where(table.c.id == bindparam('row_id'))
+                         .values(ends_at=bindparam('ends_value')), [
+                {'row_id': row.id,
+                 'ends_value': model(start=row.start, frequency=row.frequency, interval=row.interval,
+                                     until=row.until, count=row.count).last_start()}
+                for row in rows
+            ])
+    return len(rows)
+
+
+def migrate(db, interner):
+    """Apply every pending migration; returns {table name: rows converted}"""
+    from app.backend.models import Event, EventSeries, Sport, Place, Difficulty, events_archive
+
+    lookups = {'sport': Sport, 'place': Place, 'difficulty': Difficulty}
+    results = {}
+    # Before the lookup columns, whose rebuild copies ends_at and creates its index
+    filled = migrate_series_ends(db.engine, EventSeries)
+    if filled is not None:
+        results[EventSeries.__tablename__] = filled
+    for model in (Event, EventSeries):
+        converted = migrate_lookup_columns(db.engine, model.__table__, interner, lookups)
+        if converted is not None:
+            results[model.__tablename__] = converted
+    copied = migrate_autoincrement(db.engine, Event.__table__, id_tables=(events_archive,))
+    if copied is not None:
+        results[Event.__tablename__] = copied
+    return results
+
+
+def pending_migrations(db):
+    """Names of the tables that still need ``flask migrate-db``"""
+    from app.backend.models import Event, EventSeries
+
+    pending = [model.__tablename__ for model in (Event, EventSeries)
+               if needs_lookup_migration(db.engine, model.__table__)]
+    if Event.__tablename__ not in pending and needs_autoincrement_migration(db.engine, Event.__table__):
+        pending.append(Event.__tablename__)
+    if EventSeries.__tablename__ not in pending and needs_series_end_migration(db.engine, EventSeries.__table__):
+        pending.append(EventSeries.__tablename__)
+    return pending
+
+
+def init_migrations(app, db, interner):
+    """Register the migrate-db command"""
+    @app.cli.command('migrate-db')
+    def migrate_db_command():
+        """Convert an existing database to the current schema"""
+        results = migrate(db, interner)
+        if not results:
+            click.echo('Database is up to date')
+        for table, count in results.items():
+            click.echo(f'Converted {count} rows of {table}')
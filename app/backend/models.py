@@ -2,10 +2,14 @@
 Database models for Srazy application
 """
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 
-db = SQLAlchemy()
+from app.backend.routing import RoutingSession
+from app.backend.lookups import LookupInterner, lookup_property
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+interner = LookupInterner(db)
 
 # Association table for event participants
 event_participants = db.Table('event_participants',
@@ -49,15 +53,41 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.username}>'
 
+class LookupMixin:
+    """Name stored once and referenced by id; ``key`` is the normalized name"""
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    key = db.Column(db.String(200), nullable=False, unique=True)
+    
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.name}>'
+
+class Sport(LookupMixin, db.Model):
+    """Sport vocabulary"""
+    __tablename__ = 'sports'
+
+class Difficulty(LookupMixin, db.Model):
+    """Difficulty levels"""
+    __tablename__ = 'difficulties'
+
+class Place(LookupMixin, db.Model):
+    """Event locations by name"""
+    __tablename__ = 'places'
+
+interner.watch(Sport, Difficulty, Place)
+
 class Event(db.Model):
     """Event model for storing sport events"""
     __tablename__ = 'events'
+    # Ids of archived events must never be handed out again
+    __table_args__ = {'sqlite_autoincrement': True}
     
     id = db.Column(db.Integer, primary_key=True)
-    sport = db.Column(db.String(100), nullable=False)
+    sport_id = db.Column(db.Integer, db.ForeignKey('sports.id'), nullable=False, index=True)
     date = db.Column(db.DateTime, nullable=False)
-    place = db.Column(db.String(200), nullable=False)
-    difficulty = db.Column(db.String(50), nullable=False)
+    place_id = db.Column(db.Integer, db.ForeignKey('places.id'), nullable=False, index=True)
+    difficulty_id = db.Column(db.Integer, db.ForeignKey('difficulties.id'), nullable=False)
     latitude = db.Column(db.Float, nullable=False)
     longitude = db.Column(db.Float, nullable=False)
     description = db.Column(db.Text)
@@ -66,6 +96,14 @@ class Event(db.Model):
     # Foreign key to user
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     
+    # Lookup rows, read and assigned by name through the properties below
+    sport_ref = db.relationship(Sport, lazy='joined')
+    place_ref = db.relationship(Place, lazy='joined')
+    difficulty_ref = db.relationship(Difficulty, lazy='joined')
+    sport = lookup_property('sport_ref', Sport, interner)
+    place = lookup_property('place_ref', Place, interner)
+    difficulty = lookup_property('difficulty_ref', Difficulty, interner)
+    
     def to_dict(self):
         """Convert event to dictionary"""
         return {
@@ -85,3 +123,206 @@ class Event(db.Model):
     
     def __repr__(self):
         return f'<Event {self.id}: {self.sport} at {self.place}>'
+
+class EventSeries(db.Model):
+    """Recurring event stored as one row and expanded into occurrences on read
+    
+    Occurrences start at ``start`` and repeat every ``interval`` days or
+    weeks until ``until`` or for ``count`` occurrences; ``ends_at`` keeps
+    the latest possible start so window queries skip finished series. An occurrence only
+    gets an Event row when it is overridden or someone joins it; the link is
+    kept in SeriesOccurrence. Cancelled occurrences are listed in ``excluded``.
+    """
+    __tablename__ = 'event_series'
+    
+    FREQUENCIES = {
+        'daily': timedelta(days=1),
+        'weekly': timedelta(weeks=1),
+    }
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sport_id = db.Column(db.Integer, db.ForeignKey('sports.id'), nullable=False)
+    place_id = db.Column(db.Integer, db.ForeignKey('places.id'), nullable=False)
+    difficulty_id = db.Column(db.Integer, db.ForeignKey('difficulties.id'), nullable=False)
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+    description = db.Column(db.Text)
+    start = db.Column(db.DateTime, nullable=False, index=True)
+    frequency = db.Column(db.String(10), nullable=False, default='weekly')
+    interval = db.Column(db.Integer, nullable=False, default=1)
+    until = db.Column(db.DateTime)
+    count = db.Column(db.Integer)
+    ends_at = db.Column(db.DateTime, index=True)   # None: the series never ends
+    excluded = db.Column(db.Text, nullable=False, default='')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    author_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    author = db.relationship('User', lazy='joined')
+    
+    sport_ref = db.relationship(Sport, lazy='joined')
+    place_ref = db.relationship(Place, lazy='joined')
+    difficulty_ref = db.relationship(Difficulty, lazy='joined')
+    sport = lookup_property('sport_ref', Sport, interner)
+    place = lookup_property('place_ref', Place, interner)
+    difficulty = lookup_property('difficulty_ref', Difficulty, interner)
+    
+    @property
+    def step(self):
+        """Time between occurrences"""
+        return self.FREQUENCIES[self.frequency] * self.interval
+    
+    @property
+    def excluded_dates(self):
+        """Start times of cancelled occurrences"""
+        return {datetime.fromisoformat(value) for value in self.excluded.split(',') if value}
+    
+    def exclude(self, start):
+        """Cancel an occurrence"""
+        self.excluded = ','.join(sorted(d.isoformat() for d in self.excluded_dates | {start}))
+    
+    def last_start(self):
+        """Latest time an occurrence may start, or None if the series never ends"""
+        ends = []
+        if self.until is not None:
+            ends.append(self.until)
+        if self.count is not None:
+            ends.append(self.start + (self.count - 1) * self.step)
+        return min(ends, default=None)
+    
+    def occurrences(self, window_start, window_end):
+        """Yield occurrence start times within [window_start, window_end]
+        
+        The first occurrence in the window is computed directly, so the cost
+        depends on the window, not on how long the series has been running.
+        """
+        step = self.step
+        index = 0 if window_start <= self.start else -((self.start - window_start) // step)
+        excluded = self.excluded_dates
+        while self.count is None or index < self.count:
+            start = self.start + index * step
+            if start > window_end or (self.until is not None and start > self.until):
+                break
+            if start not in excluded:
+                yield start
+            index += 1
+    
+    def is_occurrence(self, start):
+        """Whether a start time is a (non-cancelled) occurrence of this series"""
+        return any(self.occurrences(start, start))
+    
+    def to_dict(self):
+        """Convert series to dictionary"""
+        return {
+            'id': self.id,
+            'sport': self.sport,
+            'place': self.place,
+            'difficulty': self.difficulty,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'description': self.description,
+            'start': self.start.isoformat(),
+            'frequency': self.frequency,
+            'interval': self.interval,
+            'until': self.until.isoformat() if self.until else None,
+            'count': self.count,
+            'excluded': [d.isoformat() for d in sorted(self.excluded_dates)],
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'author': self.author.username if self.author else 'Anonymous',
+            'author_id': self.author_id
+        }
+    
+    def occurrence_dict(self, start):
+        """An occurrence without an Event row, in the event list format"""
+        return {
+            'id': f's{self.id}:{start.isoformat()}',
+            'sport': self.sport,
+            'date': start.isoformat(),
+            'place': self.place,
+            'difficulty': self.difficulty,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'description': self.description,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'author': self.author.username if self.author else 'Anonymous',
+            'author_id': self.author_id,
+            'participant_count': 0,
+            'series_id': self.id,
+            'occurrence': start.isoformat()
+        }
+    
+    def __repr__(self):
+        return f'<EventSeries {self.id}: {self.frequency} {self.sport} at {self.place}>'
+
+class SeriesOccurrence(db.Model):
+    """Event row standing in for one occurrence of a series"""
+    __tablename__ = 'event_series_occurrences'
+    
+    series_id = db.Column(db.Integer, db.ForeignKey('event_series.id'), primary_key=True)
+    occurrence_start = db.Column(db.DateTime, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False, unique=True)
+    
+    def __repr__(self):
+        return f'<SeriesOccurrence {self.series_id} {self.occurrence_start} -> {self.event_id}>'
+
+# Events moved out of the events table once past (see archive.py). Rows keep
+# their ids; series_id/occurrence_start record the SeriesOccurrence link of
+# a materialized occurrence, whose row is deleted on archival.
+events_archive = db.Table('events_archive',
+    db.Column('id', db.Integer, primary_key=True),
+    db.Column('sport_id', db.Integer, db.ForeignKey('sports.id'), nullable=False),
+    db.Column('date', db.DateTime, nullable=False, index=True),
+    db.Column('place_id', db.Integer, db.ForeignKey('places.id'), nullable=False),
+    db.Column('difficulty_id', db.Integer, db.ForeignKey('difficulties.id'), nullable=False),
+    db.Column('latitude', db.Float, nullable=False),
+    db.Column('longitude', db.Float, nullable=False),
+    db.Column('description', db.Text),
+    db.Column('created_at', db.DateTime),
+    db.Column('author_id', db.Integer, db.ForeignKey('users.id')),
+    db.Column('series_id', db.Integer, db.ForeignKey('event_series.id'), index=True),
+    db.Column('occurrence_start', db.DateTime),
+    db.Column('archived_at', db.DateTime, nullable=False)
+)
+
+# Participants of archived events
+event_participants_archive = db.Table('event_participants_archive',
+    db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
+    db.Column('event_id', db.Integer, db.ForeignKey('events_archive.id'), primary_key=True),
+    db.Column('joined_at', db.DateTime)
+)
+
+class SessionRecord(db.Model):
+    """Server-side session data, used when SESSION_BACKEND is 'sqlalchemy'"""
+    __tablename__ = 'sessions'
+    
+    sid = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    user_id = db.Column(db.Integer, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<SessionRecord {self.sid[:8]}>'
+
+class PendingTask(db.Model):
+    """Background task waiting to run, kept when the in-process queue cannot take it"""
+    __tablename__ = 'pending_tasks'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PendingTask {self.id}: {self.name}>'
+
+class DataVersion(db.Model):
+    """Opaque version token of a group of tables, changed on every write to them"""
+    __tablename__ = 'data_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.String(32), nullable=False)
+    
+    def __repr__(self):
+        return f'<DataVersion {self.name}: {self.version}>'
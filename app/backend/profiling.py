@@ -0,0 +1,281 @@
+"""
+On-demand request profiling for Srazy application
+
+With PROFILING_ENABLED, a request carrying the PROFILING_TOKEN in an
+``X-Profile`` header (or a ``profile`` query argument) is profiled: a
+background thread samples the request thread's stack every few
+milliseconds, and the SQL statements it runs are timed. The result is kept
+in a small per-worker store under a request id, returned in the
+``X-Profile-Id`` response header, and served as a summary, collapsed
+stacks (the input format of flamegraph.pl and speedscope), an SVG
+flamegraph and the slowest SQL statements.
+
+Requests without the token only pay for one attribute check; the SQL
+timing listeners are installed the first time a request is profiled.
+"""
+from collections import Counter
+from html import escape
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import urlencode
+import zlib
+
+from flask import Response, abort, g, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.backend.cache import TTLCache
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+
+def frame_label(frame):
+    """Name of a stack frame in collapsed stacks"""
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def collapse(frame):
+    """Collapsed stack of a frame, outermost call first"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class RequestProfile:
+    """Stack samples and SQL timings of one request"""
+
+    def __init__(self, method, path):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.duration = None
+        self.stacks = Counter()
+        self.sql = {}    # statement -> [count, total seconds, max seconds]
+        self._lock = threading.Lock()
+
+    def add_sql(self, statement, seconds):
+        with self._lock:
+            entry = self.sql.setdefault(statement, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def top_sql(self, limit=10):
+        """Statements by total time, slowest first"""
+        with self._lock:
+            items = sorted(self.sql.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [{'statement': statement, 'count': count,
+                 'total_ms': round(total * 1000, 3), 'max_ms': round(longest * 1000, 3)}
+                for statement, (count, total, longest) in items]
+
+    def collapsed(self):
+        """Samples in collapsed stack format, one 'stack count' line each"""
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(self.stacks.items()))
+
+    def summary(self, sql_limit=5):
+        """Timings, sample and statement counts, and the slowest statements"""
+        return {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration * 1000, 3) if self.duration is not None else None,
+            'samples': sum(self.stacks.values()),
+            'sql_count': sum(entry[0] for entry in self.sql.values()),
+            'sql_ms': round(sum(entry[1] for entry in self.sql.values()) * 1000, 3),
+            'top_sql': self.top_sql(sql_limit),
+        }
+
+
+class StackSampler:
+    """Samples the stack of one thread from a background thread"""
+
+    def __init__(self, profile, thread_id, interval):
+        self.profile = profile
+        self.thread_id = thread_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            # A sample taken once stopping began shows the profiler, not the request
+            if frame is not None and not self._stop.is_set():
+                self.profile.stacks[collapse(frame)] += 1
+
+
+class RequestProfiler:
+    """Profiles requests that present the token and keeps the results
+
+    Profiles are kept per worker for ``ttl`` seconds, at most ``maxsize``.
+    """
+
+    def __init__(self, token=None, enabled=False, interval=0.002, maxsize=50, ttl=3600):
+        self.token = token
+        self.enabled = enabled
+        self.interval = interval
+        self.profiles = TTLCache(ttl=ttl, maxsize=maxsize)
+        self._local = threading.local()
+        self._listening = False
+        self._listen_lock = threading.Lock()
+
+    def authorized(self, value):
+        """Whether a header or query value matches the token"""
+        return bool(self.enabled and self.token and value
+                    and hmac.compare_digest(value.encode('utf-8'), self.token.encode('utf-8')))
+
+    def requested(self):
+        """Whether the current request asks to be profiled"""
+        return self.authorized(request.headers.get(PROFILE_HEADER) or request.args.get('profile'))
+
+    def start(self):
+        """Start profiling the current request on this thread"""
+        self._listen()
+        # The token is not kept with the profile
+        args = urlencode([(key, value) for key, value in request.args.items(multi=True) if key != 'profile'])
+        profile = RequestProfile(request.method, f'{request.path}?{args}' if args else request.path)
+        sampler = StackSampler(profile, threading.get_ident(), self.interval)
+        self._local.profile = profile
+        g.profile = (profile, sampler, time.perf_counter())
+        sampler.start()
+        return profile
+
+    def stop(self):
+        """Stop profiling the current request and store the result; returns it"""
+        active = g.pop('profile', None)
+        if active is None:
+            return None
+        profile, sampler, started = active
+        sampler.stop()
+        self._local.profile = None
+        profile.duration = time.perf_counter() - started
+        self.profiles.set(profile.id, profile)
+        return profile
+
+    def _listen(self):
+        with self._listen_lock:
+            if not self._listening:
+                event.listen(Engine, 'before_cursor_execute', self._before_execute)
+                event.listen(Engine, 'after_cursor_execute', self._after_execute)
+                self._listening = True
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if getattr(self._local, 'profile', None) is not None:
+            conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('profile_query_start')
+        if not starts:
+            return
+        started = starts.pop()
+        profile = getattr(self._local, 'profile', None)
+        if profile is not None:
+            profile.add_sql(statement, time.perf_counter() - started)
+
+
+def flamegraph_svg(stacks, title='Flame graph', width=1200, row_height=16):
+    """Render collapsed stacks as an SVG flame graph, outermost frame at the bottom"""
+    root = {'count': 0, 'children': {}}
+    for stack, count in stacks.items():
+        root['count'] += count
+        node = root
+        for label in stack.split(';'):
+            node = node['children'].setdefault(label, {'count': 0, 'children': {}})
+            node['count'] += count
+
+    def depth(node):
+        return 1 + max((depth(child) for child in node['children'].values()), default=0)
+
+    height = (depth(root) + 1) * row_height
+    total = root['count'] or 1
+    rects = []
+
+    def draw(label, node, x, level):
+        w = node['count'] / total * width
+        if w < 0.5:
+            return
+        y = height - (level + 1) * row_height
+        hue = 20 + zlib.crc32(label.encode('utf-8')) % 40
+        text = escape(label) if w > 40 else ''
+        rects.append(
+            f'<g><title>{escape(label)} ({node["count"]} samples)</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row_height - 1}" '
+            f'fill="hsl({hue},90%,60%)"/>'
+            f'<text x="{x + 3:.1f}" y="{y + row_height - 4}" font-size="11" font-family="monospace">'
+            f'{text[:int(w / 7)]}</text></g>'
+        )
+        for child_label, child in sorted(node['children'].items()):
+            draw(child_label, child, x, level + 1)
+            x += child['count'] / total * width
+
+    draw('all', root, 0.0, 0)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height + row_height}">'
+            f'<text x="4" y="12" font-size="12" font-family="sans-serif">{escape(title)}</text>'
+            f'<g transform="translate(0,{row_height})">{"".join(rects)}</g></svg>')
+
+
+def init_profiling(app, profiler):
+    """Register the profiling hooks and the /api/profiles endpoints"""
+    @app.before_request
+    def start_profile():
+        if profiler.enabled and profiler.requested() and not request.path.startswith('/api/profiles/'):
+            profiler.start()
+
+    @app.after_request
+    def finish_profile(response):
+        if profiler.enabled and 'profile' in g:
+            response.headers[PROFILE_ID_HEADER] = profiler.stop().id
+        return response
+
+    @app.teardown_request
+    def stop_profile(exc=None):
+        if 'profile' in g:
+            profiler.stop()
+
+    def find_profile(profile_id):
+        if not profiler.requested():
+            abort(404)
+        profile = profiler.profiles.get(profile_id)
+        if profile is None:
+            abort(404)
+        return profile
+
+    @app.route('/api/profiles/<profile_id>')
+    def get_profile(profile_id):
+        """Summary of a profiled request"""
+        return jsonify(find_profile(profile_id).summary())
+
+    @app.route('/api/profiles/<profile_id>/collapsed')
+    def get_profile_collapsed(profile_id):
+        """Stack samples in collapsed format"""
+        return Response(find_profile(profile_id).collapsed(), mimetype='text/plain')
+
+    @app.route('/api/profiles/<profile_id>/flamegraph.svg')
+    def get_profile_flamegraph(profile_id):
+        """Stack samples as an SVG flame graph"""
+        profile = find_profile(profile_id)
+        title = f'{profile.method} {profile.path}'
+        return Response(flamegraph_svg(profile.stacks, title=title), mimetype='image/svg+xml')
+
+    @app.route('/api/profiles/<profile_id>/sql')
+    def get_profile_sql(profile_id):
+        """Slowest SQL statements of a profiled request; ?limit=N (default 10)"""
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        return jsonify(find_profile(profile_id).top_sql(limit))
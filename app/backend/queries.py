@@ -0,0 +1,248 @@
+"""
+Read-only queries for Srazy application
+
+List endpoints use Core selects executed on the session's connection. The
+results are lightweight named-tuple rows: no ORM instances are built, and
+nothing is added to the session identity map or tracked for changes.
+"""
+import base64
+from datetime import datetime
+import json
+
+from sqlalchemy import select, func, and_, or_, false, union_all
+
+from app.backend.models import (
+    db, Event, User, Sport, Difficulty, Place, event_participants, interner,
+    events_archive, event_participants_archive
+)
+
+events_table = Event.__table__
+users_table = User.__table__
+sports_table = Sport.__table__
+difficulties_table = Difficulty.__table__
+places_table = Place.__table__
+
+
+def count_participants(participants, name):
+    """Subquery of the number of participants per event"""
+    return (
+        select(participants.c.event_id,
+               func.count().label('participant_count'))
+        .group_by(participants.c.event_id)
+        .subquery(name)
+    )
+
+
+def event_row_columns(events, counts):
+    """Columns in the layout expected by serialization.encode_event_row"""
+    return (
+        events.c.id,
+        sports_table.c.name.label('sport'),
+        events.c.date,
+        places_table.c.name.label('place'),
+        difficulties_table.c.name.label('difficulty'),
+        events.c.latitude,
+        events.c.longitude,
+        events.c.description,
+        events.c.created_at,
+        users_table.c.username.label('author'),
+        events.c.author_id,
+        func.coalesce(counts.c.participant_count, 0).label('participant_count'),
+    )
+
+
+# Number of participants per event, in the hot and archive tables
+participant_counts = count_participants(event_participants, 'participant_counts')
+archived_participant_counts = count_participants(event_participants_archive, 'archived_participant_counts')
+
+EVENT_ROW_COLUMNS = event_row_columns(events_table, participant_counts)
+
+
+# Columns in the layout expected by serialization.encode_marker_row
+MARKER_ROW_COLUMNS = (
+    events_table.c.id,
+    sports_table.c.name.label('sport'),
+    events_table.c.date,
+    places_table.c.name.label('place'),
+    difficulties_table.c.name.label('difficulty'),
+    events_table.c.latitude,
+    events_table.c.longitude,
+    users_table.c.username.label('author'),
+    func.coalesce(participant_counts.c.participant_count, 0).label('participant_count'),
+)
+
+
+# Columns in the layout expected by serialization.encode_user_row
+USER_ROW_COLUMNS = (
+    users_table.c.id,
+    users_table.c.username,
+    users_table.c.email,
+    users_table.c.created_at,
+)
+
+
+def event_rows_select(events=events_table, counts=participant_counts):
+    """Base select for event list rows, from the events table or the archive"""
+    return (
+        select(*event_row_columns(events, counts))
+        .select_from(events)
+        .join(sports_table, events.c.sport_id == sports_table.c.id)
+        .join(places_table, events.c.place_id == places_table.c.id)
+        .join(difficulties_table, events.c.difficulty_id == difficulties_table.c.id)
+        .outerjoin(users_table, events.c.author_id == users_table.c.id)
+        .outerjoin(counts, counts.c.event_id == events.c.id)
+    )
+
+
+def filter_events(stmt, sport=None, date_from=None, date_to=None, place=None, difficulty=None,
+                  event_ids=None, events=events_table):
+    """Apply the event list filters to a select
+
+    Sport and difficulty are resolved to lookup ids first, so the filter
+    compares integers; place matches part of the place name.
+    """
+    if event_ids is not None:
+        stmt = stmt.where(events.c.id.in_(event_ids))
+    if sport:
+        stmt = stmt.where(lookup_filter(events.c.sport_id, Sport, sport))
+    if date_from:
+        stmt = stmt.where(events.c.date >= date_from)
+    if date_to:
+        stmt = stmt.where(events.c.date <= date_to)
+    if place:
+        stmt = stmt.where(places_table.c.name.ilike(f'%{place}%'))
+    if difficulty:
+        stmt = stmt.where(lookup_filter(events.c.difficulty_id, Difficulty, difficulty))
+    return stmt
+
+
+def lookup_filter(column, model, name):
+    """Condition matching a lookup id column against a name"""
+    lookup_id = interner.lookup_id(model, name)
+    return column == lookup_id if lookup_id is not None else false()
+
+
+def fetch_lookup_names(model):
+    """Names in a lookup table, alphabetically"""
+    t = model.__table__
+    return db.session.connection().execute(select(t.c.name).order_by(t.c.key)).scalars().all()
+
+
+def fetch_rows(stmt):
+    """Execute a Core select and return its rows
+
+    The statement runs on the session's connection, bypassing ORM loading,
+    autoflush and the identity map.
+    """
+    return db.session.connection().execute(stmt).all()
+
+
+def fetch_event_rows(include_archive=False, **filters):
+    """Fetch event list rows matching the given filters
+
+    With include_archive, archived events matching the filters are added
+    with UNION ALL.
+    """
+    stmt = filter_events(event_rows_select(), **filters)
+    if include_archive:
+        archived = filter_events(event_rows_select(events_archive, archived_participant_counts),
+                                 events=events_archive, **filters)
+        stmt = union_all(stmt, archived)
+    return fetch_rows(stmt)
+
+
+def fetch_upcoming_marker_rows(after, limit):
+    """Fetch compact rows of the next events dated at or after ``after``"""
+    stmt = (
+        event_rows_select().with_only_columns(*MARKER_ROW_COLUMNS)
+        .where(events_table.c.date >= after)
+        .order_by(events_table.c.date, events_table.c.id)
+        .limit(limit)
+    )
+    return fetch_rows(stmt)
+
+
+def fetch_event_locations():
+    """(id, latitude, longitude, date) of every event, for the spatial index
+
+    Read from the primary even within a read-only request, since the index
+    outlives the request and must not be built from a lagging replica.
+    """
+    with db.engine.connect() as conn:
+        return conn.execute(select(events_table.c.id, events_table.c.latitude,
+                                   events_table.c.longitude, events_table.c.date)).all()
+
+
+def fetch_participating_ids(user_id, event_ids, chunk_size=900, include_archive=False):
+    """Return the subset of event ids the user participates in
+
+    One ``event_id IN (...)`` query per chunk of ids, i.e. a single query
+    for any normal page of events (two with include_archive).
+    """
+    event_ids = list(event_ids)
+    tables = (event_participants, event_participants_archive) if include_archive else (event_participants,)
+    participating = set()
+    for start in range(0, len(event_ids), chunk_size):
+        chunk = event_ids[start:start + chunk_size]
+        for participants in tables:
+            stmt = select(participants.c.event_id).where(
+                participants.c.user_id == user_id,
+                participants.c.event_id.in_(chunk)
+            )
+            participating.update(db.session.connection().execute(stmt).scalars())
+    return participating
+
+
+def encode_cursor(row):
+    """Opaque keyset cursor pointing after an event row"""
+    raw = json.dumps([row.date.isoformat(), row.id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Decode a keyset cursor into (date, id); raises ValueError if invalid"""
+    try:
+        date, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(date), int(event_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def user_event_rows_select(user_id, after, limit, events, participants, counts):
+    """One page of a user's events from the events table or the archive"""
+    stmt = (
+        event_rows_select(events, counts)
+        .join(participants, and_(participants.c.event_id == events.c.id,
+                                 participants.c.user_id == user_id))
+        .order_by(events.c.date, events.c.id)
+        .limit(limit)
+    )
+    if after is not None:
+        after_date, after_id = after
+        stmt = stmt.where(or_(
+            events.c.date > after_date,
+            and_(events.c.date == after_date, events.c.id > after_id)
+        ))
+    return stmt
+
+
+def fetch_user_event_rows(user_id, after=None, limit=20):
+    """Fetch a page of the events a user participates in, archived ones included
+
+    Rows are ordered by (date, id) and paginated by keyset: ``after`` is the
+    (date, id) of the last row of the previous page. Each table contributes
+    at most one page, and the union is cut to the first ``limit`` rows.
+    """
+    hot = user_event_rows_select(user_id, after, limit, events_table, event_participants,
+                                 participant_counts).subquery('hot_events')
+    archived = user_event_rows_select(user_id, after, limit, events_archive, event_participants_archive,
+                                      archived_participant_counts).subquery('archived_events')
+    # Ordered, limited selects must be wrapped to be members of a UNION
+    pages = union_all(select(hot), select(archived)).subquery('user_events')
+    return fetch_rows(select(pages).order_by(pages.c.date, pages.c.id).limit(limit))
+
+
+def fetch_user_row(user_id):
+    """Fetch a single user row, or None"""
+    stmt = select(*USER_ROW_COLUMNS).where(users_table.c.id == user_id)
+    return db.session.connection().execute(stmt).first()
@@ -0,0 +1,221 @@
+"""
+Rate limiting and admission control for Srazy application
+
+Each API route belongs to a class ('read', 'search', 'write', 'auth').
+Clients, identified by user id when logged in and by IP address
+otherwise, get a token bucket per class: a request takes one token,
+tokens refill at a steady rate up to a burst size, and a request finding
+the bucket empty is rejected with 429 and a Retry-After header. Classes
+can also cap how many of their requests run at once in a worker; requests
+over the cap get 503.
+
+Buckets live in a backend: per-process memory by default, or a SQLite
+file shared by the workers of one host.
+"""
+from collections import Counter, OrderedDict
+from functools import wraps
+import hmac
+import itertools
+import math
+import sqlite3
+import threading
+import time
+
+from flask import jsonify, request, session
+
+
+def parse_limit(value):
+    """Parse 'rate/burst' (tokens per second / bucket size)
+
+    Raises ValueError unless the rate is positive and the burst at least 1.
+    """
+    try:
+        rate, burst = (float(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f'Invalid rate limit {value!r}: expected rate/burst') from None
+    if not (0 < rate < math.inf and 1 <= burst < math.inf):
+        raise ValueError(f'Invalid rate limit {value!r}: the rate must be positive and the burst at least 1')
+    return rate, burst
+
+
+def refill(tokens, updated, now, rate, burst):
+    """Tokens in a bucket after refilling since updated"""
+    return min(burst, tokens + max(now - updated, 0) * rate)
+
+
+class RateLimitBackend:
+    """Interface for token bucket storage"""
+
+    def take(self, key, rate, burst, cost=1):
+        """Take tokens from a bucket; returns (allowed, retry_after_seconds)"""
+        raise NotImplementedError
+
+    def reset(self):
+        """Forget every bucket"""
+        raise NotImplementedError
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Buckets in process memory
+
+    At most ``maxsize`` buckets are kept; the least recently used one is
+    dropped to make room, which with the default size has normally been
+    idle long enough to be full again.
+    """
+
+    def __init__(self, maxsize=10000, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        self._buckets = OrderedDict()   # key -> (tokens, updated), least recently used first
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost=1):
+        with self._lock:
+            now = self.clock()
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = refill(tokens, updated, now, rate, burst)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """Buckets in a SQLite file, shared by the worker processes of a host
+
+    Each take runs in an immediate transaction, so concurrent workers
+    update a bucket one at a time. Every ``sweep_every`` takes of a worker,
+    buckets idle for ``max_idle`` seconds are deleted.
+    """
+
+    def __init__(self, path, clock=time.time, sweep_every=1000, max_idle=3600):
+        self.path = path
+        self.clock = clock
+        self.sweep_every = sweep_every
+        self.max_idle = max_idle
+        self._takes = itertools.count(1)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS rate_buckets '
+                         '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, rate, burst, cost=1):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = self.clock()
+            row = conn.execute('SELECT tokens, updated FROM rate_buckets WHERE key = ?', (key,)).fetchone()
+            tokens = refill(*row, now, rate, burst) if row else burst
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute('INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                         (key, tokens, now))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if self.sweep_every and next(self._takes) % self.sweep_every == 0:
+            self.sweep()
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    def sweep(self, max_idle=None):
+        """Remove buckets not used for max_idle seconds, returning the count"""
+        max_idle = self.max_idle if max_idle is None else max_idle
+        conn = self._connect()
+        return conn.execute('DELETE FROM rate_buckets WHERE updated < ?',
+                            (self.clock() - max_idle,)).rowcount
+
+    def reset(self):
+        self._connect().execute('DELETE FROM rate_buckets')
+
+
+class RateLimiter:
+    """Applies per-client token buckets and concurrency caps to views
+
+    ``limits`` maps route classes to (rate, burst); ``concurrency`` maps
+    route classes to the number of requests a worker runs at once. The
+    admission counts are only shown to clients presenting ``metrics_token``.
+    """
+
+    def __init__(self, backend, limits, concurrency=None, enabled=True, metrics_token=None):
+        self.backend = backend
+        self.limits = dict(limits)
+        self.enabled = enabled
+        self.metrics_token = metrics_token
+        self.semaphores = {name: threading.BoundedSemaphore(n) for name, n in (concurrency or {}).items()}
+        self.metrics = Counter()
+        self._metrics_lock = threading.Lock()
+
+    def client_key(self):
+        """Identify the client: user id when logged in, IP address otherwise"""
+        user_id = session.get('user_id')
+        return f'user:{user_id}' if user_id is not None else f'ip:{request.remote_addr}'
+
+    def _count(self, name, outcome):
+        with self._metrics_lock:
+            self.metrics[(name, outcome)] += 1
+
+    def _reject(self, name, reason, status, retry_after):
+        self._count(name, reason)
+        response = jsonify({'error': 'Too many requests, please retry later'
+                            if status == 429 else 'Server busy, please retry later'})
+        response.status_code = status
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    def limit(self, name):
+        """Decorator applying a route class to a view"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+
+                rate, burst = self.limits[name]
+                allowed, retry_after = self.backend.take(f'{name}:{self.client_key()}', rate, burst)
+                if not allowed:
+                    return self._reject(name, 'rate_limited', 429, retry_after)
+
+                semaphore = self.semaphores.get(name)
+                if semaphore is None:
+                    self._count(name, 'admitted')
+                    return view(*args, **kwargs)
+                if not semaphore.acquire(blocking=False):
+                    return self._reject(name, 'over_capacity', 503, 1)
+                try:
+                    self._count(name, 'admitted')
+                    return view(*args, **kwargs)
+                finally:
+                    semaphore.release()
+            return wrapper
+        return decorator
+
+    def metrics_authorized(self, value):
+        """Whether a header value matches the metrics token"""
+        return bool(self.metrics_token and value
+                    and hmac.compare_digest(value.encode('utf-8'), self.metrics_token.encode('utf-8')))
+
+    def snapshot(self):
+        """Admission counts per route class and outcome"""
+        with self._metrics_lock:
+            counts = dict(self.metrics)
+        result = {}
+        for (name, outcome), count in counts.items():
+            result.setdefault(name, {'admitted': 0, 'rate_limited': 0, 'over_capacity': 0})[outcome] = count
+        return result
@@ -0,0 +1,84 @@
+"""
+Read/write splitting for Srazy application
+
+Replica databases are configured as SQLAlchemy binds named ``replica_<n>``.
+Handlers decorated with ``read_only`` run their queries on one replica
+(picked once per request); everything else, and any flush, uses the
+primary. After a request writes, the client gets a short-lived cookie that
+pins its reads to the primary so it sees its own writes despite replica lag.
+"""
+from functools import wraps
+import random
+import time
+
+from flask import g, request, has_request_context
+from flask_sqlalchemy.session import Session
+
+REPLICA_PREFIX = 'replica_'
+STICKY_COOKIE = 'db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def replica_binds(urls):
+    """SQLALCHEMY_BINDS entries for a comma-separated list of replica URLs"""
+    urls = [url.strip() for url in urls.split(',') if url.strip()]
+    return {f'{REPLICA_PREFIX}{i}': url for i, url in enumerate(urls)}
+
+
+def replica_keys(engines):
+    """Bind keys of the configured replicas"""
+    return [key for key in engines if key and key.startswith(REPLICA_PREFIX)]
+
+
+def read_only(view):
+    """Mark a view as read-only so its queries may run on a replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def pinned_to_primary():
+    """Whether the client wrote recently and must read from the primary"""
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def reads_from_replica():
+    """Whether queries in the current context may use a replica"""
+    return has_request_context() and g.get('db_read_only', False) and not pinned_to_primary()
+
+
+class RoutingSession(Session):
+    """Session that sends reads of read-only requests to a replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or self._flushing or not reads_from_replica():
+            return engine
+
+        engines = self._db.engines
+        if engine is not engines.get(None):
+            # Models with their own bind key are not replicated
+            return engine
+        replicas = replica_keys(engines)
+        if not replicas:
+            return engine
+        if g.get('db_replica') not in replicas:
+            g.db_replica = random.choice(replicas)
+        return engines[g.db_replica]
+
+
+def init_routing(app, db):
+    """Set the read-your-writes cookie after successful writes"""
+    @app.after_request
+    def pin_writer_to_primary(response):
+        if (request.method not in SAFE_METHODS and not g.get('db_read_only', False)
+                and response.status_code < 400 and replica_keys(db.engines)):
+            seconds = app.config['REPLICA_STICKY_SECONDS']
+            response.set_cookie(STICKY_COOKIE, str(time.time() + seconds), max_age=seconds,
+                                httponly=True, samesite='Lax')
+        return response
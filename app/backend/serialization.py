@@ -0,0 +1,151 @@
+"""
+JSON serialization helpers for Srazy application
+
+Provides a Flask JSON provider that uses orjson when it is installed
+(falling back to the standard library) and precompiled row encoders that
+turn raw result tuples into dictionaries without building ORM objects.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider using orjson when available
+
+    The backend is selected with the ``JSON_BACKEND`` config value:
+    ``'auto'`` (orjson if installed), ``'orjson'`` or ``'stdlib'``.
+    Calls with options orjson does not support go through the stdlib path.
+    Keys are sorted, as with Flask's default provider, on either backend.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        backend = app.config.get('JSON_BACKEND', 'auto')
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_BACKEND is set to orjson but orjson is not installed')
+        self.use_orjson = orjson is not None and backend in ('auto', 'orjson')
+
+    @property
+    def backend(self):
+        """Name of the active JSON backend"""
+        return 'orjson' if self.use_orjson else 'stdlib'
+
+    def dumps(self, obj, **kwargs):
+        """Serialize data as JSON"""
+        if self.use_orjson and set(kwargs) <= {'indent', 'sort_keys'}:
+            indent = kwargs.get('indent')
+            if indent in (None, 2):
+                option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                if indent == 2:
+                    option |= orjson.OPT_INDENT_2
+                if kwargs.get('sort_keys', self.sort_keys):
+                    option |= orjson.OPT_SORT_KEYS
+                return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        """Deserialize data as JSON"""
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+
+def _isoformat(value):
+    """Format a date/datetime value, passing through None"""
+    return value.isoformat() if value is not None else None
+
+
+def _author_name(value):
+    """Display name for an event author"""
+    return value if value is not None else 'Anonymous'
+
+
+# Converters applied to a column value before it is placed in the output
+CONVERTERS = {
+    'iso': _isoformat,
+    'author': _author_name,
+}
+
+
+def make_row_encoder(fields):
+    """Compile an encoder turning a result tuple into a dictionary
+
+    ``fields`` is a sequence of output keys, or ``(key, converter)`` pairs
+    where converter is a callable or a name from ``CONVERTERS``. Values are
+    taken from the tuple by position. The encoder is generated as a single
+    dict literal so that encoding a row costs one function call.
+    """
+    namespace = {}
+    items = []
+    for index, field in enumerate(fields):
+        if isinstance(field, str):
+            key, converter = field, None
+        else:
+            key, converter = field
+        if isinstance(converter, str):
+            converter = CONVERTERS[converter]
+        if converter is None:
+            items.append(f'{key!r}: row[{index}]')
+        else:
+            namespace[f'_c{index}'] = converter
+            items.append(f'{key!r}: _c{index}(row[{index}])')
+
+    source = 'def encode(row):\n    return {' + ', '.join(items) + '}\n'
+    exec(source, namespace)
+    encode = namespace['encode']
+    encode.fields = tuple(f if isinstance(f, str) else f[0] for f in fields)
+    return encode
+
+
+# Field layout of the rows returned by the event list queries; matches Event.to_dict()
+EVENT_FIELDS = (
+    'id',
+    'sport',
+    ('date', 'iso'),
+    'place',
+    'difficulty',
+    'latitude',
+    'longitude',
+    'description',
+    ('created_at', 'iso'),
+    ('author', 'author'),
+    'author_id',
+    'participant_count',
+)
+
+encode_event_row = make_row_encoder(EVENT_FIELDS)
+
+# Compact event layout embedded in the events page for the first paint of the map
+MARKER_FIELDS = (
+    'id',
+    'sport',
+    ('date', 'iso'),
+    'place',
+    'difficulty',
+    'latitude',
+    'longitude',
+    ('author', 'author'),
+    'participant_count',
+)
+
+encode_marker_row = make_row_encoder(MARKER_FIELDS)
+
+# Field layout of user rows; matches User.to_dict()
+USER_FIELDS = (
+    'id',
+    'username',
+    'email',
+    ('created_at', 'iso'),
+)
+
+encode_user_row = make_row_encoder(USER_FIELDS)
+
+
+def encode_rows(encoder, rows):
+    """Encode an iterable of result tuples"""
+    return [encoder(row) for row in rows]
+
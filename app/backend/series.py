@@ -0,0 +1,107 @@
+"""
+Recurring event series for Srazy application
+
+A series is stored as a single EventSeries row. Its occurrences are
+expanded on read, only inside the requested date window. An occurrence
+is materialized as an Event row (linked through SeriesOccurrence) the
+first time it is overridden or joined; from then on it is listed like any
+other event and skipped by the expansion. Once that event is archived,
+the archive row keeps the link and the occurrence stays skipped.
+"""
+from sqlalchemy import select, or_
+
+from app.backend.models import (
+    db, Event, EventSeries, SeriesOccurrence, Sport, Difficulty, Place, events_archive
+)
+from app.backend.queries import lookup_filter
+
+series_occurrences = SeriesOccurrence.__table__
+
+
+def fetch_series(window_start, window_end, sport=None, place=None, difficulty=None):
+    """Series that may have occurrences in [window_start, window_end]"""
+    query = EventSeries.query.filter(
+        EventSeries.start <= window_end,
+        or_(EventSeries.ends_at.is_(None), EventSeries.ends_at >= window_start)
+    )
+    if sport:
+        query = query.filter(lookup_filter(EventSeries.sport_id, Sport, sport))
+    if place:
+        query = query.filter(EventSeries.place_ref.has(Place.name.ilike(f'%{place}%')))
+    if difficulty:
+        query = query.filter(lookup_filter(EventSeries.difficulty_id, Difficulty, difficulty))
+    return query.all()
+
+
+def fetch_materialized(series_ids, window_start, window_end):
+    """(series_id, occurrence_start) pairs that have an Event or archived row"""
+    if not series_ids:
+        return set()
+    materialized = set()
+    for table in (series_occurrences, events_archive):
+        stmt = select(table.c.series_id, table.c.occurrence_start).where(
+            table.c.series_id.in_(series_ids),
+            table.c.occurrence_start.between(window_start, window_end)
+        )
+        materialized.update(tuple(row) for row in db.session.execute(stmt))
+    return materialized
+
+
+def is_archived_occurrence(series, start):
+    """Whether an occurrence was materialized and has since been archived"""
+    stmt = select(events_archive.c.id).where(
+        events_archive.c.series_id == series.id,
+        events_archive.c.occurrence_start == start
+    )
+    return db.session.execute(stmt).first() is not None
+
+
+def expand_series(window_start, window_end, **filters):
+    """Occurrences without an Event row in the window, in the event list format"""
+    if window_end < window_start:
+        return []
+    series_list = fetch_series(window_start, window_end, **filters)
+    materialized = fetch_materialized([s.id for s in series_list], window_start, window_end)
+    return [
+        series.occurrence_dict(start)
+        for series in series_list
+        for start in series.occurrences(window_start, window_end)
+        if (series.id, start) not in materialized
+    ]
+
+
+def find_occurrence_event(series, start):
+    """The Event row of an occurrence, or None if it was not materialized"""
+    link = db.session.get(SeriesOccurrence, (series.id, start))
+    return db.session.get(Event, link.event_id) if link else None
+
+
+def materialize_occurrence(series, start):
+    """Return the Event row for an occurrence, creating it if needed
+
+    The new row is flushed but not committed. Raises ValueError if start is
+    not an occurrence of the series, or if its event was archived.
+    """
+    event = find_occurrence_event(series, start)
+    if event is not None:
+        return event
+    if not series.is_occurrence(start):
+        raise ValueError('Not an occurrence of this series')
+    if is_archived_occurrence(series, start):
+        raise ValueError('This occurrence has been archived')
+
+    event = Event(
+        sport=series.sport,
+        date=start,
+        place=series.place,
+        difficulty=series.difficulty,
+        latitude=series.latitude,
+        longitude=series.longitude,
+        description=series.description,
+        author_id=series.author_id
+    )
+    db.session.add(event)
+    db.session.flush()
+    db.session.add(SeriesOccurrence(series_id=series.id, occurrence_start=start, event_id=event.id))
+    db.session.flush()
+    return event
@@ -0,0 +1,197 @@
+"""
+Server-side session storage for Srazy application
+
+With a server-side backend the session cookie only carries a random
+session id; the data lives in a store with an expiry time. Sessions can be
+revoked by deleting them from the store, and expired ones are swept
+periodically.
+"""
+from datetime import datetime
+import secrets
+import threading
+import time
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from sqlalchemy import select
+from werkzeug.datastructures import CallbackDict
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session data backed by a server-side store"""
+
+    def __init__(self, initial=None, sid=None):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = sid is None
+        self.modified = False
+        self.loaded_user_id = self.get('user_id')
+
+
+class SessionStore:
+    """Interface for server-side session stores"""
+
+    def load(self, sid):
+        """Return the stored data for a session id, or None"""
+        raise NotImplementedError
+
+    def save(self, sid, data, expires_at, user_id=None):
+        """Create or replace a session"""
+        raise NotImplementedError
+
+    def delete(self, sid):
+        """Remove a session"""
+        raise NotImplementedError
+
+    def delete_user_sessions(self, user_id):
+        """Remove every session belonging to a user, returning the count"""
+        raise NotImplementedError
+
+    def sweep(self):
+        """Remove expired sessions, returning the count"""
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """Per-process session store, for development and tests"""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def load(self, sid):
+        entry = self._sessions.get(sid)
+        if entry is None or entry[1] < datetime.utcnow():
+            return None
+        return entry[0]
+
+    def save(self, sid, data, expires_at, user_id=None):
+        with self._lock:
+            self._sessions[sid] = (data, expires_at, user_id)
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def delete_user_sessions(self, user_id):
+        with self._lock:
+            sids = [sid for sid, entry in self._sessions.items() if entry[2] == user_id]
+            for sid in sids:
+                del self._sessions[sid]
+        return len(sids)
+
+    def sweep(self):
+        now = datetime.utcnow()
+        with self._lock:
+            sids = [sid for sid, entry in self._sessions.items() if entry[1] < now]
+            for sid in sids:
+                del self._sessions[sid]
+        return len(sids)
+
+
+class SQLSessionStore(SessionStore):
+    """Session store using the ``sessions`` table of the application database
+
+    Statements run on their own connection so they never interfere with the
+    request's ORM transaction.
+    """
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+
+    def load(self, sid):
+        t = self.table
+        with self.db.engine.connect() as conn:
+            return conn.execute(
+                select(t.c.data).where(t.c.sid == sid, t.c.expires_at >= datetime.utcnow())
+            ).scalar()
+
+    def save(self, sid, data, expires_at, user_id=None):
+        t = self.table
+        values = {'data': data, 'expires_at': expires_at, 'user_id': user_id}
+        with self.db.engine.begin() as conn:
+            updated = conn.execute(t.update().where(t.c.sid == sid).values(**values))
+            if updated.rowcount == 0:
+                conn.execute(t.insert().values(sid=sid, **values))
+
+    def delete(self, sid):
+        t = self.table
+        with self.db.engine.begin() as conn:
+            conn.execute(t.delete().where(t.c.sid == sid))
+
+    def delete_user_sessions(self, user_id):
+        t = self.table
+        with self.db.engine.begin() as conn:
+            return conn.execute(t.delete().where(t.c.user_id == user_id)).rowcount
+
+    def sweep(self):
+        t = self.table
+        with self.db.engine.begin() as conn:
+            return conn.execute(t.delete().where(t.c.expires_at < datetime.utcnow())).rowcount
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session interface storing session data in a SessionStore
+
+    A new session id is issued whenever the logged in user changes, so an id
+    obtained before login cannot be reused afterwards.
+    """
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store, sweep_interval=300):
+        self.store = store
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.store.load(sid)
+            if data is not None:
+                return ServerSession(self.serializer.loads(data), sid=sid)
+        return ServerSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.sid is not None and session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not (session.modified or self.should_set_cookie(app, session)):
+            return
+
+        sid = session.sid
+        if sid is None or session.get('user_id') != session.loaded_user_id:
+            if sid is not None:
+                self.store.delete(sid)
+            sid = secrets.token_urlsafe(32)
+
+        expires_at = datetime.utcnow() + app.permanent_session_lifetime
+        self.store.save(sid, self.serializer.dumps(dict(session)), expires_at,
+                        user_id=session.get('user_id'))
+        response.set_cookie(
+            name, sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+        self.maybe_sweep()
+
+    def maybe_sweep(self):
+        """Sweep expired sessions if the sweep interval has elapsed"""
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            self.store.sweep()
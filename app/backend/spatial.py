@@ -0,0 +1,268 @@
+"""
+In-memory spatial index of event locations for Srazy application
+
+Event coordinates are kept in NumPy arrays and bucketed into a regular
+latitude/longitude grid. Radius and k-nearest queries only compute
+(vectorized) haversine distances for events in the grid cells around the
+query point. The index is loaded lazily from the database and updated
+incrementally as events are written by this worker; writes made by other
+workers are picked up by reloading it when the version of the event
+locations changes.
+"""
+import itertools
+import math
+import threading
+import time
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """Great-circle distances in km from one point to arrays of points (degrees)"""
+    lat1 = math.radians(lat)
+    lats = np.radians(lats)
+    dlat = lats - lat1
+    dlng = np.radians(lngs) - math.radians(lng)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lats) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def to_timestamp(value):
+    """Seconds since the epoch for a naive datetime, NaN for None"""
+    return value.timestamp() if value is not None else math.nan
+
+
+class SpatialIndex:
+    """Grid index over event coordinates
+
+    The default cell size of 0.05 degrees (about 5.5 km of latitude) suits
+    city-scale searches. ``loader`` is called on first use and must return an iterable of
+    (event_id, latitude, longitude, date) tuples. Writes made before the
+    index is loaded are ignored, since the load picks them up.
+
+    ``version``, if given, returns the current version of the indexed data;
+    it is checked at most every ``refresh_interval`` seconds and the index
+    is reloaded when it differs from the version read before the last load.
+    Writes applied through ``upsert``/``remove`` report the version they
+    produced with ``advance``, so they do not cause a reload.
+    """
+
+    def __init__(self, loader=None, cell_size=0.05, capacity=1024, version=None, refresh_interval=0):
+        self.loader = loader
+        self.cell_size = cell_size
+        self.version = version
+        self.refresh_interval = refresh_interval
+        self.loaded = loader is None
+        self._loaded_version = None
+        self._checked_at = None
+        self._lock = threading.RLock()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._lats = np.zeros(capacity, dtype=np.float64)
+        self._lngs = np.zeros(capacity, dtype=np.float64)
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._size = 0
+        self._slots = {}   # event id -> array slot
+        self._cells = {}   # (row, col) -> set of slots
+
+    def __len__(self):
+        self.ensure_loaded()
+        return self._size
+
+    def _cell(self, lat, lng):
+        return (math.floor((lat + 90) / self.cell_size),
+                math.floor((((lng + 180) % 360)) / self.cell_size))
+
+    def _check_due(self):
+        return (self.version is not None and self.loader is not None
+                and (self._checked_at is None or time.monotonic() - self._checked_at >= self.refresh_interval))
+
+    def ensure_loaded(self):
+        """Load the index if not done yet, or reload it if the data version changed"""
+        if self.loaded and not self._check_due():
+            return
+        with self._lock:
+            if self.loaded and not self._check_due():
+                return
+            # Read before loading, so a write committed in between causes another reload
+            version = self.version() if self.version is not None else None
+            self._checked_at = time.monotonic()
+            if self.loaded and version == self._loaded_version:
+                return
+            self._load(self.loader())
+            self._loaded_version = version
+            self.loaded = True
+
+    def advance(self, previous, version):
+        """Note that a write applied to this index changed the version from previous
+
+        Only a version following the loaded one is taken over: if another
+        process changed it in between, the next check still reloads.
+        """
+        with self._lock:
+            if self.loaded and self._loaded_version == previous:
+                self._loaded_version = version
+
+    def reset(self):
+        """Forget all entries; the next query reloads from the loader"""
+        with self._lock:
+            self._allocate(1024)
+            self.loaded = self.loader is None
+            self._loaded_version = None
+            self._checked_at = None
+
+    def _load(self, rows):
+        rows = list(rows)
+        self._allocate(max(len(rows) * 2, 1024))
+        if not rows:
+            return
+        ids, lats, lngs, dates = zip(*rows)
+        n = len(rows)
+        self._ids[:n] = ids
+        self._lats[:n] = lats
+        self._lngs[:n] = lngs
+        self._times[:n] = [to_timestamp(d) for d in dates]
+        self._size = n
+        self._slots = {event_id: slot for slot, event_id in enumerate(ids)}
+
+        rows_ = np.floor((self._lats[:n] + 90) / self.cell_size).astype(np.int64)
+        cols = np.floor(np.mod(self._lngs[:n] + 180, 360) / self.cell_size).astype(np.int64)
+        order = np.lexsort((cols, rows_))
+        keys = np.stack((rows_[order], cols[order]), axis=1)
+        starts = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+        for group in np.split(order, starts):
+            self._cells[(int(rows_[group[0]]), int(cols[group[0]]))] = set(group.tolist())
+
+    def upsert(self, event_id, lat, lng, date=None):
+        """Add or move an event"""
+        if not self.loaded:
+            return
+        with self._lock:
+            slot = self._slots.get(event_id)
+            if slot is None:
+                if self._size == len(self._ids):
+                    self._grow()
+                slot = self._size
+                self._size += 1
+                self._slots[event_id] = slot
+                self._ids[slot] = event_id
+            else:
+                self._cells[self._cell(self._lats[slot], self._lngs[slot])].discard(slot)
+            self._lats[slot] = lat
+            self._lngs[slot] = lng
+            self._times[slot] = to_timestamp(date)
+            self._cells.setdefault(self._cell(lat, lng), set()).add(slot)
+
+    def remove(self, event_id):
+        """Remove an event if present"""
+        if not self.loaded:
+            return
+        with self._lock:
+            slot = self._slots.pop(event_id, None)
+            if slot is None:
+                return
+            self._cells[self._cell(self._lats[slot], self._lngs[slot])].discard(slot)
+
+            # Move the last entry into the freed slot
+            last = self._size - 1
+            if slot != last:
+                last_cell = self._cells[self._cell(self._lats[last], self._lngs[last])]
+                last_cell.discard(last)
+                last_cell.add(slot)
+                for array in (self._ids, self._lats, self._lngs, self._times):
+                    array[slot] = array[last]
+                self._slots[int(self._ids[slot])] = slot
+            self._size = last
+
+    def _grow(self):
+        capacity = len(self._ids) * 2
+        for name in ('_ids', '_lats', '_lngs', '_times'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _candidates(self, lat, lng, lat_cells, lng_cells):
+        """Slots in the cells within the given cell distance of a point"""
+        row, col = self._cell(lat, lng)
+        cols_total = math.ceil(360 / self.cell_size)
+        if 2 * lng_cells + 1 >= cols_total:
+            col_range = range(cols_total)
+        else:
+            col_range = [(col + d) % cols_total for d in range(-lng_cells, lng_cells + 1)]
+        cells = self._cells
+        if (2 * lat_cells + 1) * len(col_range) > len(cells):
+            # Wide searches: scanning occupied cells is cheaper than probing every key
+            col_set = set(col_range)
+            groups = [slots for (r, c), slots in cells.items()
+                      if abs(r - row) <= lat_cells and c in col_set]
+        else:
+            groups = [cells.get((r, c)) for r in range(row - lat_cells, row + lat_cells + 1)
+                      for c in col_range]
+        return np.fromiter(itertools.chain.from_iterable(g for g in groups if g), dtype=np.int64)
+
+    def _lng_cells(self, lat, km):
+        """Cells of longitude needed to cover km around a latitude"""
+        cos_lat = math.cos(math.radians(min(abs(lat) + km / KM_PER_DEGREE, 90)))
+        if cos_lat < 1e-6:
+            return math.ceil(360 / self.cell_size)
+        # One extra cell of margin for the curvature of parallels
+        return math.ceil(km / (KM_PER_DEGREE * cos_lat * self.cell_size)) + 1
+
+    def _rank(self, slots, distances, limit=None):
+        """Order by distance (0.1 km buckets), then date; return (ids, distances)"""
+        if limit is not None and len(slots) > limit:
+            nearest = np.argpartition(distances, limit - 1)[:limit]
+            slots, distances = slots[nearest], distances[nearest]
+        order = np.lexsort((self._times[slots], np.round(distances, 1)))
+        return self._ids[slots[order]].tolist(), distances[order].tolist()
+
+    def _filter_time(self, slots, after):
+        if after is None or len(slots) == 0:
+            return slots
+        return slots[self._times[slots] >= to_timestamp(after)]
+
+    def within(self, lat, lng, radius_km, after=None, limit=None):
+        """Events within radius_km of a point, nearest first
+
+        ``after`` restricts results to events dated at or after it.
+        """
+        self.ensure_loaded()
+        with self._lock:
+            lat_cells = math.ceil(radius_km / (KM_PER_DEGREE * self.cell_size))
+            slots = self._candidates(lat, lng, lat_cells, self._lng_cells(lat, radius_km))
+            slots = self._filter_time(slots, after)
+            distances = haversine_km(lat, lng, self._lats[slots], self._lngs[slots])
+            inside = distances <= radius_km
+            return self._rank(slots[inside], distances[inside], limit)
+
+    def nearest(self, lat, lng, k=10, after=None):
+        """The k events nearest to a point
+
+        Searches rings of grid cells outwards until the k-th nearest
+        candidate is closer than the distance the searched rings guarantee.
+        """
+        self.ensure_loaded()
+        with self._lock:
+            rows_total = math.ceil(180 / self.cell_size)
+            ring = 0
+            while True:
+                covered_km = ring * self.cell_size * KM_PER_DEGREE
+                slots = self._candidates(lat, lng, ring, self._lng_cells(lat, covered_km) if ring else 0)
+                slots = self._filter_time(slots, after)
+                if len(slots) >= k or ring >= rows_total:
+                    distances = haversine_km(lat, lng, self._lats[slots], self._lngs[slots])
+                    if ring >= rows_total:
+                        return self._rank(slots, distances, k)
+                    kth = np.partition(distances, k - 1)[k - 1]
+                    if kth <= covered_km:
+                        return self._rank(slots, distances, k)
+                    # Jump straight to the ring that covers the k-th candidate
+                    ring = max(ring + 1, math.ceil(kth / (self.cell_size * KM_PER_DEGREE)))
+                else:
+                    ring = ring * 2 + 1 if ring else 1
@@ -0,0 +1,282 @@
+"""
+Background tasks for Srazy application
+
+Side effects of writes (index upkeep, cache invalidation, notifications)
+are registered as tasks and queued with ``after_commit`` so they run on a
+pool of worker threads once the request's transaction has committed, and
+are dropped if it rolls back. Failing tasks are retried with exponential
+backoff. Tasks that do not fit in the queue, are still queued at shutdown
+or keep failing are stored in the ``pending_tasks`` table; queued ones are
+picked up again by idle workers, possibly in another process. Workers
+only poll the table while a durable task is registered.
+
+Tasks that maintain per-process state (in-memory indexes and caches) are
+registered with ``durable=False``: replaying them elsewhere, or later,
+would apply stale updates, so they are dropped instead of stored.
+"""
+import atexit
+import heapq
+import itertools
+import json
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import event, select
+
+AFTER_COMMIT_KEY = 'after_commit_tasks'
+
+
+class TaskQueue:
+    """In-process task queue with worker threads and a durable fallback
+
+    Task arguments must be JSON serializable so tasks can be stored. With
+    ``eager`` tasks run synchronously when queued, which is handy in tests
+    and scripts.
+    """
+
+    def __init__(self, app, db, table, workers=2, maxsize=1000, eager=False,
+                 base_delay=0.5, poll_interval=5.0):
+        self.app = app
+        self.db = db
+        self.table = table
+        self.workers = workers
+        self.maxsize = maxsize
+        self.eager = eager
+        self.base_delay = base_delay
+        self.poll_interval = poll_interval
+        self.registry = {}
+        self._heap = []            # (run_at, sequence, name, args, kwargs, attempt)
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._active = 0
+        self._threads = []
+        self._stopping = False
+        self._last_poll = 0.0
+
+        event.listen(db.session, 'after_commit', self._run_after_commit)
+        event.listen(db.session, 'after_soft_rollback', self._discard_after_rollback)
+        atexit.register(self.shutdown)
+
+    def task(self, func=None, max_retries=3, durable=True):
+        """Register a function as a task, usable as @queue.task or @queue.task(max_retries=n)
+
+        Non-durable tasks are dropped, with a warning, instead of being
+        stored when the queue is full, at shutdown or when they keep failing.
+        """
+        def register(func):
+            func.task_name = func.__name__
+            func.max_retries = max_retries
+            func.durable = durable
+            self.registry[func.task_name] = func
+            return func
+        return register(func) if func is not None else register
+
+    def _name(self, task):
+        return getattr(task, 'task_name', task)
+
+    def _durable(self, name):
+        return getattr(self.registry.get(name), 'durable', True)
+
+    def _polls(self):
+        """Whether idle workers look for stored tasks: only if any task can be stored"""
+        return any(func.durable for func in self.registry.values())
+
+    # Queueing
+
+    def after_commit(self, task, *args, **kwargs):
+        """Queue a task once the current database transaction commits"""
+        self.db.session.info.setdefault(AFTER_COMMIT_KEY, []).append((self._name(task), args, kwargs))
+
+    def _run_after_commit(self, session):
+        for name, args, kwargs in session.info.pop(AFTER_COMMIT_KEY, ()):
+            self.enqueue(name, *args, **kwargs)
+
+    def _discard_after_rollback(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop(AFTER_COMMIT_KEY, None)
+
+    def enqueue(self, task, *args, **kwargs):
+        """Queue a task to run as soon as a worker is free"""
+        name = self._name(task)
+        if name not in self.registry:
+            raise KeyError(f'Unknown task: {name}')
+        if self.eager:
+            self._run_eager(name, args, kwargs)
+            return
+        self._push(name, args, kwargs, attempt=0)
+
+    def _push(self, name, args, kwargs, attempt, delay=0.0):
+        with self._cond:
+            if self._stopping or len(self._heap) >= self.maxsize:
+                full = True
+            else:
+                full = False
+                self._ensure_started()
+                heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence),
+                                            name, args, kwargs, attempt))
+                self._cond.notify()
+        if full:
+            self._store_or_log(name, args, kwargs, attempt)
+
+    def _ensure_started(self):
+        if not self._threads:
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'task-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    # Running
+
+    def _execute(self, name, args, kwargs):
+        with self.app.app_context():
+            try:
+                self.registry[name](*args, **kwargs)
+            finally:
+                self.db.session.remove()
+
+    def _run_eager(self, name, args, kwargs):
+        func = self.registry[name]
+        for attempt in range(func.max_retries + 1):
+            try:
+                self._execute(name, args, kwargs)
+                return
+            except Exception as e:
+                error = e
+        self._fail(name, args, kwargs, func.max_retries + 1, error)
+
+    def _next_job(self):
+        """Wait for a job that is due; None when stopping"""
+        with self._cond:
+            while True:
+                if self._stopping:
+                    return None
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    self._active += 1
+                    return heapq.heappop(self._heap)
+                polls = self._polls()
+                if not self._heap and polls and now - self._last_poll >= self.poll_interval:
+                    self._last_poll = now
+                    self._active += 1
+                    return 'poll'
+                if self._heap:
+                    self._cond.wait(min(self._heap[0][0] - now, self.poll_interval))
+                else:
+                    self._cond.wait(self.poll_interval if polls else None)
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                if job == 'poll':
+                    self._poll()
+                else:
+                    self._run(*job[2:])
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    self._cond.notify_all()
+
+    def _poll(self):
+        try:
+            self.restore()
+        except Exception as e:
+            self.app.logger.error(f'Restoring stored tasks failed: {e}')
+
+    def _run(self, name, args, kwargs, attempt):
+        try:
+            self._execute(name, args, kwargs)
+        except Exception as e:
+            attempt += 1
+            if attempt > self.registry[name].max_retries:
+                self._fail(name, args, kwargs, attempt, e)
+            else:
+                self._push(name, args, kwargs, attempt, delay=self.base_delay * 2 ** (attempt - 1))
+
+    def _fail(self, name, args, kwargs, attempts, error):
+        self.app.logger.error(f'Task {name} failed after {attempts} attempts: {error}')
+        self._store_or_log(name, args, kwargs, attempts, failed=True, error=str(error))
+
+    # Durable storage
+
+    def _store(self, name, args, kwargs, attempts, failed=False, error=None):
+        """Save a task to the pending_tasks table"""
+        payload = json.dumps({'args': list(args), 'kwargs': kwargs})
+        with self.app.app_context(), self.db.engine.begin() as conn:
+            conn.execute(self.table.insert().values(
+                name=name, payload=payload, attempts=attempts, failed=failed,
+                last_error=error, created_at=datetime.utcnow()))
+
+    def _store_or_log(self, name, *args, **kwargs):
+        if not self._durable(name):
+            self.app.logger.warning(f'Dropped non-durable task {name}')
+            return
+        try:
+            self._store(name, *args, **kwargs)
+        except Exception as e:
+            self.app.logger.error(f'Could not store task {name}: {e}')
+
+    def restore(self, limit=None):
+        """Move stored, not failed tasks back into the queue; returns the count"""
+        t = self.table
+        with self._cond:
+            room = self.maxsize - len(self._heap)
+        limit = room if limit is None else min(limit, room)
+        if limit <= 0:
+            return 0
+
+        restored = 0
+        with self.app.app_context(), self.db.engine.begin() as conn:
+            rows = conn.execute(
+                select(t.c.id, t.c.name, t.c.payload, t.c.attempts)
+                .where(t.c.failed.is_(False)).order_by(t.c.id).limit(limit)
+            ).all()
+            for row in rows:
+                # Claim the row; another process may have taken it already
+                if conn.execute(t.delete().where(t.c.id == row.id)).rowcount != 1:
+                    continue
+                if not self._durable(row.name):
+                    # Stored by an older version; stale by now
+                    continue
+                payload = json.loads(row.payload)
+                with self._cond:
+                    self._ensure_started()
+                    heapq.heappush(self._heap, (time.monotonic(), next(self._sequence), row.name,
+                                                tuple(payload['args']), payload['kwargs'], row.attempts))
+                    self._cond.notify()
+                restored += 1
+        return restored
+
+    # Lifecycle
+
+    def join(self, timeout=None):
+        """Wait until every queued task has run; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._heap or self._active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def shutdown(self, wait=True):
+        """Stop the workers and store tasks that have not run yet"""
+        with self._cond:
+            if self._stopping:
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        with self._cond:
+            jobs, self._heap = self._heap, []
+        for _, _, name, args, kwargs, attempt in jobs:
+            self._store_or_log(name, args, kwargs, attempt)
+
+    def __len__(self):
+        return len(self._heap)
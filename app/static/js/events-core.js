@@ -0,0 +1,58 @@
+// Events page helpers without DOM or Leaflet dependencies
+// Loaded before events.js in the browser; also importable from Node for benchmarks.
+
+/**
+ * Compute the marker changes needed to show a new list of events
+ * @param {Map<number, Object>} current - events currently shown on the map, keyed by id
+ * @param {Array<Object>} events - events that should be shown
+ * @returns {{added: Array<Object>, removed: Array<number>, moved: Array<Object>, unchanged: number}}
+ */
+function diffMarkers(current, events) {
+    const added = [];
+    const moved = [];
+    const seen = new Set();
+    let unchanged = 0;
+
+    for (const event of events) {
+        seen.add(event.id);
+        const previous = current.get(event.id);
+        if (previous === undefined) {
+            added.push(event);
+        } else if (previous.latitude !== event.latitude || previous.longitude !== event.longitude) {
+            moved.push(event);
+        } else {
+            unchanged++;
+        }
+    }
+
+    const removed = [];
+    for (const id of current.keys()) {
+        if (!seen.has(id)) {
+            removed.push(id);
+        }
+    }
+
+    return { added, removed, moved, unchanged };
+}
+
+/**
+ * Compute which rows of a fixed-height list are visible
+ * @param {number} scrollTop - scroll offset of the list viewport in px
+ * @param {number} viewportHeight - height of the viewport in px
+ * @param {number} rowHeight - height of one row in px
+ * @param {number} total - number of rows
+ * @param {number} overscan - extra rows rendered above and below the viewport
+ * @returns {{start: number, end: number}} half-open range of row indexes
+ */
+function visibleRange(scrollTop, viewportHeight, rowHeight, total, overscan = 0) {
+    const first = Math.floor(Math.max(scrollTop, 0) / rowHeight);
+    const last = Math.ceil((Math.max(scrollTop, 0) + viewportHeight) / rowHeight);
+    return {
+        start: Math.max(first - overscan, 0),
+        end: Math.min(last + overscan, total)
+    };
+}
+
+if (typeof module !== 'undefined' && module.exports) {
+    module.exports = { diffMarkers, visibleRange };
+}
@@ -1,7 +1,8 @@
 // Events Map JavaScript
 
 let map;
-let markers = [];
+let markers = new Map(); // event id -> L.marker
+let markerEvents = new Map(); // event id -> event shown by that marker
 let tempMarker = null;
 let selectedLocation = null;
 let useLeaflet = typeof L !== 'undefined';
@@ -9,15 +10,69 @@ let currentView = 'map'; // 'map' or 'list'
 let currentEvents = [];
 let editingEventId = null;
 let currentUser = null;
+let listEvents = [];
+let listRange = null;
+
+// Virtualized list: every row has the same height so only visible rows are rendered
+const LIST_ROW_HEIGHT = 300; // px, card height plus gap
+const LIST_OVERSCAN = 4; // rows rendered beyond the viewport
 
 // Initialize the map when DOM is ready
 document.addEventListener('DOMContentLoaded', function() {
     initializeMap();
     setupEventListeners();
     checkLoginStatus();
+    showInitialEvents();
     loadEvents();
+    loadVocabulary();
 });
 
+/**
+ * Add sports and difficulty levels used by existing events to the dropdowns
+ * (the response is cached by the browser)
+ */
+async function loadVocabulary() {
+    try {
+        const response = await fetch('/api/sports');
+        if (!response.ok) return;
+        const vocabulary = await response.json();
+        addSelectOptions(['sport-filter', 'event-sport'], vocabulary.sports);
+        addSelectOptions(['difficulty-filter', 'event-difficulty'], vocabulary.difficulties);
+    } catch (error) {
+        console.error('Error loading sports:', error);
+    }
+}
+
+/**
+ * Append options that a select does not have yet
+ */
+function addSelectOptions(selectIds, names) {
+    for (const id of selectIds) {
+        const select = document.getElementById(id);
+        const existing = new Set(Array.from(select.options, option => option.value.toLowerCase()));
+        for (const name of names) {
+            if (!existing.has(name.toLowerCase())) {
+                select.add(new Option(name, name));
+            }
+        }
+    }
+}
+
+/**
+ * Show the upcoming events embedded in the page while the full list loads
+ */
+function showInitialEvents() {
+    const payload = document.getElementById('initial-events');
+    if (!payload) return;
+    
+    currentEvents = JSON.parse(payload.textContent);
+    if (currentView === 'map') {
+        displayEventsOnMap(currentEvents);
+    } else {
+        displayEventsInList(currentEvents);
+    }
+}
+
 /**
  * Initialize the Leaflet map
  */
@@ -129,6 +184,11 @@ function setupEventListeners() {
         switchView('list');
     });
     
+    // Render list rows as they scroll into view
+    document.getElementById('list-view').addEventListener('scroll', function() {
+        renderVisibleRows();
+    }, { passive: true });
+    
     // Show create form button
     document.getElementById('show-create-form').addEventListener('click', function() {
         showCreateForm();
@@ -204,6 +264,9 @@ async function loadEvents() {
         const difficulty = document.getElementById('difficulty-filter').value;
         if (difficulty) params.append('difficulty', difficulty);
         
+        // Participation flags are only added by the server when logged in
+        params.append('include_participation', 'true');
+        
         const queryString = params.toString();
         const url = `/api/events${queryString ? '?' + queryString : ''}`;
         
@@ -228,26 +291,38 @@ async function loadEvents() {
 
 /**
  * Display events on the map
+ *
+ * Markers are kept by event id; only added, removed and moved events touch
+ * the map. Popup content is built when a popup opens.
  */
 function displayEventsOnMap(events) {
     if (useLeaflet) {
-        // Clear existing markers
-        markers.forEach(marker => map.removeLayer(marker));
-        markers = [];
+        const changes = diffMarkers(markerEvents, events);
+        
+        changes.removed.forEach(id => {
+            map.removeLayer(markers.get(id));
+            markers.delete(id);
+        });
+        
+        changes.moved.forEach(event => {
+            markers.get(event.id).setLatLng([event.latitude, event.longitude]);
+        });
         
-        // Add markers for each event
-        events.forEach(event => {
+        changes.added.forEach(event => {
+            const eventId = event.id;
             const marker = L.marker([event.latitude, event.longitude])
                 .addTo(map)
-                .bindPopup(createEventPopup(event));
-            
-            markers.push(marker);
+                .bindPopup(() => createEventPopup(markerEvents.get(eventId)));
+            markers.set(eventId, marker);
         });
         
-        // Fit map to show all markers if there are any
-        if (markers.length > 0) {
-            const group = L.featureGroup(markers);
-            map.fitBounds(group.getBounds().pad(0.1));
+        // Popups read the latest data for their event when opened
+        markerEvents = new Map(events.map(event => [event.id, event]));
+        
+        // Fit map to show all markers when the set of markers changed
+        if (events.length > 0 && (changes.added.length > 0 || changes.removed.length > 0 || changes.moved.length > 0)) {
+            const bounds = L.latLngBounds(events.map(event => [event.latitude, event.longitude]));
+            map.fitBounds(bounds.pad(0.1));
         }
     } else {
         // Fallback: Display events in a list
@@ -302,14 +377,47 @@ function createEventPopup(event) {
             <p><strong>Participants:</strong> ${event.participant_count} joined</p>
             ${event.description ? `<p><strong>Details:</strong> ${event.description}</p>` : ''}
             <div class="event-actions">
-                ${currentUser ? `<button class="btn-small btn-participate" onclick="participateInEvent(${event.id})">Join/Leave</button>` : ''}
-                <button class="btn-small" onclick="editEvent(${event.id})">Edit</button>
-                <button class="btn-small btn-danger" onclick="deleteEvent(${event.id})">Delete</button>
+                ${currentUser ? `<button class="btn-small btn-participate" onclick="participateInEvent(${idArg(event.id)})">${participationLabel(event)}</button>` : ''}
+                ${isOccurrence(event) ? '' : `<button class="btn-small" onclick="editEvent(${event.id})">Edit</button>`}
+                <button class="btn-small btn-danger" onclick="deleteEvent(${idArg(event.id)})">Delete</button>
             </div>
         </div>
     `;
 }
 
+/**
+ * Whether an event is a series occurrence without its own event row
+ */
+function isOccurrence(event) {
+    return event.occurrence !== undefined;
+}
+
+/**
+ * Event id as a literal for inline onclick handlers (occurrence ids are strings)
+ */
+function idArg(id) {
+    return typeof id === 'string' ? `'${id}'` : id;
+}
+
+/**
+ * API URL of an event, or of a series occurrence
+ */
+function eventApiUrl(eventId) {
+    const event = currentEvents.find(e => e.id === eventId);
+    if (event && isOccurrence(event)) {
+        return `/api/series/${event.series_id}/occurrences/${encodeURIComponent(event.occurrence)}`;
+    }
+    return `/api/events/${eventId}`;
+}
+
+/**
+ * Label for the join/leave button of an event
+ */
+function participationLabel(event) {
+    if (event.participating === undefined) return 'Join/Leave';
+    return event.participating ? 'Leave' : 'Join';
+}
+
 /**
  * Create a new event
  */
@@ -467,7 +575,7 @@ async function deleteEvent(eventId) {
     }
     
     try {
-        const response = await fetch(`/api/events/${eventId}`, {
+        const response = await fetch(eventApiUrl(eventId), {
             method: 'DELETE'
         });
         
@@ -516,49 +624,81 @@ function switchView(view) {
 
 /**
  * Display events in list view
+ *
+ * The list is virtualized: a spacer gives the full scroll height and only
+ * the rows near the viewport are in the DOM.
  */
 function displayEventsInList(events) {
     const listContainer = document.getElementById('events-list');
+    listEvents = events;
+    listRange = null;
     
     if (events.length === 0) {
+        listContainer.classList.remove('virtual-list');
+        listContainer.style.height = '';
         listContainer.innerHTML = '<p class="no-events">No events to display. Create your first event!</p>';
         return;
     }
     
-    listContainer.innerHTML = events.map(event => {
-        const date = new Date(event.date);
-        const formattedDate = date.toLocaleString('en-US', {
-            month: 'short',
-            day: 'numeric',
-            year: 'numeric',
-            hour: '2-digit',
-            minute: '2-digit'
-        });
-        
-        const difficultyClass = `difficulty-${event.difficulty.toLowerCase()}`;
-        
-        return `
-            <div class="event-card">
-                <div class="event-header">
-                    <h3>${event.sport}</h3>
-                    <div class="event-author">By ${event.author}</div>
-                </div>
-                <p><strong>📍 ${event.place}</strong></p>
-                <p>🗓️ ${formattedDate}</p>
-                ${event.description ? `<p>${event.description}</p>` : ''}
-                <div class="event-meta">
-                    <span class="event-difficulty ${difficultyClass}">${event.difficulty}</span>
-                    <span class="participant-badge">👥 ${event.participant_count} joined</span>
-                </div>
-                <div class="event-actions">
-                    ${currentUser ? `<button class="btn btn-success" onclick="participateInEvent(${event.id})">Join/Leave Event</button>` : ''}
-                    <button class="btn btn-primary" onclick="editEvent(${event.id})">Edit</button>
-                    <button class="btn btn-secondary" onclick="deleteEvent(${event.id})">Delete</button>
-                    ${useLeaflet ? `<button class="btn btn-primary" onclick="showOnMap(${event.latitude}, ${event.longitude})">Show on Map</button>` : ''}
-                </div>
+    listContainer.classList.add('virtual-list');
+    listContainer.style.height = `${events.length * LIST_ROW_HEIGHT}px`;
+    renderVisibleRows();
+}
+
+/**
+ * Render the list rows currently inside the scroll viewport
+ */
+function renderVisibleRows() {
+    if (currentView !== 'list' || listEvents.length === 0) return;
+    
+    const viewport = document.getElementById('list-view');
+    const range = visibleRange(viewport.scrollTop, viewport.clientHeight,
+                               LIST_ROW_HEIGHT, listEvents.length, LIST_OVERSCAN);
+    if (listRange && listRange.start === range.start && listRange.end === range.end) return;
+    listRange = range;
+    
+    document.getElementById('events-list').innerHTML = listEvents
+        .slice(range.start, range.end)
+        .map((event, offset) => createEventCard(event, (range.start + offset) * LIST_ROW_HEIGHT))
+        .join('');
+}
+
+/**
+ * Create list card markup for an event
+ */
+function createEventCard(event, top) {
+    const date = new Date(event.date);
+    const formattedDate = date.toLocaleString('en-US', {
+        month: 'short',
+        day: 'numeric',
+        year: 'numeric',
+        hour: '2-digit',
+        minute: '2-digit'
+    });
+    
+    const difficultyClass = `difficulty-${event.difficulty.toLowerCase()}`;
+    
+    return `
+        <div class="event-card virtual-row" style="top: ${top}px; height: ${LIST_ROW_HEIGHT - 16}px;">
+            <div class="event-header">
+                <h3>${event.sport}</h3>
+                <div class="event-author">By ${event.author}</div>
+            </div>
+            <p><strong>📍 ${event.place}</strong></p>
+            <p>🗓️ ${formattedDate}</p>
+            ${event.description ? `<p class="event-description">${event.description}</p>` : ''}
+            <div class="event-meta">
+                <span class="event-difficulty ${difficultyClass}">${event.difficulty}</span>
+                <span class="participant-badge">👥 ${event.participant_count} joined</span>
             </div>
-        `;
-    }).join('');
+            <div class="event-actions">
+                ${currentUser ? `<button class="btn btn-success" onclick="participateInEvent(${idArg(event.id)})">${participationLabel(event)} Event</button>` : ''}
+                ${isOccurrence(event) ? '' : `<button class="btn btn-primary" onclick="editEvent(${event.id})">Edit</button>`}
+                <button class="btn btn-secondary" onclick="deleteEvent(${idArg(event.id)})">Delete</button>
+                ${useLeaflet ? `<button class="btn btn-primary" onclick="showOnMap(${event.latitude}, ${event.longitude})">Show on Map</button>` : ''}
+            </div>
+        </div>
+    `;
 }
 
 /**
@@ -821,7 +961,7 @@ async function participateInEvent(eventId) {
     }
     
     try {
-        const response = await fetch(`/api/events/${eventId}/participate`, {
+        const response = await fetch(`${eventApiUrl(eventId)}/participate`, {
             method: 'POST'
         });
         
@@ -0,0 +1,65 @@
+#!/usr/bin/env node
+/**
+ * Benchmark for the events page marker diff
+ *
+ * Runs diffMarkers from app/static/js/events-core.js on synthetic reloads and
+ * reports its cost together with the number of marker operations applied,
+ * compared with removing and recreating every marker.
+ *
+ * Usage: node benchmarks/bench_marker_diff.js [event_count]
+ */
+const path = require('path');
+const { diffMarkers, visibleRange } = require(path.join(__dirname, '..', 'app', 'static', 'js', 'events-core.js'));
+
+const count = parseInt(process.argv[2] || '5000', 10);
+
+function makeEvents(n, offset = 0) {
+    const events = [];
+    for (let i = 0; i < n; i++) {
+        const id = i + offset;
+        events.push({ id, latitude: 40.7 + (id % 100) / 1000, longitude: -74.0 + (id % 97) / 1000 });
+    }
+    return events;
+}
+
+function keyed(events) {
+    return new Map(events.map(event => [event.id, event]));
+}
+
+function measure(label, current, next, repeat = 50) {
+    let best = Infinity;
+    let changes;
+    for (let i = 0; i < repeat; i++) {
+        const started = process.hrtime.bigint();
+        changes = diffMarkers(current, next);
+        const elapsed = Number(process.hrtime.bigint() - started) / 1e6;
+        best = Math.min(best, elapsed);
+    }
+    const operations = changes.added.length + changes.removed.length + changes.moved.length;
+    const rebuild = current.size + next.length;
+    console.log(`${label.padEnd(32)} ${best.toFixed(3).padStart(8)} ms` +
+                `   marker ops ${String(operations).padStart(6)} (full rebuild ${rebuild})`);
+}
+
+const base = makeEvents(count);
+const current = keyed(base);
+
+// 1% of events moved, 1% removed and 1% new
+const changed = base.slice(Math.floor(count / 100)).map((event, i) =>
+    i % 100 === 0 ? { ...event, latitude: event.latitude + 0.01 } : event
+).concat(makeEvents(Math.floor(count / 100), count));
+
+console.log(`Diffing ${count} markers`);
+measure('unchanged reload', current, base.map(event => ({ ...event })));
+measure('1% moved/removed/added', current, changed);
+measure('filter to 10%', current, base.filter(event => event.id % 10 === 0));
+measure('completely new set', current, makeEvents(count, count));
+
+let best = Infinity;
+for (let i = 0; i < 1000; i++) {
+    const started = process.hrtime.bigint();
+    visibleRange(i * 37, 800, 300, count, 4);
+    best = Math.min(best, Number(process.hrtime.bigint() - started) / 1e6);
+}
+console.log(`${'visible list range'.padEnd(32)} ${best.toFixed(4).padStart(8)} ms` +
+            `   rows in DOM ${visibleRange(0, 800, 300, count, 4).end} of ${count}`);
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark for "events near me" queries
+
+Compares the in-memory spatial index against SQL-only approaches on a
+SQLite table: ordering every row by an equirectangular distance, and the
+same ordering restricted to an indexed bounding box.
+
+Usage: python benchmarks/bench_nearby.py [event_count]
+"""
+import math
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.backend.spatial import SpatialIndex, KM_PER_DEGREE
+
+K = 20
+RADIUS_KM = 5
+QUERIES = 50
+
+
+def generate(count, seed=1):
+    """Events spread around 20 metropolitan areas"""
+    rng = np.random.default_rng(seed)
+    centers = np.column_stack((rng.uniform(-50, 60, 20), rng.uniform(-120, 140, 20)))
+    picks = centers[rng.integers(0, len(centers), count)]
+    lats = picks[:, 0] + rng.normal(0, 0.3, count)
+    lngs = picks[:, 1] + rng.normal(0, 0.3, count)
+    return lats, lngs, centers
+
+
+def timed(label, func, queries):
+    """Average time per query in ms"""
+    started = time.perf_counter()
+    for lat, lng in queries:
+        func(lat, lng)
+    elapsed = (time.perf_counter() - started) / len(queries)
+    print(f'{label:<44} {elapsed * 1e3:9.3f} ms/query')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    lats, lngs, centers = generate(count)
+    rng = np.random.default_rng(2)
+    queries = [(float(c[0] + rng.normal(0, 0.2)), float(c[1] + rng.normal(0, 0.2)))
+               for c in centers[rng.integers(0, len(centers), QUERIES)]]
+    print(f'{count} events, k={K}, radius={RADIUS_KM} km, {QUERIES} queries')
+
+    # Spatial index
+    rows = [(i, float(lats[i]), float(lngs[i]), None) for i in range(count)]
+    started = time.perf_counter()
+    index = SpatialIndex(loader=lambda: rows)
+    index.ensure_loaded()
+    print(f'{"spatial index build":<44} {(time.perf_counter() - started):9.3f} s')
+    timed('spatial index k-nearest', lambda lat, lng: index.nearest(lat, lng, K), queries)
+    timed('spatial index radius', lambda lat, lng: index.within(lat, lng, RADIUS_KM), queries)
+    started = time.perf_counter()
+    for i in range(1000):
+        index.upsert(count + i, float(lats[i]), float(lngs[i]))
+    print(f'{"spatial index upsert":<44} {(time.perf_counter() - started):9.3f} ms/write')
+
+    # SQL only
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE events (id INTEGER PRIMARY KEY, latitude REAL, longitude REAL)')
+    conn.executemany('INSERT INTO events VALUES (?, ?, ?)',
+                     ((i, float(lats[i]), float(lngs[i])) for i in range(count)))
+    conn.execute('CREATE INDEX ix_events_lat_lng ON events (latitude, longitude)')
+
+    def sql_order_all(lat, lng):
+        scale = math.cos(math.radians(lat)) ** 2
+        return conn.execute(
+            'SELECT id FROM events ORDER BY (latitude - ?) * (latitude - ?)'
+            ' + (longitude - ?) * (longitude - ?) * ? LIMIT ?',
+            (lat, lat, lng, lng, scale, K)).fetchall()
+
+    def sql_bounding_box(lat, lng):
+        dlat = RADIUS_KM / KM_PER_DEGREE
+        dlng = dlat / math.cos(math.radians(lat))
+        scale = math.cos(math.radians(lat)) ** 2
+        return conn.execute(
+            'SELECT id FROM events WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?'
+            ' ORDER BY (latitude - ?) * (latitude - ?) + (longitude - ?) * (longitude - ?) * ?',
+            (lat - dlat, lat + dlat, lng - dlng, lng + dlng, lat, lat, lng, lng, scale)).fetchall()
+
+    timed('SQL k-nearest (full scan ORDER BY)', sql_order_all, queries[:5])
+    timed('SQL radius (indexed bounding box)', sql_bounding_box, queries)
+
+
+if __name__ == '__main__':
+    main()
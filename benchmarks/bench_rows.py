@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark for event list row loading
+
+Measures time and retained memory per 1,000 rows for full Event ORM
+instances (identity map, change tracking) against the Core rows used by the
+list endpoints.
+
+Usage: python benchmarks/bench_rows.py [event_count]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from common import app, db, Event, seed_events
+from app.backend.queries import fetch_event_rows
+
+
+def measure(label, count, func):
+    """Report load time and memory retained by the loaded rows"""
+    db.session.expunge_all()
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = func()
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(rows) == count
+    per_1k = 1000 / count
+    print(f'{label:<28} {elapsed * 1e3 * per_1k:8.2f} ms/1k rows'
+          f' {retained * per_1k / 1024:10.1f} KiB/1k retained'
+          f' {peak * per_1k / 1024:10.1f} KiB/1k peak')
+    return rows
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    with app.app_context():
+        db.create_all()
+        seed_events(count)
+
+        print(f'Loading {count} events')
+        measure('ORM instances', count, lambda: Event.query.all())
+        measure('ORM + to_dict()', count, lambda: [e.to_dict() for e in Event.query.all()])
+        measure('Core rows', count, fetch_event_rows)
+
+
+if __name__ == '__main__':
+    main()
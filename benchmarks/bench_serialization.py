@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for event list serialization
+
+Compares the per-event cost of the ORM path (Event instances + to_dict() +
+stdlib json) against result tuples encoded with the precompiled row encoder
+and serialized by the application's JSON provider.
+
+Usage: python benchmarks/bench_serialization.py [event_count]
+"""
+import json
+import sys
+import time
+
+from common import app, db, Event, seed_events
+from app.backend.queries import fetch_event_rows
+from app.backend.serialization import encode_event_row, encode_rows
+
+
+def measure(label, count, func, repeat=3):
+    """Run func a few times and report the best per-event cost"""
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'{label:<40} {best * 1e6 / count:8.2f} us/event')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with app.app_context():
+        db.create_all()
+        seed_events(count)
+        rows = fetch_event_rows()
+
+        print(f'Serializing {count} events (JSON backend: {app.json.backend})')
+        measure('ORM query + to_dict() + json.dumps', count,
+                lambda: json.dumps([e.to_dict() for e in Event.query.all()]))
+        measure('Core rows + encoder + provider', count,
+                lambda: app.json.dumps(encode_rows(encode_event_row, fetch_event_rows())))
+        measure('encode only (preloaded rows)', count,
+                lambda: encode_rows(encode_event_row, rows))
+        measure('encode + provider (preloaded rows)', count,
+                lambda: app.json.dumps(encode_rows(encode_event_row, rows)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Shared setup for the benchmark scripts
+
+Importing this module points the application at a throwaway in-memory
+database, so it must be imported before anything from ``app``.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+os.environ['DATABASE_URL'] = 'sqlite://'
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.backend.app import app
+from app.backend.models import db, Event, User, Sport, Place, Difficulty, interner
+
+
+def seed_events(count):
+    """Insert benchmark events authored by a single user"""
+    user = User(username='bench', email='bench@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    start = datetime(2030, 1, 1, 18, 0)
+    conn = db.session.connection()
+    sport_id = interner.intern_many(conn, Sport, ['Football'])['Football']
+    difficulty_id = interner.intern_many(conn, Difficulty, ['Intermediate'])['Intermediate']
+    place_ids = interner.intern_many(conn, Place, [f'Park {i}' for i in range(50)])
+    db.session.bulk_insert_mappings(Event, [
+        {
+            'sport_id': sport_id,
+            'date': start + timedelta(hours=i),
+            'place_id': place_ids[f'Park {i % 50}'],
+            'difficulty_id': difficulty_id,
+            'latitude': 40.7 + (i % 100) / 1000,
+            'longitude': -74.0 + (i % 100) / 1000,
+            'description': 'Benchmark event',
+            'created_at': start,
+            'author_id': user.id,
+        }
+        for i in range(count)
+    ])
+    db.session.commit()
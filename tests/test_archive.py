@@ -0,0 +1,241 @@
+"""
+Tests for the archive of past events in Srazy web application
+"""
+import sys
+import os
+import json
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, select, func, text
+
+from app.backend.app import app, archive_past_events, task_queue
+from app.backend.models import db, Event, SeriesOccurrence, events_archive, event_participants_archive
+from app.backend.migrations import migrate_autoincrement, needs_autoincrement_migration
+
+def setup_test_db():
+    """Setup test database"""
+    with app.app_context():
+        db.create_all()
+
+def teardown_test_db():
+    """Teardown test database"""
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+def create_event(client, place, days):
+    """Create an event some days from now and return its id"""
+    event_data = {
+        'sport': 'Cycling',
+        'date': (datetime.now() + timedelta(days=days)).isoformat(),
+        'place': place,
+        'difficulty': 'Intermediate',
+        'latitude': 40.7,
+        'longitude': -74.0
+    }
+    response = client.post('/api/events',
+                           data=json.dumps(event_data),
+                           content_type='application/json')
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+def count_rows(table):
+    """Number of rows in a table"""
+    return db.session.execute(select(func.count()).select_from(table)).scalar()
+
+def test_archive_past_events():
+    """Test moving past events and their participants to the archive"""
+    setup_test_db()
+    batch_size = app.config['ARCHIVE_BATCH_SIZE']
+    app.config['ARCHIVE_BATCH_SIZE'] = 2
+    try:
+        with app.test_client() as client:
+            client.post('/api/users/register',
+                        data=json.dumps({'username': 'archivist', 'email': 'archivist@example.com',
+                                         'password': 'password123'}),
+                        content_type='application/json')
+            old_ids = [create_event(client, f'Old Road {i}', -60 - i) for i in range(3)]
+            recent_id = create_event(client, 'Recent Road', -2)
+            upcoming_id = create_event(client, 'Upcoming Road', 5)
+            client.post(f'/api/events/{old_ids[0]}/participate')
+
+            with app.app_context():
+                assert archive_past_events() == 3
+                assert archive_past_events() == 0
+                assert Event.query.count() == 2
+                assert count_rows(events_archive) == 3
+                assert count_rows(event_participants_archive) == 1
+            task_queue.join()
+
+            # Upcoming events by default
+            events = client.get('/api/events').get_json()
+            assert [event['id'] for event in events] == [upcoming_id]
+
+            # include_past adds recent and archived events
+            events = client.get('/api/events?include_past=true&include_participation=true').get_json()
+            assert sorted(event['id'] for event in events) == sorted([*old_ids, recent_id, upcoming_id])
+            archived = next(event for event in events if event['id'] == old_ids[0])
+            assert archived['place'] == 'Old Road 0'
+            assert archived['participant_count'] == 1
+            assert archived['participating'] is True
+
+            # So does a date_from before the archive horizon
+            date_from = (datetime.now() - timedelta(days=61)).date().isoformat()
+            events = client.get(f'/api/events?date_from={date_from}&place=Old').get_json()
+            assert sorted(event['id'] for event in events) == sorted(old_ids[:2])
+
+            # Dates with a UTC offset are accepted
+            response = client.get('/api/events?date_from=2020-01-01T00:00:00%2B00:00&place=Old')
+            assert response.status_code == 200
+            assert len(response.get_json()) == 3
+
+            # Archived events can still be read, and are still listed as joined
+            response = client.get(f'/api/events/{old_ids[0]}')
+            assert response.status_code == 200
+            assert response.get_json()['place'] == 'Old Road 0'
+            assert client.get('/api/events/9999').status_code == 404
+            client.post(f'/api/events/{upcoming_id}/participate')
+            joined = client.get('/api/users/current/events?limit=1').get_json()
+            assert [event['id'] for event in joined['events']] == [old_ids[0]]
+            joined = client.get(f"/api/users/current/events?limit=1&cursor={joined['next_cursor']}").get_json()
+            assert [event['id'] for event in joined['events']] == [upcoming_id]
+
+            # Archived events leave the spatial index
+            events = client.get('/api/events/nearby?lat=40.7&lng=-74.0&include_past=true').get_json()
+            assert sorted(event['id'] for event in events) == sorted([recent_id, upcoming_id])
+    finally:
+        app.config['ARCHIVE_BATCH_SIZE'] = batch_size
+        teardown_test_db()
+
+def test_archived_ids_not_reused():
+    """Test that the id of an archived newest event is not handed out again"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            upcoming_id = create_event(client, 'Upcoming Road', 5)
+            old_id = create_event(client, 'Old Road', -60)
+            with app.app_context():
+                assert archive_past_events() == 1
+
+            newer_id = create_event(client, 'Older Road', -61)
+            assert newer_id not in (upcoming_id, old_id)
+            events = client.get('/api/events?include_past=true').get_json()
+            assert sorted(event['id'] for event in events) == sorted([upcoming_id, old_id, newer_id])
+
+            with app.app_context():
+                assert archive_past_events() == 1
+            task_queue.join()
+    finally:
+        teardown_test_db()
+
+def test_migrate_autoincrement(tmp_path):
+    """Test rebuilding an events table that may reuse ids"""
+    engine = create_engine(f'sqlite:///{tmp_path / "old.db"}')
+    events = Event.__table__
+    with engine.begin() as conn:
+        events_archive.create(conn)
+        conn.execute(text(
+            'CREATE TABLE events (id INTEGER PRIMARY KEY, sport_id INTEGER NOT NULL, '
+            'date DATETIME NOT NULL, place_id INTEGER NOT NULL, difficulty_id INTEGER NOT NULL, '
+            'latitude FLOAT NOT NULL, longitude FLOAT NOT NULL, description TEXT, '
+            'created_at DATETIME, author_id INTEGER)'))
+        conn.execute(text("INSERT INTO events VALUES (3, 1, '2030-01-01 18:00:00.000000', 1, 1, "
+                          "40.7, -74.0, NULL, NULL, NULL)"))
+        conn.execute(events_archive.insert().values(
+            id=7, sport_id=1, date=datetime(2020, 1, 1), place_id=1, difficulty_id=1,
+            latitude=40.7, longitude=-74.0, archived_at=datetime(2020, 2, 1)))
+
+    assert needs_autoincrement_migration(engine, events)
+    assert migrate_autoincrement(engine, events, id_tables=(events_archive,)) == 1
+    assert not needs_autoincrement_migration(engine, events)
+    assert 'events_migrating' not in db.metadata.tables
+
+    with engine.begin() as conn:
+        new_id = conn.execute(events.insert().values(
+            sport_id=1, date=datetime(2030, 2, 1), place_id=1, difficulty_id=1,
+            latitude=40.7, longitude=-74.0)).inserted_primary_key[0]
+        assert new_id == 8
+        assert conn.execute(select(events.c.date).where(events.c.id == 3)).scalar().year == 2030
+    engine.dispose()
+
+def test_archived_series_occurrence():
+    """Test that an archived occurrence is not expanded again"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            start = (datetime.now() - timedelta(weeks=10)).replace(hour=18, minute=0, second=0, microsecond=0)
+            series = client.post('/api/series', data=json.dumps({
+                'sport': 'Running',
+                'start': start.isoformat(),
+                'place': 'Central Park',
+                'difficulty': 'Beginner',
+                'latitude': 40.785091,
+                'longitude': -73.968285,
+                'frequency': 'weekly',
+                'count': 2
+            }), content_type='application/json').get_json()
+            occurrence_url = f"/api/series/{series['id']}/occurrences/{start.isoformat()}"
+            response = client.put(occurrence_url,
+                                  data=json.dumps({'description': 'Bring water'}),
+                                  content_type='application/json')
+            assert response.status_code == 200
+
+            with app.app_context():
+                assert archive_past_events() == 1
+                assert SeriesOccurrence.query.count() == 0
+            task_queue.join()
+
+            window = f"date_from={start.date().isoformat()}&date_to={(start + timedelta(weeks=2)).isoformat()}"
+            events = client.get(f'/api/events?{window}').get_json()
+            assert len(events) == 2
+            assert events[0]['description'] == 'Bring water'
+            assert events[1]['series_id'] == series['id']
+
+            # The archived occurrence cannot be materialized again
+            response = client.put(occurrence_url,
+                                  data=json.dumps({'description': 'Again'}),
+                                  content_type='application/json')
+            assert response.status_code == 400
+
+            assert client.delete(f"/api/series/{series['id']}").status_code == 200
+    finally:
+        teardown_test_db()
+
+def test_archive_command():
+    """Test the archive-events command"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            create_event(client, 'Old Road', -90)
+        result = app.test_cli_runner().invoke(args=['archive-events'])
+        assert 'Archived 1 events' in result.output
+        task_queue.join()
+    finally:
+        teardown_test_db()
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    print("Running archive tests...")
+
+    test_archive_past_events()
+    print("✓ Archive test passed")
+
+    test_archived_ids_not_reused()
+    print("✓ Archived ids test passed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_migrate_autoincrement(Path(tmp))
+    print("✓ Autoincrement migration test passed")
+
+    test_archived_series_occurrence()
+    print("✓ Archived series occurrence test passed")
+
+    test_archive_command()
+    print("✓ Archive command test passed")
+
+    print("\nAll archive tests passed! ✓")
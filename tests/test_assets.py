@@ -0,0 +1,131 @@
+"""
+Tests for static asset fingerprinting in Srazy web application
+"""
+import sys
+import os
+import gzip
+import re
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.backend.app import app
+from app.backend.models import db
+from app.backend.assets import AssetManifest, IMMUTABLE_CACHE_CONTROL, hashed_name
+
+def static_urls(html):
+    """Static URLs referenced by a rendered page"""
+    return re.findall(r'(?:href|src)="(/static/[^"]+)"', html)
+
+def test_hashed_name():
+    """Test inserting a digest before the extension"""
+    assert hashed_name('css/style.css', 'abc123') == 'css/style.abc123.css'
+    assert hashed_name('vendor/leaflet/leaflet.js', 'f00') == 'vendor/leaflet/leaflet.f00.js'
+
+def test_templates_use_fingerprinted_urls():
+    """Test that url_for('static', ...) produces fingerprinted names"""
+    with app.app_context():
+        db.create_all()
+    try:
+        with app.test_client() as client:
+            urls = static_urls(client.get('/events').get_data(as_text=True))
+            assert any(re.match(r'/static/js/events\.[0-9a-f]{12}\.js$', url) for url in urls)
+            assert any(re.match(r'/static/vendor/leaflet/leaflet\.[0-9a-f]{12}\.js$', url) for url in urls)
+            assert not any('unpkg.com' in url for url in urls)
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+def test_fingerprinted_file_caching():
+    """Test immutable caching and precompressed responses"""
+    manifest = app.extensions['asset_manifest']
+    url = '/static/' + manifest.fingerprinted('css/style.css')
+    with open(os.path.join(app.static_folder, 'css', 'style.css'), 'rb') as f:
+        original = f.read()
+
+    with app.test_client() as client:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+        assert response.mimetype == 'text/css'
+        assert response.data == original
+
+        response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert gzip.decompress(response.data) == original
+
+        # Unknown digests and unhashed names are not served as immutable
+        assert client.get('/static/css/style.000000000000.css').status_code == 404
+        response = client.get('/static/css/style.css')
+        assert response.status_code == 200
+        assert 'immutable' not in response.headers.get('Cache-Control', '')
+        response.close()
+
+def test_manifest_refresh(tmp_path):
+    """Test rehashing a changed file"""
+    (tmp_path / 'app.js').write_text('one')
+    manifest = AssetManifest(str(tmp_path)).build()
+    first = manifest.fingerprinted('app.js')
+    assert manifest.source(first) == 'app.js'
+    assert manifest.precompress() >= 1
+
+    (tmp_path / 'app.js').write_text('two')
+    os.utime(tmp_path / 'app.js', (1, 1))
+    manifest.refresh('app.js')
+    second = manifest.fingerprinted('app.js')
+    assert second != first
+    assert manifest.source(first) is None
+
+    # Siblings of the old content are not served
+    assert not (tmp_path / 'app.js.gz').exists()
+    assert manifest.precompress() >= 1
+    assert gzip.decompress((tmp_path / 'app.js.gz').read_bytes()) == b'two'
+
+def test_manifest_load(tmp_path):
+    """Test using a saved manifest unless files changed after it was written"""
+    (tmp_path / 'app.js').write_text('one')
+    manifest_path = str(tmp_path / 'manifest.json')
+    AssetManifest(str(tmp_path)).build().write(manifest_path)
+    os.utime(tmp_path / 'app.js', (1, 1))
+
+    manifest = AssetManifest(str(tmp_path))
+    assert manifest.load(manifest_path)
+    assert manifest.source(manifest.fingerprinted('app.js')) == 'app.js'
+
+    os.utime(tmp_path / 'app.js')
+    os.utime(manifest_path, (1, 1))
+    assert not AssetManifest(str(tmp_path)).load(manifest_path)
+
+    os.utime(manifest_path)
+    (tmp_path / 'new.css').write_text('body {}')
+    os.utime(tmp_path / 'new.css', (1, 1))
+    assert not AssetManifest(str(tmp_path)).load(manifest_path)
+    assert not AssetManifest(str(tmp_path)).load(str(tmp_path / 'missing.json'))
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    print("Running asset tests...")
+
+    test_hashed_name()
+    print("✓ Hashed name test passed")
+
+    test_templates_use_fingerprinted_urls()
+    print("✓ Fingerprinted URL test passed")
+
+    test_fingerprinted_file_caching()
+    print("✓ Fingerprinted file caching test passed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_manifest_refresh(Path(tmp))
+    print("✓ Manifest refresh test passed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_manifest_load(Path(tmp))
+    print("✓ Manifest load test passed")
+
+    print("\nAll asset tests passed! ✓")
@@ -11,6 +11,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from app.backend.app import app
 from app.backend.models import db, Event
+from app.backend.queries import fetch_event_rows
 
 def setup_test_db():
     """Setup test database"""
@@ -25,9 +26,13 @@ def teardown_test_db():
 
 def test_events_page():
     """Test the events page route"""
-    with app.test_client() as client:
-        response = client.get('/events')
-        assert response.status_code == 200
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            response = client.get('/events')
+            assert response.status_code == 200
+    finally:
+        teardown_test_db()
 
 def test_get_events_empty():
     """Test getting events when database is empty"""
@@ -234,6 +239,29 @@ def test_delete_event():
     finally:
         teardown_test_db()
 
+def test_event_rows_bypass_identity_map():
+    """Test that list queries return plain rows without loading ORM instances"""
+    setup_test_db()
+    try:
+        with app.app_context():
+            event = Event(sport='Cycling', date=datetime.now() + timedelta(days=2),
+                          place='River Road', difficulty='Advanced',
+                          latitude=40.7, longitude=-74.0)
+            db.session.add(event)
+            db.session.commit()
+            db.session.expunge_all()
+            
+            rows = fetch_event_rows(sport='Cycling')
+            assert len(rows) == 1
+            assert rows[0].place == 'River Road'
+            assert rows[0].author is None
+            assert rows[0].participant_count == 0
+            assert len(db.session.identity_map) == 0
+            
+            assert fetch_event_rows(sport='Tennis') == []
+    finally:
+        teardown_test_db()
+
 if __name__ == '__main__':
     print("Running event tests...")
     
@@ -261,4 +289,7 @@ if __name__ == '__main__':
     test_delete_event()
     print("✓ Delete event test passed")
     
+    test_event_rows_bypass_identity_map()
+    print("✓ Event rows identity map test passed")
+    
     print("\nAll event tests passed! ✓")
@@ -0,0 +1,145 @@
+"""
+Tests for the initial events payload and page caching in Srazy web application
+"""
+import sys
+import os
+import json
+import re
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.backend.app import app, data_versions
+from app.backend.models import db, Event
+from app.backend.fragments import FragmentCache
+
+def setup_test_db():
+    """Setup test database"""
+    with app.app_context():
+        db.create_all()
+
+def teardown_test_db():
+    """Teardown test database"""
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+def create_event(client, place, days):
+    """Create an event some days from now"""
+    event_data = {
+        'sport': 'Tennis',
+        'date': (datetime.now() + timedelta(days=days)).isoformat(),
+        'place': place,
+        'difficulty': 'Intermediate',
+        'latitude': 40.7,
+        'longitude': -74.0,
+        'description': 'Bring a racket'
+    }
+    response = client.post('/api/events',
+                           data=json.dumps(event_data),
+                           content_type='application/json')
+    assert response.status_code == 201
+    return response.get_json()
+
+def embedded_events(client):
+    """The events embedded in the events page"""
+    html = client.get('/events').get_data(as_text=True)
+    match = re.search(r'<script type="application/json" id="initial-events">(.*?)</script>', html, re.S)
+    return json.loads(match.group(1))
+
+def test_fragment_cache():
+    """Test caching and disabling the fragment cache"""
+    renders = []
+    def render():
+        renders.append(1)
+        return '<p>page</p>'
+
+    cache = FragmentCache(ttl=60)
+    assert cache.render(('page', 'v1'), render) == '<p>page</p>'
+    assert cache.render(('page', 'v1'), render) == '<p>page</p>'
+    assert len(renders) == 1
+    cache.render(('page', 'v2'), render)
+    assert len(renders) == 2
+
+    disabled = FragmentCache(ttl=0)
+    disabled.render('page', render)
+    disabled.render('page', render)
+    assert len(renders) == 4
+
+def test_initial_events_payload():
+    """Test that the events page embeds upcoming events in compact form"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            assert embedded_events(client) == []
+
+            create_event(client, 'Later Court', 2)
+            create_event(client, 'Soon Court', 1)
+            create_event(client, 'Past Court', -1)
+
+            events = embedded_events(client)
+            assert [event['place'] for event in events] == ['Soon Court', 'Later Court']
+            assert 'description' not in events[0]
+            assert events[0]['participant_count'] == 0
+    finally:
+        teardown_test_db()
+
+def test_data_version_changes_on_write():
+    """Test that writes change the events version and refresh the page"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            event = create_event(client, 'First Court', 1)
+            with app.app_context():
+                version = data_versions.get('events')
+            assert version is not None
+            assert len(embedded_events(client)) == 1
+
+            # Rolled back writes keep the version
+            with app.app_context():
+                db.session.get(Event, event['id']).place = 'Moved Court'
+                db.session.flush()
+                db.session.rollback()
+                assert data_versions.get('events') == version
+
+                # Versions change once the write commits, outside its transaction
+                db.session.get(Event, event['id']).place = 'Moved Court'
+                db.session.flush()
+                assert data_versions.get('events') == version
+                db.session.commit()
+                assert data_versions.get('events') != version
+                version = data_versions.get('events')
+
+            # Participation is written with Core statements and bumps explicitly
+            client.post('/api/users/register',
+                        data=json.dumps({'username': 'player', 'email': 'player@example.com',
+                                         'password': 'testpass123'}),
+                        content_type='application/json')
+            with app.app_context():
+                version = data_versions.get('events')
+            client.post(f"/api/events/{event['id']}/participate")
+            with app.app_context():
+                assert data_versions.get('events') != version
+            assert embedded_events(client)[0]['participant_count'] == 1
+
+            client.put(f"/api/events/{event['id']}",
+                       data=json.dumps({'place': 'Renamed Court'}),
+                       content_type='application/json')
+            assert embedded_events(client)[0]['place'] == 'Renamed Court'
+    finally:
+        teardown_test_db()
+
+if __name__ == '__main__':
+    print("Running page caching tests...")
+
+    test_fragment_cache()
+    print("✓ Fragment cache test passed")
+
+    test_initial_events_payload()
+    print("✓ Initial events payload test passed")
+
+    test_data_version_changes_on_write()
+    print("✓ Data version test passed")
+
+    print("\nAll page caching tests passed! ✓")
@@ -0,0 +1,256 @@
+"""
+Tests for sport, difficulty and place lookup tables in Srazy web application
+"""
+import sys
+import os
+import json
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text, select
+
+from app.backend.app import app
+from app.backend.models import db, Event, Sport, Place, Difficulty, interner
+from app.backend.lookups import normalize
+from app.backend.migrations import UNKNOWN_NAME, migrate_lookup_columns, needs_lookup_migration
+
+def setup_test_db():
+    """Setup test database"""
+    with app.app_context():
+        db.create_all()
+
+def teardown_test_db():
+    """Teardown test database"""
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+def create_event(client, sport, place, difficulty='Beginner'):
+    """Create an event and return it"""
+    event_data = {
+        'sport': sport,
+        'date': '2030-05-01T18:00:00',
+        'place': place,
+        'difficulty': difficulty,
+        'latitude': 40.7,
+        'longitude': -74.0
+    }
+    response = client.post('/api/events',
+                           data=json.dumps(event_data),
+                           content_type='application/json')
+    assert response.status_code == 201
+    return response.get_json()
+
+def test_normalize():
+    """Test the matching key of names"""
+    assert normalize('  Central   Park ') == 'central park'
+    assert normalize('FOOTBALL') == normalize('football')
+
+def test_interning():
+    """Test that near-duplicate names share one lookup row"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            first = create_event(client, 'Football', 'Central Park')
+            second = create_event(client, ' football', 'central  park')
+            assert second['sport'] == 'Football'
+            assert second['place'] == 'Central Park'
+
+            with app.app_context():
+                assert Sport.query.count() == 1
+                assert Place.query.count() == 1
+                assert db.session.get(Event, first['id']).sport_id == db.session.get(Event, second['id']).sport_id
+
+            # Filters match the shared row
+            events = client.get('/api/events?sport=FOOTBALL').get_json()
+            assert len(events) == 2
+            assert client.get('/api/events?sport=Curling').get_json() == []
+            assert len(client.get('/api/events?place=central').get_json()) == 2
+
+            # Renaming an event's sport interns the new name
+            client.put(f"/api/events/{first['id']}",
+                       data=json.dumps({'sport': 'Tennis'}),
+                       content_type='application/json')
+            assert len(client.get('/api/events?sport=tennis').get_json()) == 1
+    finally:
+        teardown_test_db()
+
+def test_rolled_back_names_not_cached():
+    """Test that ids of rolled back inserts are forgotten"""
+    setup_test_db()
+    try:
+        with app.app_context():
+            interner.intern_id(Sport, 'Padel')
+            db.session.rollback()
+            assert interner.lookup_id(Sport, 'Padel') is None
+            padel = interner.intern_id(Sport, 'Padel')
+            db.session.commit()
+            assert interner.lookup_id(Sport, 'padel') == padel
+    finally:
+        teardown_test_db()
+
+def test_concurrent_interning():
+    """Test that a name inserted by another transaction first is reused"""
+    setup_test_db()
+    try:
+        with app.app_context():
+            with db.engine.begin() as conn:
+                squash = interner.intern_many(conn, Sport, ['Squash'])['Squash']
+            # The first lookup misses, as if it ran before the other transaction committed
+            lookup_id = interner.lookup_id
+            calls = []
+            def stale_lookup(model, name):
+                calls.append(name)
+                return None if len(calls) == 1 else lookup_id(model, name)
+            interner.lookup_id = stale_lookup
+            assert interner.intern_id(Sport, 'squash') == squash
+            db.session.commit()
+            assert Sport.query.count() == 1
+    finally:
+        interner.__dict__.pop('lookup_id', None)
+        teardown_test_db()
+
+def test_sports_endpoint():
+    """Test the cacheable vocabulary endpoint"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            create_event(client, 'Tennis', 'Court 1', 'Advanced')
+            create_event(client, 'Basketball', 'Court 2', 'Beginner')
+
+            response = client.get('/api/sports')
+            assert response.status_code == 200
+            assert response.get_json() == {
+                'sports': ['Basketball', 'Tennis'],
+                'difficulties': ['Advanced', 'Beginner']
+            }
+            assert 'max-age' in response.headers['Cache-Control']
+
+            etag = response.headers['ETag']
+            response = client.get('/api/sports', headers={'If-None-Match': etag})
+            assert response.status_code == 304
+    finally:
+        teardown_test_db()
+
+def test_migrate_free_text_columns(tmp_path):
+    """Test converting an events table with free-text columns"""
+    engine = create_engine(f'sqlite:///{tmp_path / "old.db"}')
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE events (id INTEGER PRIMARY KEY, sport VARCHAR(100) NOT NULL, '
+            'date DATETIME NOT NULL, place VARCHAR(200) NOT NULL, difficulty VARCHAR(50) NOT NULL, '
+            'latitude FLOAT NOT NULL, longitude FLOAT NOT NULL, description TEXT, '
+            'created_at DATETIME, author_id INTEGER)'))
+        for i, (sport, place) in enumerate([('Football', 'Park'), ('football ', 'park'), ('Tennis', 'Court')]):
+            conn.execute(text(
+                "INSERT INTO events VALUES (:id, :sport, '2030-01-01 18:00:00.000000', :place, "
+                "'Beginner', 40.7, -74.0, 'Old event', '2029-12-01 10:00:00.000000', NULL)"
+            ), {'id': i + 5, 'sport': sport, 'place': place})
+
+    lookups = {'sport': Sport, 'place': Place, 'difficulty': Difficulty}
+    assert needs_lookup_migration(engine, Event.__table__)
+    assert migrate_lookup_columns(engine, Event.__table__, interner, lookups, batch_size=2) == 3
+    assert not needs_lookup_migration(engine, Event.__table__)
+    assert migrate_lookup_columns(engine, Event.__table__, interner, lookups) is None
+    assert 'events_migrating' not in db.metadata.tables
+
+    events = Event.__table__
+    sports = Sport.__table__
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(events.c.id, sports.c.name, events.c.date, events.c.place_id)
+            .join(sports, events.c.sport_id == sports.c.id).order_by(events.c.id)
+        ).all()
+        assert [(row.id, row.name) for row in rows] == [(5, 'Football'), (6, 'Football'), (7, 'Tennis')]
+        assert rows[0].place_id == rows[1].place_id
+        assert rows[0].date.year == 2030
+    engine.dispose()
+
+def test_migrate_in_place(tmp_path):
+    """Test converting free-text columns with ALTER TABLE, as on PostgreSQL"""
+    engine = create_engine(f'sqlite:///{tmp_path / "alter.db"}')
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE events (id INTEGER PRIMARY KEY, sport VARCHAR(100) NOT NULL, '
+            'date DATETIME NOT NULL, place VARCHAR(200) NOT NULL, difficulty VARCHAR(50) NOT NULL, '
+            'latitude FLOAT NOT NULL, longitude FLOAT NOT NULL, description TEXT, '
+            'created_at DATETIME, author_id INTEGER)'))
+        conn.execute(text('CREATE TABLE event_participants (user_id INTEGER, '
+                          'event_id INTEGER REFERENCES events (id))'))
+        for i, sport in enumerate(['Football', 'football', 'Tennis']):
+            conn.execute(text(
+                "INSERT INTO events VALUES (:id, :sport, '2030-01-01 18:00:00.000000', 'Park', "
+                "'Beginner', 40.7, -74.0, NULL, NULL, NULL)"
+            ), {'id': i + 1, 'sport': sport})
+
+    lookups = {'sport': Sport, 'place': Place, 'difficulty': Difficulty}
+    assert migrate_lookup_columns(engine, Event.__table__, interner, lookups,
+                                  batch_size=2, rebuild=False) == 3
+    assert not needs_lookup_migration(engine, Event.__table__)
+
+    events = Event.__table__
+    sports = Sport.__table__
+    with engine.connect() as conn:
+        names = conn.execute(
+            select(sports.c.name).join(events, events.c.sport_id == sports.c.id).order_by(events.c.id)
+        ).scalars().all()
+        assert names == ['Football', 'Football', 'Tennis']
+    engine.dispose()
+
+def test_migrate_blank_names(tmp_path):
+    """Test that blank free-text values get a placeholder lookup row"""
+    engine = create_engine(f'sqlite:///{tmp_path / "blank.db"}')
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE events (id INTEGER PRIMARY KEY, sport VARCHAR(100) NOT NULL, '
+            'date DATETIME NOT NULL, place VARCHAR(200) NOT NULL, difficulty VARCHAR(50) NOT NULL, '
+            'latitude FLOAT NOT NULL, longitude FLOAT NOT NULL, description TEXT, '
+            'created_at DATETIME, author_id INTEGER)'))
+        conn.execute(text(
+            "INSERT INTO events VALUES (1, 'Tennis', '2030-01-01 18:00:00.000000', '  ', '', "
+            "40.7, -74.0, NULL, NULL, NULL)"))
+
+    lookups = {'sport': Sport, 'place': Place, 'difficulty': Difficulty}
+    assert migrate_lookup_columns(engine, Event.__table__, interner, lookups) == 1
+    with engine.connect() as conn:
+        places = Place.__table__
+        name = conn.execute(select(places.c.name).join(
+            Event.__table__, Event.__table__.c.place_id == places.c.id)).scalar()
+        assert name == UNKNOWN_NAME
+    engine.dispose()
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    print("Running lookup table tests...")
+
+    test_normalize()
+    print("✓ Normalize test passed")
+
+    test_interning()
+    print("✓ Interning test passed")
+
+    test_rolled_back_names_not_cached()
+    print("✓ Rollback test passed")
+
+    test_concurrent_interning()
+    print("✓ Concurrent interning test passed")
+
+    test_sports_endpoint()
+    print("✓ Sports endpoint test passed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_migrate_free_text_columns(Path(tmp))
+    print("✓ Migration test passed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_migrate_in_place(Path(tmp))
+    print("✓ In-place migration test passed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_migrate_blank_names(Path(tmp))
+    print("✓ Blank names migration test passed")
+
+    print("\nAll lookup table tests passed! ✓")
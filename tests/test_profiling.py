@@ -0,0 +1,147 @@
+"""
+Tests for on-demand request profiling in Srazy web application
+"""
+import sys
+import os
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.backend.app import app, profiler
+from app.backend.models import db
+from app.backend.profiling import RequestProfile, StackSampler, flamegraph_svg
+
+TOKEN = 'test-profiling-token'
+
+def setup_test_db():
+    """Setup test database"""
+    with app.app_context():
+        db.create_all()
+
+def teardown_test_db():
+    """Teardown test database"""
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+def enable_profiling(interval=0.001):
+    """Turn profiling on; returns the previous settings"""
+    previous = (profiler.enabled, profiler.token, profiler.interval)
+    profiler.enabled, profiler.token, profiler.interval = True, TOKEN, interval
+    return previous
+
+def restore_profiling(previous):
+    """Restore profiling settings"""
+    profiler.enabled, profiler.token, profiler.interval = previous
+
+def test_flamegraph_svg():
+    """Test rendering collapsed stacks"""
+    svg = flamegraph_svg({'main;handler;query': 3, 'main;handler': 1, 'main;<render>': 2})
+    assert svg.startswith('<svg')
+    assert 'handler (4 samples)' in svg
+    assert '&lt;render&gt;' in svg
+
+def test_unauthorized_requests_not_profiled():
+    """Test that profiling needs the feature flag and the token"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            response = client.get('/api/events', headers={'X-Profile': TOKEN})
+            assert 'X-Profile-Id' not in response.headers
+
+            previous = enable_profiling()
+            try:
+                response = client.get('/api/events', headers={'X-Profile': 'wrong'})
+                assert 'X-Profile-Id' not in response.headers
+                assert client.get('/api/profiles/unknown', headers={'X-Profile': TOKEN}).status_code == 404
+            finally:
+                restore_profiling(previous)
+    finally:
+        teardown_test_db()
+
+def test_profile_request():
+    """Test profiling a request and reading back its results"""
+    setup_test_db()
+    previous = enable_profiling()
+    try:
+        with app.test_client() as client:
+            for i in range(3):
+                client.post('/api/events', data=json.dumps({
+                    'sport': 'Tennis',
+                    'date': (datetime.now() + timedelta(days=i + 1)).isoformat(),
+                    'place': f'Court {i}',
+                    'difficulty': 'Beginner',
+                    'latitude': 40.7,
+                    'longitude': -74.0
+                }), content_type='application/json')
+
+            response = client.get('/api/events?sport=Tennis&profile=' + TOKEN)
+            assert response.status_code == 200
+            assert len(response.get_json()) == 3
+            profile_id = response.headers['X-Profile-Id']
+
+            # Results need the token too
+            assert client.get(f'/api/profiles/{profile_id}').status_code == 404
+
+            headers = {'X-Profile': TOKEN}
+            summary = client.get(f'/api/profiles/{profile_id}', headers=headers).get_json()
+            assert summary['path'] == '/api/events?sport=Tennis'
+            assert summary['duration_ms'] > 0
+            assert summary['sql_count'] >= 1
+            assert 'X-Profile-Id' not in client.get(f'/api/profiles/{profile_id}', headers=headers).headers
+
+            sql = client.get(f'/api/profiles/{profile_id}/sql?limit=1', headers=headers).get_json()
+            assert len(sql) == 1
+            assert 'SELECT' in sql[0]['statement']
+            assert sql[0]['count'] >= 1
+
+            response = client.get(f'/api/profiles/{profile_id}/collapsed', headers=headers)
+            assert response.mimetype == 'text/plain'
+            lines = response.get_data(as_text=True).splitlines()
+            assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+            # The test client runs the request on this thread
+            assert all('test_profile_request' in line for line in lines)
+
+            response = client.get(f'/api/profiles/{profile_id}/flamegraph.svg', headers=headers)
+            assert response.mimetype == 'image/svg+xml'
+            assert 'GET /api/events' in response.get_data(as_text=True)
+    finally:
+        restore_profiling(previous)
+        teardown_test_db()
+
+def test_sampler_records_stacks():
+    """Test that the sampler records the stack of a busy thread"""
+    profile = RequestProfile('GET', '/slow')
+    sampler = StackSampler(profile, threading.get_ident(), 0.001)
+
+    def slow_function():
+        time.sleep(0.05)
+
+    sampler.start()
+    try:
+        slow_function()
+    finally:
+        sampler.stop()
+    assert sum(profile.stacks.values()) > 0
+    assert 'slow_function (test_profiling.py' in profile.collapsed()
+
+if __name__ == '__main__':
+    print("Running profiling tests...")
+
+    test_flamegraph_svg()
+    print("✓ Flame graph test passed")
+
+    test_unauthorized_requests_not_profiled()
+    print("✓ Unauthorized request test passed")
+
+    test_profile_request()
+    print("✓ Profile request test passed")
+
+    test_sampler_records_stacks()
+    print("✓ Sampler test passed")
+
+    print("\nAll profiling tests passed! ✓")
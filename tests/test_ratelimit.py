@@ -0,0 +1,224 @@
+"""
+Tests for rate limiting and admission control in Srazy web application
+"""
+import sys
+import os
+import json
+
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.backend.app import app, limiter
+from app.backend.models import db
+from app.backend.ratelimit import MemoryRateLimitBackend, SQLiteRateLimitBackend, parse_limit
+
+class FakeClock:
+    """Clock advanced by hand"""
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def setup_test_db():
+    """Setup test database"""
+    with app.app_context():
+        db.create_all()
+
+def teardown_test_db():
+    """Teardown test database"""
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+def check_bucket(backend, clock):
+    """Drain a bucket, then refill it over time"""
+    rate, burst = parse_limit('2/3')
+    for _ in range(3):
+        assert backend.take('client', rate, burst) == (True, 0.0)
+    allowed, retry_after = backend.take('client', rate, burst)
+    assert not allowed
+    assert retry_after == 0.5
+
+    # Other clients have their own bucket
+    assert backend.take('other', rate, burst)[0]
+
+    clock.now += 0.5
+    assert backend.take('client', rate, burst)[0]
+    assert not backend.take('client', rate, burst)[0]
+
+    # Refilling stops at the burst size
+    clock.now += 60
+    for _ in range(3):
+        assert backend.take('client', rate, burst)[0]
+    assert not backend.take('client', rate, burst)[0]
+
+def test_parse_limit():
+    """Test parsing and validating 'rate/burst'"""
+    assert parse_limit('0.5/10') == (0.5, 10.0)
+    for value in ('0/10', '-1/10', '1/0', '1/0.5', 'inf/10', 'nan/10', '5'):
+        try:
+            parse_limit(value)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f'{value} was accepted')
+
+def test_memory_backend():
+    """Test token buckets kept in memory"""
+    clock = FakeClock()
+    check_bucket(MemoryRateLimitBackend(clock=clock), clock)
+
+def test_memory_backend_eviction():
+    """Test that the least recently used buckets are evicted"""
+    clock = FakeClock()
+    backend = MemoryRateLimitBackend(maxsize=2, clock=clock)
+    backend.take('a', 1, 1)
+    backend.take('b', 1, 1)
+    assert not backend.take('a', 1, 1)[0]
+    backend.take('c', 1, 1)
+    assert not backend.take('a', 1, 1)[0]
+    assert backend.take('b', 1, 1)[0]
+
+def test_sqlite_backend(tmp_path):
+    """Test token buckets shared through a SQLite file"""
+    clock = FakeClock()
+    path = str(tmp_path / 'ratelimit.db')
+    backend = SQLiteRateLimitBackend(path, clock=clock)
+    check_bucket(backend, clock)
+
+    # A second backend on the same file sees the same buckets
+    assert not SQLiteRateLimitBackend(path, clock=clock).take('client', 2, 3)[0]
+
+    clock.now += 7200
+    assert backend.sweep() == 2
+    backend.reset()
+
+def test_sqlite_backend_sweeps(tmp_path):
+    """Test that idle buckets are swept periodically"""
+    clock = FakeClock()
+    backend = SQLiteRateLimitBackend(str(tmp_path / 'ratelimit.db'), clock=clock, sweep_every=2)
+    backend.take('idle', 1, 1)
+    clock.now += 7200
+    backend.take('active', 1, 1)
+    assert backend.sweep() == 0
+    assert not backend.take('active', 1, 1)[0]
+
+def test_rate_limited_endpoint():
+    """Test that writes over the limit get 429 with Retry-After"""
+    setup_test_db()
+    backend, limits, metrics_token = limiter.backend, dict(limiter.limits), limiter.metrics_token
+    limiter.backend = MemoryRateLimitBackend()
+    limiter.limits['write'] = (0.01, 2)
+    try:
+        with app.test_client() as client:
+            client.post('/api/users/register',
+                        data=json.dumps({'username': 'limited', 'email': 'limited@example.com',
+                                         'password': 'password123'}),
+                        content_type='application/json')
+            event_data = {
+                'sport': 'Running',
+                'date': '2030-05-01T07:00:00',
+                'place': 'Riverside',
+                'difficulty': 'Beginner',
+                'latitude': 40.7,
+                'longitude': -74.0
+            }
+            for _ in range(2):
+                response = client.post('/api/events', data=json.dumps(event_data),
+                                       content_type='application/json')
+                assert response.status_code == 201
+
+            response = client.post('/api/events', data=json.dumps(event_data),
+                                   content_type='application/json')
+            assert response.status_code == 429
+            assert int(response.headers['Retry-After']) >= 1
+
+            # Other route classes are not affected
+            assert client.get('/api/events').status_code == 200
+
+            # Metrics need the token
+            assert client.get('/api/ratelimit/metrics').status_code == 404
+            limiter.metrics_token = 'metrics-token'
+            assert client.get('/api/ratelimit/metrics', headers={'X-Metrics-Token': 'wrong'}).status_code == 404
+            metrics = client.get('/api/ratelimit/metrics', headers={'X-Metrics-Token': 'metrics-token'}).get_json()
+            assert metrics['write']['rate_limited'] >= 1
+            assert metrics['write']['admitted'] >= 2
+    finally:
+        limiter.metrics_token = metrics_token
+        limiter.backend = backend
+        limiter.limits.update(limits)
+        teardown_test_db()
+
+def test_clients_behind_proxy():
+    """Test that clients behind a trusted proxy get their own buckets"""
+    setup_test_db()
+    backend, limits, wsgi_app = limiter.backend, dict(limiter.limits), app.wsgi_app
+    limiter.backend = MemoryRateLimitBackend()
+    limiter.limits['read'] = (0.01, 1)
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
+    try:
+        with app.test_client() as client:
+            first = {'X-Forwarded-For': '203.0.113.1'}
+            assert client.get('/api/sports', headers=first).status_code == 200
+            assert client.get('/api/sports', headers=first).status_code == 429
+            assert client.get('/api/sports', headers={'X-Forwarded-For': '203.0.113.2'}).status_code == 200
+    finally:
+        app.wsgi_app = wsgi_app
+        limiter.backend = backend
+        limiter.limits.update(limits)
+        teardown_test_db()
+
+def test_search_concurrency():
+    """Test that searches over the concurrency cap get 503"""
+    setup_test_db()
+    semaphore = limiter.semaphores['search']
+    held = 0
+    while semaphore.acquire(blocking=False):
+        held += 1
+    try:
+        with app.test_client() as client:
+            response = client.get('/api/events')
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+            assert client.get('/api/sports').status_code == 200
+    finally:
+        for _ in range(held):
+            semaphore.release()
+        teardown_test_db()
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    print("Running rate limiting tests...")
+
+    test_parse_limit()
+    print("✓ Parse limit test passed")
+
+    test_memory_backend()
+    print("✓ Memory backend test passed")
+
+    test_memory_backend_eviction()
+    print("✓ Eviction test passed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_sqlite_backend(Path(tmp))
+    print("✓ SQLite backend test passed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_sqlite_backend_sweeps(Path(tmp))
+    print("✓ SQLite sweep test passed")
+
+    test_rate_limited_endpoint()
+    print("✓ Rate limited endpoint test passed")
+
+    test_clients_behind_proxy()
+    print("✓ Proxy test passed")
+
+    test_search_concurrency()
+    print("✓ Search concurrency test passed")
+
+    print("\nAll rate limiting tests passed! ✓")
@@ -0,0 +1,119 @@
+"""
+Tests for read/write splitting in Srazy web application
+"""
+import sys
+import os
+import json
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, insert
+from datetime import datetime
+
+from app.backend.app import app
+from app.backend.models import db, Event, Sport, Place, Difficulty, interner
+from app.backend.routing import STICKY_COOKIE, replica_binds
+
+def setup_test_db(replica_path):
+    """Setup test database with a SQLite file standing in for a replica"""
+    replica = create_engine(f'sqlite:///{replica_path}')
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(replica)
+        db.engines['replica_0'] = replica
+    return replica
+
+def teardown_test_db(replica):
+    """Teardown test database and detach the replica"""
+    with app.app_context():
+        db.session.remove()
+        del db.engines['replica_0']
+        db.drop_all()
+    replica.dispose()
+
+def add_replica_event(replica, sport):
+    """Insert an event into the replica only"""
+    with replica.begin() as conn:
+        conn.execute(insert(Event.__table__).values(
+            sport_id=interner.intern_many(conn, Sport, [sport])[sport],
+            date=datetime(2030, 6, 1, 10),
+            place_id=interner.intern_many(conn, Place, ['Replica Park'])['Replica Park'],
+            difficulty_id=interner.intern_many(conn, Difficulty, ['Beginner'])['Beginner'],
+            latitude=40.0, longitude=-74.0, created_at=datetime(2030, 1, 1)))
+
+def test_replica_binds():
+    """Test parsing replica URLs"""
+    assert replica_binds('') == {}
+    assert replica_binds('sqlite:///a.db, sqlite:///b.db') == {
+        'replica_0': 'sqlite:///a.db', 'replica_1': 'sqlite:///b.db'
+    }
+
+def test_reads_go_to_replica(tmp_path):
+    """Test that read-only handlers query the replica"""
+    replica = setup_test_db(tmp_path / 'replica.db')
+    try:
+        add_replica_event(replica, 'Rowing')
+        with app.test_client() as client:
+            events = client.get('/api/events?date_from=2030-01-01').get_json()
+            assert [event['sport'] for event in events] == ['Rowing']
+
+            # The event exists only on the replica
+            with app.app_context():
+                assert Event.query.count() == 0
+    finally:
+        teardown_test_db(replica)
+
+def test_read_your_writes(tmp_path):
+    """Test that a client reads from the primary right after writing"""
+    replica = setup_test_db(tmp_path / 'replica.db')
+    try:
+        with app.test_client() as client:
+            event_data = {
+                'sport': 'Cycling',
+                'date': '2030-06-02T10:00:00',
+                'place': 'Primary Park',
+                'difficulty': 'Advanced',
+                'latitude': 40.0,
+                'longitude': -74.0
+            }
+            response = client.post('/api/events',
+                                   data=json.dumps(event_data),
+                                   content_type='application/json')
+            assert response.status_code == 201
+            assert STICKY_COOKIE in response.headers['Set-Cookie']
+
+            events = client.get('/api/events?date_from=2030-01-01').get_json()
+            assert [event['sport'] for event in events] == ['Cycling']
+
+            # Without the cookie the replica (which lags behind) is used
+            client.delete_cookie(STICKY_COOKIE)
+            assert client.get('/api/events?date_from=2030-01-01').get_json() == []
+
+            # Failed writes do not pin the client
+            response = client.post('/api/events',
+                                   data=json.dumps({'sport': 'Cycling'}),
+                                   content_type='application/json')
+            assert response.status_code == 400
+            assert STICKY_COOKIE not in response.headers.get('Set-Cookie', '')
+    finally:
+        teardown_test_db(replica)
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    print("Running read/write splitting tests...")
+
+    test_replica_binds()
+    print("✓ Replica binds test passed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_reads_go_to_replica(Path(tmp))
+    print("✓ Replica reads test passed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_read_your_writes(Path(tmp))
+    print("✓ Read-your-writes test passed")
+
+    print("\nAll read/write splitting tests passed! ✓")
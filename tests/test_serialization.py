@@ -0,0 +1,95 @@
+"""
+Tests for JSON serialization helpers in Srazy web application
+"""
+import sys
+import os
+import json
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.backend.app import app
+from app.backend.models import db, Event
+from app.backend.serialization import FastJSONProvider, make_row_encoder, encode_event_row
+
+def setup_test_db():
+    """Setup test database"""
+    with app.app_context():
+        db.create_all()
+
+def teardown_test_db():
+    """Teardown test database"""
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+def test_row_encoder():
+    """Test encoding a tuple with converters"""
+    encode = make_row_encoder(['id', ('date', 'iso'), ('label', str.upper)])
+    row = (1, datetime(2030, 5, 1, 18, 30), 'abc')
+    assert encode(row) == {'id': 1, 'date': '2030-05-01T18:30:00', 'label': 'ABC'}
+    assert encode((2, None, 'x'))['date'] is None
+    assert encode.fields == ('id', 'date', 'label')
+
+def test_event_encoder_matches_to_dict():
+    """Test that the list endpoint returns the same fields as Event.to_dict()"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            event_data = {
+                'sport': 'Tennis',
+                'date': (datetime.now() + timedelta(days=3)).isoformat(),
+                'place': 'City Courts',
+                'difficulty': 'Beginner',
+                'latitude': 40.7,
+                'longitude': -74.0,
+                'description': 'Doubles'
+            }
+            created = client.post('/api/events',
+                                  data=json.dumps(event_data),
+                                  content_type='application/json').get_json()
+
+            listed = client.get('/api/events').get_json()
+            assert len(listed) == 1
+            assert listed[0] == created
+
+            with app.app_context():
+                event = db.session.get(Event, created['id'])
+                assert set(encode_event_row.fields) == set(event.to_dict())
+    finally:
+        teardown_test_db()
+
+def test_json_provider_backends():
+    """Test that both JSON backends produce equivalent output"""
+    data = {'name': 'Événement', 'id': 1, 'items': [1.5, None, True], '2': 'two'}
+
+    app.config['JSON_BACKEND'] = 'stdlib'
+    try:
+        stdlib_provider = FastJSONProvider(app)
+    finally:
+        app.config['JSON_BACKEND'] = 'auto'
+    auto_provider = FastJSONProvider(app)
+
+    assert stdlib_provider.backend == 'stdlib'
+    assert json.loads(stdlib_provider.dumps(data)) == json.loads(auto_provider.dumps(data))
+    # Keys are sorted, as with Flask's default provider
+    assert list(json.loads(stdlib_provider.dumps(data))) == sorted(data)
+    assert list(json.loads(auto_provider.dumps(data))) == sorted(data)
+    assert auto_provider.loads('{"a": [1, 2]}') == {'a': [1, 2]}
+    assert json.loads(auto_provider.dumps(data, indent=2)) == {'id': 1, 'name': 'Événement',
+                                                              'items': [1.5, None, True], '2': 'two'}
+
+if __name__ == '__main__':
+    print("Running serialization tests...")
+
+    test_row_encoder()
+    print("✓ Row encoder test passed")
+
+    test_event_encoder_matches_to_dict()
+    print("✓ Event encoder test passed")
+
+    test_json_provider_backends()
+    print("✓ JSON provider test passed")
+
+    print("\nAll serialization tests passed! ✓")
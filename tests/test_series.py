@@ -0,0 +1,264 @@
+"""
+Tests for recurring event series in Srazy web application
+"""
+import sys
+import os
+import json
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, select, text
+
+from app.backend.app import app
+from app.backend.models import db, Event, EventSeries
+from app.backend.migrations import migrate_series_ends, needs_series_end_migration
+from app.backend.series import fetch_series
+
+def setup_test_db():
+    """Setup test database"""
+    with app.app_context():
+        db.create_all()
+
+def teardown_test_db():
+    """Teardown test database"""
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+def create_series(client, **fields):
+    """Create a weekly running series and return it"""
+    series_data = {
+        'sport': 'Running',
+        'start': '2030-01-01T18:00:00',
+        'place': 'Central Park',
+        'difficulty': 'Beginner',
+        'latitude': 40.785091,
+        'longitude': -73.968285,
+        'frequency': 'weekly'
+    }
+    series_data.update(fields)
+    response = client.post('/api/series',
+                           data=json.dumps(series_data),
+                           content_type='application/json')
+    assert response.status_code == 201
+    return response.get_json()
+
+def get_events(client, date_from, date_to):
+    """List events in a date window"""
+    response = client.get(f'/api/events?date_from={date_from}&date_to={date_to}')
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_occurrence_arithmetic():
+    """Test expanding a window far from the series start"""
+    series = EventSeries(start=datetime(2030, 1, 1, 18), frequency='weekly', interval=2,
+                         until=None, count=None, excluded='')
+    occurrences = list(series.occurrences(datetime(2040, 1, 1), datetime(2040, 1, 31)))
+    assert len(occurrences) in (2, 3)
+    assert all((start - series.start) % timedelta(weeks=2) == timedelta(0) for start in occurrences)
+
+    series.count = 3
+    assert list(series.occurrences(datetime(2040, 1, 1), datetime(2040, 1, 31))) == []
+    assert len(list(series.occurrences(datetime(2000, 1, 1), datetime(2050, 1, 1)))) == 3
+
+    series.exclude(datetime(2030, 1, 15, 18))
+    assert not series.is_occurrence(datetime(2030, 1, 15, 18))
+    assert series.is_occurrence(datetime(2030, 1, 29, 18))
+
+def test_series_expanded_in_window():
+    """Test that a series is listed only within the requested window"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            series = create_series(client, until='2030-12-31T23:59:59')
+
+            events = get_events(client, '2030-03-01', '2030-03-31')
+            assert [event['date'] for event in events] == [
+                '2030-03-05T18:00:00', '2030-03-12T18:00:00',
+                '2030-03-19T18:00:00', '2030-03-26T18:00:00'
+            ]
+            assert all(event['series_id'] == series['id'] for event in events)
+            assert get_events(client, '2031-01-01', '2031-12-31') == []
+
+            # A year of weekly occurrences is a single row
+            with app.app_context():
+                assert EventSeries.query.count() == 1
+                assert Event.query.count() == 0
+
+            # Filters apply to series too
+            response = client.get('/api/events?sport=Cycling&date_from=2030-03-01&date_to=2030-03-31')
+            assert response.get_json() == []
+    finally:
+        teardown_test_db()
+
+def test_until_before_start_rejected():
+    """Test that a series ending before it starts is rejected"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            response = client.post('/api/series', data=json.dumps({
+                'sport': 'Running', 'start': '2030-01-01T18:00:00', 'until': '2029-12-31T00:00:00',
+                'place': 'Central Park', 'difficulty': 'Beginner', 'latitude': 40.78, 'longitude': -73.97
+            }), content_type='application/json')
+            assert response.status_code == 400
+    finally:
+        teardown_test_db()
+
+def test_missing_series_not_found():
+    """Test that writes to an unknown series get 404"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            base = '/api/series/9999'
+            occurrence = f'{base}/occurrences/2030-01-01T18:00:00'
+            assert client.get(base).status_code == 404
+            assert client.delete(base).status_code == 404
+            assert client.put(occurrence, data=json.dumps({'description': 'x'}),
+                              content_type='application/json').status_code == 404
+            assert client.delete(occurrence).status_code == 404
+            assert client.post(f'{occurrence}/participate').status_code == 404
+    finally:
+        teardown_test_db()
+
+def test_finished_series_not_loaded():
+    """Test that series limited by count or until are skipped after their end"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            counted = create_series(client, count=3)
+            create_series(client, until='2030-01-10T00:00:00')
+            with app.app_context():
+                assert db.session.get(EventSeries, counted['id']).ends_at == datetime(2030, 1, 15, 18, 0)
+                assert len(fetch_series(datetime(2030, 1, 1), datetime(2030, 1, 31))) == 2
+                assert fetch_series(datetime(2030, 1, 16), datetime(2030, 12, 31)) == []
+    finally:
+        teardown_test_db()
+
+def test_migrate_series_ends(tmp_path):
+    """Test filling ends_at for series created before it existed"""
+    engine = create_engine(f'sqlite:///{tmp_path / "series.db"}')
+    series = EventSeries.__table__
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text('DROP INDEX ix_event_series_ends_at'))
+        conn.execute(text('ALTER TABLE event_series DROP COLUMN ends_at'))
+        for i, (until, count) in enumerate([(None, 4), ('2030-02-01 00:00:00.000000', None), (None, None)]):
+            conn.execute(text(
+                "INSERT INTO event_series (id, sport_id, place_id, difficulty_id, latitude, longitude, start, "
+                "frequency, interval, until, count, excluded) VALUES "
+                "(:id, 1, 1, 1, 40.7, -74.0, '2030-01-01 18:00:00.000000', 'daily', 2, :until, :count, '')"
+            ), {'id': i + 1, 'until': until, 'count': count})
+
+    assert needs_series_end_migration(engine, series)
+    assert migrate_series_ends(engine, EventSeries) == 2
+    assert not needs_series_end_migration(engine, series)
+    assert migrate_series_ends(engine, EventSeries) is None
+    with engine.connect() as conn:
+        ends = conn.execute(select(series.c.ends_at).order_by(series.c.id)).scalars().all()
+        assert ends == [datetime(2030, 1, 7, 18, 0), datetime(2030, 2, 1), None]
+    engine.dispose()
+
+def test_occurrence_override_and_cancel():
+    """Test overriding and cancelling single occurrences"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            series = create_series(client)
+            base = f"/api/series/{series['id']}/occurrences"
+
+            response = client.put(f'{base}/2030-03-12T18:00:00',
+                                  data=json.dumps({'place': 'Riverside', 'date': '2030-03-12T19:00:00'}),
+                                  content_type='application/json')
+            assert response.status_code == 200
+            override = response.get_json()
+            assert override['place'] == 'Riverside'
+
+            response = client.delete(f'{base}/2030-03-19T18:00:00')
+            assert response.status_code == 200
+
+            events = get_events(client, '2030-03-01', '2030-03-31')
+            assert [(event['date'], event['place']) for event in events] == [
+                ('2030-03-12T19:00:00', 'Riverside'),
+                ('2030-03-05T18:00:00', 'Central Park'),
+                ('2030-03-26T18:00:00', 'Central Park')
+            ]
+            assert events[0]['id'] == override['id']
+
+            # Deleting the overriding event cancels the occurrence
+            client.delete(f"/api/events/{override['id']}")
+            events = get_events(client, '2030-03-01', '2030-03-31')
+            assert [event['date'] for event in events] == ['2030-03-05T18:00:00', '2030-03-26T18:00:00']
+
+            # Times that are not occurrences are rejected
+            response = client.put(f'{base}/2030-03-13T18:00:00',
+                                  data=json.dumps({'place': 'Nowhere'}),
+                                  content_type='application/json')
+            assert response.status_code == 400
+    finally:
+        teardown_test_db()
+
+def test_occurrence_participation():
+    """Test joining a single occurrence"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            client.post('/api/users/register',
+                        data=json.dumps({'username': 'runner', 'email': 'runner@example.com',
+                                         'password': 'testpass123'}),
+                        content_type='application/json')
+            series = create_series(client)
+            url = f"/api/series/{series['id']}/occurrences/2030-03-05T18:00:00/participate"
+
+            response = client.post(url)
+            assert response.status_code == 200
+            data = response.get_json()
+            assert data['participating'] is True
+            assert data['participant_count'] == 1
+
+            events = client.get('/api/events?date_from=2030-03-01&date_to=2030-03-10'
+                                '&include_participation=true').get_json()
+            assert len(events) == 1
+            assert events[0]['id'] == data['event_id']
+            assert events[0]['participating'] is True
+
+            # Leaving reuses the materialized event
+            response = client.post(url)
+            assert response.get_json()['participating'] is False
+            assert response.get_json()['event_id'] == data['event_id']
+    finally:
+        teardown_test_db()
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    print("Running series tests...")
+
+    test_occurrence_arithmetic()
+    print("✓ Occurrence arithmetic test passed")
+
+    test_series_expanded_in_window()
+    print("✓ Series expansion test passed")
+
+    test_until_before_start_rejected()
+    print("✓ Until before start test passed")
+
+    test_missing_series_not_found()
+    print("✓ Missing series test passed")
+
+    test_finished_series_not_loaded()
+    print("✓ Finished series test passed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_migrate_series_ends(Path(tmp))
+    print("✓ Series end migration test passed")
+
+    test_occurrence_override_and_cancel()
+    print("✓ Occurrence override test passed")
+
+    test_occurrence_participation()
+    print("✓ Occurrence participation test passed")
+
+    print("\nAll series tests passed! ✓")
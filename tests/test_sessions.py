@@ -0,0 +1,171 @@
+"""
+Tests for server-side sessions and the current user cache in Srazy web application
+"""
+import sys
+import os
+import json
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.backend.app import app, current_user_cache
+from app.backend.models import db, SessionRecord
+from app.backend.cache import TTLCache
+from app.backend.sessions import ServerSideSessionInterface, MemorySessionStore, SQLSessionStore
+
+def setup_test_db():
+    """Setup test database"""
+    with app.app_context():
+        db.create_all()
+
+def teardown_test_db():
+    """Teardown test database"""
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+def register(client, username='sessionuser'):
+    """Register and log in a test user"""
+    return client.post('/api/users/register',
+                       data=json.dumps({'username': username,
+                                        'email': f'{username}@example.com',
+                                        'password': 'testpass123'}),
+                       content_type='application/json')
+
+def use_store(store):
+    """Switch the app to a server-side store, returning the previous interface"""
+    previous = app.session_interface
+    app.session_interface = ServerSideSessionInterface(store)
+    return previous
+
+def test_memory_session_store():
+    """Test login state kept in a server-side store"""
+    setup_test_db()
+    store = MemorySessionStore()
+    previous = use_store(store)
+    try:
+        with app.test_client() as client:
+            register(client)
+            sid = client.get_cookie('session').value
+            assert len(store._sessions) == 1
+            assert sid in store._sessions
+            assert 'sessionuser' not in sid
+
+            response = client.get('/api/users/current')
+            assert response.status_code == 200
+            assert response.get_json()['username'] == 'sessionuser'
+
+            # Revoking the stored session logs the client out
+            store.delete(sid)
+            assert client.get('/api/users/current').status_code == 401
+    finally:
+        app.session_interface = previous
+        teardown_test_db()
+
+def test_session_id_rotates_on_login():
+    """Test that logging in issues a new session id"""
+    setup_test_db()
+    store = MemorySessionStore()
+    previous = use_store(store)
+    try:
+        with app.test_client() as client:
+            register(client)
+            first_sid = client.get_cookie('session').value
+            client.post('/api/users/logout')
+            assert client.get_cookie('session') is None
+            assert len(store._sessions) == 0
+
+            client.post('/api/users/login',
+                        data=json.dumps({'username': 'sessionuser', 'password': 'testpass123'}),
+                        content_type='application/json')
+            assert client.get_cookie('session').value != first_sid
+    finally:
+        app.session_interface = previous
+        teardown_test_db()
+
+def test_sql_session_store():
+    """Test the database session store, revocation and sweeping"""
+    setup_test_db()
+    previous = use_store(SQLSessionStore(db, SessionRecord.__table__))
+    try:
+        client = app.test_client()
+        other = app.test_client()
+        register(client)
+        other.post('/api/users/login',
+                   data=json.dumps({'username': 'sessionuser', 'password': 'testpass123'}),
+                   content_type='application/json')
+        assert other.get('/api/users/current').status_code == 200
+
+        with app.app_context():
+            assert SessionRecord.query.count() == 2
+
+        # Logging out everywhere revokes the other client's session
+        client.post('/api/users/logout',
+                    data=json.dumps({'all': True}),
+                    content_type='application/json')
+        assert other.get('/api/users/current').status_code == 401
+
+        with app.app_context():
+            store = app.session_interface.store
+            store.save('expired', '{}', datetime.utcnow() - timedelta(seconds=1))
+            store.save('live', '{}', datetime.utcnow() + timedelta(hours=1))
+            assert store.load('expired') is None
+            assert store.sweep() == 1
+            assert store.load('live') == '{}'
+    finally:
+        app.session_interface = previous
+        teardown_test_db()
+
+def test_current_user_cache():
+    """Test that the current user is served from the cache"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            user_id = register(client).get_json()['id']
+            assert current_user_cache.get(user_id)['username'] == 'sessionuser'
+
+            # A cached entry is returned without a database lookup
+            current_user_cache.set(user_id, {'id': user_id, 'username': 'cached'})
+            assert client.get('/api/users/current').get_json()['username'] == 'cached'
+
+            current_user_cache.delete(user_id)
+            assert client.get('/api/users/current').get_json()['username'] == 'sessionuser'
+    finally:
+        current_user_cache.clear()
+        teardown_test_db()
+
+def test_ttl_cache_expiry():
+    """Test TTL cache expiry and size bound"""
+    cache = TTLCache(ttl=0.01, maxsize=2)
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    time.sleep(0.02)
+    assert cache.get('a') is None
+
+    cache.set('a', 1, ttl=60)
+    cache.set('b', 2, ttl=60)
+    cache.set('c', 3, ttl=60)
+    assert len(cache) == 2
+    assert cache.get('c') == 3
+
+if __name__ == '__main__':
+    print("Running session tests...")
+
+    test_memory_session_store()
+    print("✓ Memory session store test passed")
+
+    test_session_id_rotates_on_login()
+    print("✓ Session id rotation test passed")
+
+    test_sql_session_store()
+    print("✓ SQL session store test passed")
+
+    test_current_user_cache()
+    print("✓ Current user cache test passed")
+
+    test_ttl_cache_expiry()
+    print("✓ TTL cache test passed")
+
+    print("\nAll session tests passed! ✓")
@@ -0,0 +1,265 @@
+"""
+Tests for the spatial index and nearby events endpoint in Srazy web application
+"""
+import sys
+import os
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.backend.app import app, spatial_index, task_queue, LOCATIONS_VERSION
+from app.backend.models import db, Event, DataVersion
+from app.backend.spatial import SpatialIndex, haversine_km
+
+def setup_test_db():
+    """Setup test database"""
+    with app.app_context():
+        db.create_all()
+    spatial_index.reset()
+
+def teardown_test_db():
+    """Teardown test database"""
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+    spatial_index.reset()
+
+def random_points(count, seed=7):
+    """Random (id, lat, lng, date) rows clustered around a few cities"""
+    rng = np.random.default_rng(seed)
+    centers = np.array([[40.7, -74.0], [50.08, 14.42], [-33.9, 151.2], [64.1, -21.9]])
+    picks = centers[rng.integers(0, len(centers), count)]
+    lats = np.clip(picks[:, 0] + rng.normal(0, 0.5, count), -89.9, 89.9)
+    lngs = (picks[:, 1] + rng.normal(0, 0.5, count) + 180) % 360 - 180
+    start = datetime(2030, 1, 1)
+    return [(i + 1, float(lats[i]), float(lngs[i]), start + timedelta(hours=i))
+            for i in range(count)]
+
+def brute_force_nearest(rows, lat, lng, k):
+    """Ids of the k nearest rows by exhaustive search"""
+    lats = np.array([row[1] for row in rows])
+    lngs = np.array([row[2] for row in rows])
+    distances = haversine_km(lat, lng, lats, lngs)
+    return sorted(distances)[:k]
+
+def test_haversine():
+    """Test the vectorized haversine distance"""
+    # Prague to New York is about 6,570 km
+    distance = haversine_km(50.0755, 14.4378, np.array([40.7128]), np.array([-74.0060]))[0]
+    assert 6500 < distance < 6650
+    assert haversine_km(10.0, 20.0, np.array([10.0]), np.array([20.0]))[0] == 0
+
+def test_nearest_matches_brute_force():
+    """Test k-nearest queries against an exhaustive search"""
+    rows = random_points(5000)
+    index = SpatialIndex(loader=lambda: rows)
+    for lat, lng in [(40.7, -74.0), (50.1, 14.4), (0.0, 0.0), (64.0, -22.0), (-33.0, 150.0)]:
+        ids, distances = index.nearest(lat, lng, k=15)
+        assert len(ids) == 15
+        expected = brute_force_nearest(rows, lat, lng, 15)
+        assert np.allclose(sorted(distances), expected)
+
+def test_within_radius_and_updates():
+    """Test radius queries and incremental updates"""
+    index = SpatialIndex(loader=lambda: [(1, 40.70, -74.00, datetime(2030, 1, 2)),
+                                         (2, 40.71, -74.01, datetime(2030, 1, 1)),
+                                         (3, 41.50, -74.00, datetime(2030, 1, 1))])
+    ids, distances = index.within(40.70, -74.00, radius_km=5)
+    assert ids == [1, 2]
+    assert all(d <= 5 for d in distances)
+
+    index.upsert(3, 40.705, -74.005, datetime(2030, 1, 3))
+    index.upsert(4, 40.7001, -74.0001, datetime(2029, 12, 31))
+    index.remove(1)
+    ids, _ = index.within(40.70, -74.00, radius_km=5)
+    assert sorted(ids) == [2, 3, 4]
+    assert ids[0] == 4
+    assert len(index) == 3
+
+    # Events before the cut-off date are excluded
+    ids, _ = index.within(40.70, -74.00, radius_km=5, after=datetime(2030, 1, 2))
+    assert ids == [3]
+
+def test_reload_on_version_change():
+    """Test that the index reloads when the data version changes"""
+    rows = [(1, 40.70, -74.00, None)]
+    versions = ['v1']
+    index = SpatialIndex(loader=lambda: list(rows), version=lambda: versions[0])
+    assert index.within(40.70, -74.00, radius_km=5)[0] == [1]
+
+    rows.append((2, 40.71, -74.00, None))
+    assert index.within(40.70, -74.00, radius_km=5)[0] == [1]
+    versions[0] = 'v2'
+    assert sorted(index.within(40.70, -74.00, radius_km=5)[0]) == [1, 2]
+
+    # A write applied to the index itself advances its version
+    rows.append((3, 40.72, -74.00, None))
+    index.upsert(3, 40.72, -74.00)
+    versions[0] = 'v3'
+    index.advance('v2', 'v3')
+    rows.clear()
+    assert len(index) == 3
+
+    # ...unless another write happened in between
+    index.advance('v4', 'v5')
+    versions[0] = 'v5'
+    assert len(index) == 0
+
+    # Versions are checked at most every refresh_interval seconds
+    index.refresh_interval = 3600
+    versions[0] = 'v6'
+    rows.append((1, 40.70, -74.00, None))
+    assert len(index) == 0
+
+def test_nearby_sees_other_workers_writes():
+    """Test that writes this worker's index was not told about show up"""
+    setup_test_db()
+    refresh_interval = spatial_index.refresh_interval
+    spatial_index.refresh_interval = 0
+    try:
+        with app.test_client() as client:
+            response = client.post('/api/events', data=json.dumps({
+                'sport': 'Football',
+                'date': (datetime.now() + timedelta(days=1)).isoformat(),
+                'place': 'Far Field',
+                'difficulty': 'Beginner',
+                'latitude': 41.7128,
+                'longitude': -74.0060
+            }), content_type='application/json')
+            event_id = response.get_json()['id']
+            task_queue.join()
+            assert client.get('/api/events/nearby?lat=40.7128&lng=-74.0060&radius_km=5').get_json() == []
+
+            # Another worker moves the event and replaces the locations version
+            with app.app_context(), db.engine.begin() as conn:
+                conn.execute(Event.__table__.update().where(Event.__table__.c.id == event_id)
+                             .values(latitude=40.7128))
+                conn.execute(DataVersion.__table__.update()
+                             .where(DataVersion.__table__.c.name == LOCATIONS_VERSION)
+                             .values(version='other-worker'))
+
+            data = client.get('/api/events/nearby?lat=40.7128&lng=-74.0060&radius_km=5').get_json()
+            assert [event['id'] for event in data] == [event_id]
+    finally:
+        spatial_index.refresh_interval = refresh_interval
+        teardown_test_db()
+
+def test_no_reload_after_own_or_unrelated_writes():
+    """Test that writes this worker applied, or that do not move events, keep the index"""
+    setup_test_db()
+    refresh_interval, loader = spatial_index.refresh_interval, spatial_index.loader
+    loads = []
+    spatial_index.refresh_interval = 0
+    spatial_index.loader = lambda: loads.append(1) or loader()
+    try:
+        with app.test_client() as client:
+            nearby = '/api/events/nearby?lat=40.7128&lng=-74.0060&radius_km=5'
+            assert client.get(nearby).get_json() == []
+            client.post('/api/users/register',
+                        data=json.dumps({'username': 'mapper', 'email': 'mapper@example.com',
+                                         'password': 'password123'}),
+                        content_type='application/json')
+            response = client.post('/api/events', data=json.dumps({
+                'sport': 'Football',
+                'date': (datetime.now() + timedelta(days=1)).isoformat(),
+                'place': 'Close Park',
+                'difficulty': 'Beginner',
+                'latitude': 40.7130,
+                'longitude': -74.0060
+            }), content_type='application/json')
+            event_id = response.get_json()['id']
+            client.post(f'/api/events/{event_id}/participate')
+            client.put(f'/api/events/{event_id}', data=json.dumps({'description': 'Bring a ball'}),
+                       content_type='application/json')
+            task_queue.join()
+            assert [event['id'] for event in client.get(nearby).get_json()] == [event_id]
+            assert len(loads) == 1
+    finally:
+        spatial_index.refresh_interval, spatial_index.loader = refresh_interval, loader
+        teardown_test_db()
+
+def test_nearby_endpoint():
+    """Test the nearby events API"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            places = [('Close Park', 40.7130, -74.0060, 1),
+                      ('Mid Court', 40.7300, -74.0060, 2),
+                      ('Far Field', 41.7128, -74.0060, 3),
+                      ('Old Track', 40.7128, -74.0061, -3)]
+            for place, lat, lng, days in places:
+                event_data = {
+                    'sport': 'Football',
+                    'date': (datetime.now() + timedelta(days=days)).isoformat(),
+                    'place': place,
+                    'difficulty': 'Beginner',
+                    'latitude': lat,
+                    'longitude': lng
+                }
+                client.post('/api/events',
+                           data=json.dumps(event_data),
+                           content_type='application/json')
+            
+            response = client.get('/api/events/nearby?lat=40.7128&lng=-74.0060&k=2')
+            assert response.status_code == 200
+            data = response.get_json()
+            assert [event['place'] for event in data] == ['Close Park', 'Mid Court']
+            assert data[0]['distance_km'] < data[1]['distance_km']
+            
+            data = client.get('/api/events/nearby?lat=40.7128&lng=-74.0060&include_past=true').get_json()
+            assert data[0]['place'] == 'Old Track'
+            assert len(data) == 4
+            
+            data = client.get('/api/events/nearby?lat=40.7128&lng=-74.0060&radius_km=5').get_json()
+            assert [event['place'] for event in data] == ['Close Park', 'Mid Court']
+            
+            # Moving an event updates the index
+            far_id = client.get('/api/events?place=Far').get_json()[0]['id']
+            client.put(f'/api/events/{far_id}',
+                       data=json.dumps({'latitude': 40.7128, 'longitude': -74.0059}),
+                       content_type='application/json')
+            task_queue.join()
+            data = client.get('/api/events/nearby?lat=40.7128&lng=-74.0060&k=1').get_json()
+            assert data[0]['place'] == 'Far Field'
+            
+            assert client.get('/api/events/nearby?lat=abc&lng=1').status_code == 400
+            assert client.get('/api/events/nearby?lat=95&lng=1').status_code == 400
+            for radius_km in ('inf', 'nan', '-1', 'far'):
+                response = client.get(f'/api/events/nearby?lat=1&lng=1&radius_km={radius_km}')
+                assert response.status_code == 400
+                assert 'radius_km' in response.get_json()['error']
+            response = client.get('/api/events/nearby?lat=1&lng=1&k=x')
+            assert response.status_code == 400
+            assert 'k must be' in response.get_json()['error']
+    finally:
+        teardown_test_db()
+
+if __name__ == '__main__':
+    print("Running spatial tests...")
+
+    test_haversine()
+    print("✓ Haversine test passed")
+
+    test_nearest_matches_brute_force()
+    print("✓ Nearest neighbour test passed")
+
+    test_within_radius_and_updates()
+    print("✓ Radius and update test passed")
+
+    test_reload_on_version_change()
+    print("✓ Version reload test passed")
+
+    test_nearby_sees_other_workers_writes()
+    print("✓ Other workers' writes test passed")
+
+    test_no_reload_after_own_or_unrelated_writes()
+    print("✓ No reload test passed")
+
+    test_nearby_endpoint()
+    print("✓ Nearby endpoint test passed")
+
+    print("\nAll spatial tests passed! ✓")
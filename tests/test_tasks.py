@@ -0,0 +1,201 @@
+"""
+Tests for background tasks in Srazy web application
+"""
+import sys
+import os
+import threading
+import time
+
+from sqlalchemy import event
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.backend.app import app, task_queue
+from app.backend.models import db, User, PendingTask
+from app.backend.tasks import TaskQueue
+
+calls = []
+flaky_failures = {'left': 0}
+done = threading.Event()
+
+@task_queue.task
+def record_call(value):
+    """Task used by the tests"""
+    calls.append(value)
+    done.set()
+
+@task_queue.task(max_retries=2)
+def flaky(value):
+    """Task that fails a given number of times before succeeding"""
+    if flaky_failures['left'] > 0:
+        flaky_failures['left'] -= 1
+        raise RuntimeError('temporary failure')
+    calls.append(value)
+
+@task_queue.task(durable=False)
+def local_upkeep(value):
+    """Non-durable task used by the tests"""
+    calls.append(value)
+
+def setup_test_db():
+    """Setup test database"""
+    calls.clear()
+    done.clear()
+    with app.app_context():
+        db.create_all()
+
+def teardown_test_db():
+    """Teardown test database"""
+    task_queue.join()
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+def add_user(username):
+    """Add a user without committing"""
+    user = User(username=username, email=f'{username}@example.com')
+    user.set_password('testpass123')
+    db.session.add(user)
+
+def test_after_commit():
+    """Test that tasks run only after the transaction commits"""
+    setup_test_db()
+    try:
+        with app.app_context():
+            add_user('rolledback')
+            task_queue.after_commit(record_call, 'rolled back')
+            db.session.rollback()
+
+            add_user('committed')
+            task_queue.after_commit(record_call, 'committed')
+            assert not done.wait(0.05)
+            db.session.commit()
+
+        assert task_queue.join(timeout=5)
+        assert calls == ['committed']
+    finally:
+        teardown_test_db()
+
+def test_retry_with_backoff():
+    """Test retrying a failing task and giving up after max_retries"""
+    setup_test_db()
+    base_delay = task_queue.base_delay
+    task_queue.base_delay = 0.01
+    try:
+        flaky_failures['left'] = 2
+        task_queue.enqueue(flaky, 'recovered')
+        assert task_queue.join(timeout=5)
+        assert calls == ['recovered']
+
+        flaky_failures['left'] = 3
+        task_queue.enqueue(flaky, 'lost')
+        assert task_queue.join(timeout=5)
+        assert calls == ['recovered']
+        with app.app_context():
+            stored = PendingTask.query.one()
+            assert stored.name == 'flaky'
+            assert stored.failed
+            assert stored.attempts == 3
+            assert 'temporary failure' in stored.last_error
+    finally:
+        task_queue.base_delay = base_delay
+        flaky_failures['left'] = 0
+        teardown_test_db()
+
+def test_durable_fallback():
+    """Test storing tasks when the queue is full and restoring them"""
+    setup_test_db()
+    maxsize = task_queue.maxsize
+    try:
+        task_queue.maxsize = 0
+        task_queue.enqueue(record_call, 'stored')
+        with app.app_context():
+            assert PendingTask.query.count() == 1
+        assert calls == []
+
+        # Idle workers also restore stored tasks periodically
+        task_queue.maxsize = maxsize
+        task_queue.restore()
+        assert task_queue.join(timeout=5)
+        assert calls == ['stored']
+        with app.app_context():
+            assert PendingTask.query.count() == 0
+    finally:
+        task_queue.maxsize = maxsize
+        teardown_test_db()
+
+def test_non_durable_tasks_dropped():
+    """Test that non-durable tasks are dropped instead of stored"""
+    setup_test_db()
+    maxsize = task_queue.maxsize
+    try:
+        task_queue.maxsize = 0
+        task_queue.enqueue(local_upkeep, 'dropped')
+        with app.app_context():
+            assert PendingTask.query.count() == 0
+
+        # Rows stored by older versions are not replayed
+        with app.app_context():
+            db.session.add(PendingTask(name='local_upkeep', payload='{"args": ["stale"], "kwargs": {}}'))
+            db.session.commit()
+        task_queue.maxsize = maxsize
+        assert task_queue.restore() == 0
+        assert task_queue.join(timeout=5)
+        assert calls == []
+        with app.app_context():
+            assert PendingTask.query.count() == 0
+    finally:
+        task_queue.maxsize = maxsize
+        teardown_test_db()
+
+def test_poll_only_with_durable_tasks():
+    """Test that idle workers only look for stored tasks if some task can be stored"""
+    queue = TaskQueue(app, db, PendingTask.__table__, workers=1, poll_interval=0.01)
+    polls = []
+    queue.restore = lambda limit=None: polls.append(1) or 0
+
+    def local_task(value):
+        calls.append(value)
+
+    def stored_task(value):
+        calls.append(value)
+
+    calls.clear()
+    try:
+        queue.task(local_task, durable=False)
+        queue.enqueue(local_task, 'local')
+        assert queue.join(timeout=5)
+        time.sleep(0.1)
+        assert polls == []
+
+        queue.task(stored_task)
+        queue.enqueue(stored_task, 'stored')
+        assert queue.join(timeout=5)
+        time.sleep(0.1)
+        assert polls
+        assert calls == ['local', 'stored']
+    finally:
+        queue.shutdown()
+        event.remove(db.session, 'after_commit', queue._run_after_commit)
+        event.remove(db.session, 'after_soft_rollback', queue._discard_after_rollback)
+
+if __name__ == '__main__':
+    print("Running background task tests...")
+
+    test_after_commit()
+    print("✓ After commit test passed")
+
+    test_retry_with_backoff()
+    print("✓ Retry test passed")
+
+    test_durable_fallback()
+    print("✓ Durable fallback test passed")
+
+    test_non_durable_tasks_dropped()
+    print("✓ Non-durable task test passed")
+
+    test_poll_only_with_durable_tasks()
+    print("✓ Polling test passed")
+
+    print("\nAll background task tests passed! ✓")
@@ -176,6 +176,88 @@ def test_event_with_author():
     finally:
         teardown_test_db()
 
+def create_events(client, count):
+    """Create events on consecutive days and return their ids"""
+    ids = []
+    for i in range(count):
+        event_data = {
+            'sport': 'Running',
+            'date': (datetime.now() + timedelta(days=i + 1)).isoformat(),
+            'place': f'Trail {i}',
+            'difficulty': 'Beginner',
+            'latitude': 40.7,
+            'longitude': -74.0
+        }
+        response = client.post('/api/events',
+                               data=json.dumps(event_data),
+                               content_type='application/json')
+        ids.append(response.get_json()['id'])
+    return ids
+
+def test_events_participation_flag():
+    """Test the participating flag on the event list"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            user_data = {
+                'username': 'flaguser',
+                'email': 'flag@example.com',
+                'password': 'testpass123'
+            }
+            client.post('/api/users/register',
+                       data=json.dumps(user_data),
+                       content_type='application/json')
+            ids = create_events(client, 3)
+            client.post(f'/api/events/{ids[1]}/participate')
+            
+            events = client.get('/api/events?include_participation=true').get_json()
+            flags = {event['id']: event['participating'] for event in events}
+            assert flags == {ids[0]: False, ids[1]: True, ids[2]: False}
+            
+            # The flag is only added on request
+            events = client.get('/api/events').get_json()
+            assert 'participating' not in events[0]
+            
+            # Anonymous users get no flag
+            client.post('/api/users/logout')
+            events = client.get('/api/events?include_participation=true').get_json()
+            assert 'participating' not in events[0]
+    finally:
+        teardown_test_db()
+
+def test_current_user_events_pagination():
+    """Test listing joined events with keyset pagination"""
+    setup_test_db()
+    try:
+        with app.test_client() as client:
+            response = client.get('/api/users/current/events')
+            assert response.status_code == 401
+            
+            user_data = {
+                'username': 'pageuser',
+                'email': 'page@example.com',
+                'password': 'testpass123'
+            }
+            client.post('/api/users/register',
+                       data=json.dumps(user_data),
+                       content_type='application/json')
+            ids = create_events(client, 5)
+            for event_id in ids[:4]:
+                client.post(f'/api/events/{event_id}/participate')
+            
+            page = client.get('/api/users/current/events?limit=3').get_json()
+            assert [event['id'] for event in page['events']] == ids[:3]
+            assert page['next_cursor']
+            
+            page = client.get(f'/api/users/current/events?limit=3&cursor={page["next_cursor"]}').get_json()
+            assert [event['id'] for event in page['events']] == ids[3:4]
+            assert page['next_cursor'] is None
+            
+            response = client.get('/api/users/current/events?cursor=bogus')
+            assert response.status_code == 400
+    finally:
+        teardown_test_db()
+
 if __name__ == '__main__':
     print("Running user tests...")
     
@@ -194,4 +276,10 @@ if __name__ == '__main__':
     test_event_with_author()
     print("✓ Event with author test passed")
     
+    test_events_participation_flag()
+    print("✓ Events participation flag test passed")
+    
+    test_current_user_events_pagination()
+    print("✓ Current user events pagination test passed")
+    
     print("\nAll user tests passed! ✓")